@@ -1,8 +1,10 @@
+import os
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config, pool, text
+from sqlalchemy import Connection, engine_from_config, pool, text
 
 from alembic import context
+from app.core.migrations import single_runner
 from app.core.settings import settings
 
 # Import our models and settings
@@ -17,7 +19,8 @@ config.set_main_option("sqlalchemy.url", settings.database_url)
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-if config.config_file_name is not None:
+# (unless the caller keeps its own logging, see config.attributes below)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -31,6 +34,10 @@ target_metadata = Base.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# DDL waiting longer than this for its lock fails instead of stalling the
+# queries queued behind it; rerun the upgrade (see app/core/migrations.py)
+LOCK_TIMEOUT = os.environ.get("MIGRATION_LOCK_TIMEOUT", "5s")
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -65,6 +72,12 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # A caller may lend its connection (benchmarks/migration_locks.py, tests)
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -72,9 +85,19 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        # Create schema before Alembic tries to use it for the version table
-        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
-        connection.commit()
+        _run_migrations(connection)
+
+
+def _run_migrations(connection: Connection) -> None:
+    """Migrate on ``connection``, one runner at a time across pods."""
+    postgresql = connection.dialect.name == "postgresql"
+    with single_runner(connection):
+        if postgresql:
+            # Create schema before Alembic tries to use it for the version table
+            # (SQLite: the caller attaches a database under that name)
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
+            connection.execute(text(f"SET lock_timeout = '{LOCK_TIMEOUT}'"))
+            connection.commit()
 
         context.configure(
             connection=connection,
@@ -22,8 +22,9 @@ SCHEMA = "core_user_service"
 
 
 def upgrade() -> None:
-    # Create the dedicated schema
-    op.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
+    # Create the dedicated schema (SQLite: attached under that name by the caller)
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA}")
 
     # Create users table
     op.create_table(
@@ -79,4 +80,5 @@ def downgrade() -> None:
     op.drop_table("profiles", schema=SCHEMA)
     op.drop_table("users", schema=SCHEMA)
     sa.Enum("USER", "ADMIN", name="userrole", schema=SCHEMA).drop(op.get_bind(), checkfirst=True)
-    op.execute(f"DROP SCHEMA IF EXISTS {SCHEMA}")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(f"DROP SCHEMA IF EXISTS {SCHEMA}")
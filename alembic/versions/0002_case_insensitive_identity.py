@@ -0,0 +1,74 @@
+"""Case-insensitive email/username: normalize emails, unique lower() indexes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic.util import CommandError
+
+from alembic import op
+from app.core.migrations import backfill, create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "core_user_service"
+
+# Values that must become unique, and how many conflicting groups to report
+NORMALIZED = {"email": "lower(trim(email))", "username": "lower(username)"}
+REPORTED_CONFLICTS = 20
+
+
+def _check_no_case_conflicts() -> None:
+    """
+    Abort before any write if two accounts only differ by case (or, for emails,
+    surrounding spaces): the batched lowercasing below would otherwise hit the
+    exact-case unique index of 0001 partway, with earlier batches committed.
+    """
+    if op.get_context().as_sql:  # offline: nothing to query
+        return
+    conflicts = []
+    for column, normalized in NORMALIZED.items():
+        rows = op.get_bind().execute(
+            sa.text(
+                f"SELECT {normalized}, count(*) FROM {SCHEMA}.users GROUP BY {normalized} "
+                f"HAVING count(*) > 1 ORDER BY 1 LIMIT {REPORTED_CONFLICTS}"
+            )
+        )
+        conflicts += [f"{column} {value!r} ({count} accounts)" for value, count in rows]
+    if conflicts:
+        raise CommandError(
+            "Accounts only differing by case must be merged or renamed before 0002: "
+            + ", ".join(conflicts)
+        )
+
+
+def upgrade() -> None:
+    _check_no_case_conflicts()
+    # Emails are stored lowercased from now on, in committed primary-key batches
+    # (no long row locks). The check above makes the batches conflict-free; if
+    # an interrupted run is rerun, batches already committed match nothing
+    backfill("users", "email = lower(trim(email))", "email <> lower(trim(email))", schema=SCHEMA)
+    create_index_concurrently(
+        "ux_users_email_lower", "users", [sa.text("lower(email)")], unique=True, schema=SCHEMA
+    )
+    create_index_concurrently(
+        "ux_users_username_lower",
+        "users",
+        [sa.text("lower(username)")],
+        unique=True,
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ux_users_username_lower", "users", schema=SCHEMA)
+    drop_index_concurrently("ux_users_email_lower", "users", schema=SCHEMA)
@@ -0,0 +1,57 @@
+"""Admin user search: pg_trgm GIN indexes (lower() B-trees on other databases).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.core.migrations import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "core_user_service"
+
+TRIGRAM_INDEXES = [
+    ("ix_users_email_trgm", "users", "email"),
+    ("ix_users_username_trgm", "users", "username"),
+    ("ix_profiles_first_name_trgm", "profiles", "first_name"),
+    ("ix_profiles_last_name_trgm", "profiles", "last_name"),
+]
+# Prefix-only fallback; users.email/username are covered by the 0002 lower() indexes
+LOWER_INDEXES = [
+    ("ix_profiles_first_name_lower", "profiles", "first_name"),
+    ("ix_profiles_last_name_lower", "profiles", "last_name"),
+]
+
+
+def _is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def upgrade() -> None:
+    if _is_postgresql():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        # GIN builds are slow on large tables: CONCURRENTLY keeps writes flowing
+        for name, table, column in TRIGRAM_INDEXES:
+            create_index_concurrently(
+                name, table, [sa.text(f"lower({column}) gin_trgm_ops")], using="gin", schema=SCHEMA
+            )
+    else:
+        for name, table, column in LOWER_INDEXES:
+            create_index_concurrently(name, table, [sa.text(f"lower({column})")], schema=SCHEMA)
+
+
+def downgrade() -> None:
+    indexes = TRIGRAM_INDEXES if _is_postgresql() else LOWER_INDEXES
+    for name, table, _column in reversed(indexes):
+        drop_index_concurrently(name, table, schema=SCHEMA)
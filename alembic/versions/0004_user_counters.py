@@ -0,0 +1,51 @@
+"""User counters for the stats endpoint (users per role, signups per day).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "core_user_service"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_counters",
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("bucket", sa.String(32), nullable=False),
+        sa.Column("count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("kind", "bucket"),
+        schema=SCHEMA,
+    )
+
+    # Backfill from the existing rows; the application keeps them current from now on
+    if op.get_bind().dialect.name == "postgresql":
+        signup_day = "to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD')"
+    else:
+        signup_day = "date(created_at)"
+    op.execute(
+        f"INSERT INTO {SCHEMA}.user_counters (kind, bucket, count) "
+        f"SELECT 'role', lower(CAST(role AS VARCHAR)), count(*) FROM {SCHEMA}.users GROUP BY role"
+    )
+    op.execute(
+        f"INSERT INTO {SCHEMA}.user_counters (kind, bucket, count) "
+        f"SELECT 'signups', {signup_day}, count(*) FROM {SCHEMA}.users "
+        f"WHERE created_at IS NOT NULL GROUP BY {signup_day}"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("user_counters", schema=SCHEMA)
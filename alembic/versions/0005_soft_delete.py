@@ -0,0 +1,70 @@
+"""Soft delete: users.deleted_at, uniqueness among live accounts only.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+from app.core.migrations import (
+    create_index_concurrently,
+    drop_index_concurrently,
+    rebuild_index_concurrently,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "core_user_service"
+
+LIVE = sa.text("deleted_at IS NULL")
+DELETED = sa.text("deleted_at IS NOT NULL")
+LOWER_UNIQUE = [("ux_users_email_lower", "email"), ("ux_users_username_lower", "username")]
+
+
+def upgrade() -> None:
+    # Nullable without default: a catalog-only change, under the short lock_timeout
+    op.add_column(
+        "users", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True), schema=SCHEMA
+    )
+
+    # The exact-case unique indexes of 0001 would keep a deleted account's
+    # email taken; the lower() ones become partial over live rows. Every index
+    # is built and dropped CONCURRENTLY, and uniqueness is enforced throughout
+    drop_index_concurrently("ix_users_email", "users", schema=SCHEMA)
+    drop_index_concurrently("ix_users_username", "users", schema=SCHEMA)
+    for name, column in LOWER_UNIQUE:
+        rebuild_index_concurrently(
+            name, "users", [sa.text(f"lower({column})")], unique=True, where=LIVE, schema=SCHEMA
+        )
+    create_index_concurrently(
+        "ix_users_deleted_at", "users", ["deleted_at"], where=DELETED, schema=SCHEMA
+    )
+
+
+def downgrade() -> None:
+    # Soft-deleted rows would break the full unique indexes: purge them first
+    op.execute(
+        f"DELETE FROM {SCHEMA}.profiles WHERE user_id IN "
+        f"(SELECT id FROM {SCHEMA}.users WHERE deleted_at IS NOT NULL)"
+    )
+    op.execute(f"DELETE FROM {SCHEMA}.users WHERE deleted_at IS NOT NULL")
+
+    drop_index_concurrently("ix_users_deleted_at", "users", schema=SCHEMA)
+    for name, column in LOWER_UNIQUE:
+        rebuild_index_concurrently(
+            name, "users", [sa.text(f"lower({column})")], unique=True, schema=SCHEMA
+        )
+    create_index_concurrently("ix_users_email", "users", ["email"], unique=True, schema=SCHEMA)
+    create_index_concurrently(
+        "ix_users_username", "users", ["username"], unique=True, schema=SCHEMA
+    )
+    op.drop_column("users", "deleted_at", schema=SCHEMA)
@@ -0,0 +1,35 @@
+"""Idempotency keys: token of the request holding a reservation.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "core_user_service"
+
+
+def upgrade() -> None:
+    # Nullable without default: a catalog-only change, under the short lock_timeout.
+    # Reservations already in flight have no token and simply expire
+    op.add_column(
+        "idempotency_keys",
+        sa.Column("claim_token", sa.String(32), nullable=True),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("idempotency_keys", "claim_token", schema=SCHEMA)
@@ -0,0 +1,35 @@
+"""Idempotency keys: response headers replayed with the body.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SCHEMA = "core_user_service"
+
+
+def upgrade() -> None:
+    # Nullable without default: a catalog-only change, under the short lock_timeout.
+    # Responses recorded before it replay without their extra headers
+    op.add_column(
+        "idempotency_keys",
+        sa.Column("headers", sa.JSON(), nullable=True),
+        schema=SCHEMA,
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("idempotency_keys", "headers", schema=SCHEMA)
@@ -3,15 +3,13 @@ Authentication endpoints with database integration.
 """
 
 from datetime import timedelta
-from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from app.core.database import get_db
-from app.core.keys import get_jwks
+from app.core.dependencies import get_user_repository
+from app.core.keys import jwks_json
 from app.core.security import create_access_token, get_password_hash, verify_password
-from app.models.user import Profile, User, UserRole
+from app.repositories import DuplicateUserError, UserRepository
 from app.schemas.auth import LoginRequest, TokenResponse
 from app.schemas.user import RegisterOut, RegisterRequest
 
@@ -19,7 +17,9 @@ router = APIRouter(prefix="/api/v1/auth", tags=["Authentication"])
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
+async def login(
+    credentials: LoginRequest, repo: UserRepository = Depends(get_user_repository)
+) -> TokenResponse:
     """
     Authenticate user against database and return JWT token.
 
@@ -27,7 +27,7 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)) -> Tok
     Password verification uses bcrypt hashing.
     """
     # Find user by email in database
-    user = db.query(User).filter(User.email == credentials.email).first()
+    user = repo.get_by_email(credentials.email)
 
     if not user:
         raise HTTPException(
@@ -37,7 +37,7 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)) -> Tok
         )
 
     # Verify password using bcrypt
-    if not verify_password(credentials.password, user.password):
+    if not verify_password(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect",
@@ -46,7 +46,7 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)) -> Tok
 
     # Create JWT token with user data
     token_data = {
-        "sub": str(user.id),
+        "sub": user.id,
     }
 
     # Token expires in 24 hours
@@ -56,37 +56,35 @@ async def login(credentials: LoginRequest, db: Session = Depends(get_db)) -> Tok
 
 
 @router.post("/register", response_model=RegisterOut, status_code=status.HTTP_201_CREATED)
-async def register(dto: RegisterRequest, db: Session = Depends(get_db)) -> RegisterOut:
+async def register(
+    dto: RegisterRequest, repo: UserRepository = Depends(get_user_repository)
+) -> RegisterOut:
     """Register a new user. Always creates with 'user' role."""
-    existing_user = (
-        db.query(User).filter((User.email == dto.email) | (User.username == dto.username)).first()
-    )
-    if existing_user:
+    if repo.exists(dto.email, dto.username):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email or username already exists",
         )
 
-    user = User(
-        email=dto.email,
-        username=dto.username,
-        password=get_password_hash(dto.password),
-        role=UserRole.USER,
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    if dto.first_name or dto.last_name:
-        profile = Profile(user_id=user.id, first_name=dto.first_name, last_name=dto.last_name)
-        db.add(profile)
-        db.commit()
-        db.refresh(user)
-
-    return RegisterOut.from_model(user)
-
-
-@router.get("/.well-known/jwks.json")
-async def jwks() -> dict[str, Any]:
-    """Expose the public RSA key for JWT token verification."""
-    return get_jwks()
+    try:
+        user = repo.create(
+            email=dto.email,
+            username=dto.username,
+            password_hash=get_password_hash(dto.password),
+            role="user",
+            first_name=dto.first_name,
+            last_name=dto.last_name,
+        )
+    except DuplicateUserError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User with this email or username already exists",
+        ) from exc
+
+    return RegisterOut.from_stored(user)
+
+
+@router.get("/.well-known/jwks.json", response_class=Response)
+async def jwks() -> Response:
+    """Expose the public RSA key for JWT token verification (pre-serialized)."""
+    return Response(content=jwks_json(), media_type="application/json")
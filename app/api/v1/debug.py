@@ -0,0 +1,76 @@
+"""
+Debug endpoints exposing recent request profiles and admission metrics. (Admin only)
+"""
+
+from dataclasses import asdict
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.core.dependencies import require_admin
+from app.middleware.profiling import ProfileStore, RequestProfile
+from app.schemas.auth import TokenData
+from app.schemas.profiling import ProfileOut, ProfileSummary
+
+router = APIRouter(prefix="/api/v1/debug", tags=["debug"])
+
+
+def _store(request: Request) -> ProfileStore:
+    store: ProfileStore = request.app.state.profile_store
+    return store
+
+
+def _summary(profile: RequestProfile) -> ProfileSummary:
+    return ProfileSummary(
+        id=profile.id,
+        method=profile.method,
+        path=profile.path,
+        trigger=profile.trigger,
+        status_code=profile.status_code,
+        started_at=profile.started_at,
+        duration_ms=round(profile.duration_ms, 3),
+        sql_count=profile.sql_count,
+        sql_ms=round(profile.sql_ms, 3),
+    )
+
+
+@router.get("/profiles", response_model=list[ProfileSummary])
+def list_profiles(
+    _current_user: TokenData = Depends(require_admin),
+    store: ProfileStore = Depends(_store),
+) -> list[ProfileSummary]:
+    """List the most recent request profiles, newest first."""
+    return [_summary(profile) for profile in store.list()]
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileOut)
+def get_profile(
+    profile_id: str,
+    _current_user: TokenData = Depends(require_admin),
+    store: ProfileStore = Depends(_store),
+) -> ProfileOut:
+    """Return a profile's call tree, hotspots and SQL statements."""
+    profile = store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    return ProfileOut.model_validate(
+        {
+            **_summary(profile).model_dump(),
+            "call_tree": profile.call_tree(),
+            "hotspots": profile.hotspots(),
+            "sql": [asdict(statement) for statement in profile.sql],
+        }
+    )
+
+
+@router.get("/admission")
+def admission_metrics(
+    request: Request,
+    _current_user: TokenData = Depends(require_admin),
+) -> dict[str, dict[str, Any]]:
+    """Per route class: limits, in-flight and queued requests, admitted/shed counts."""
+    controller = request.app.state.admission
+    return controller.snapshot() if controller is not None else {}
@@ -1,54 +1,181 @@
 """
 User API endpoints. Provides CRUD operations for user resources.
+
+Endpoints render UserOut payloads themselves through pre-built pydantic
+encoders; ``response_model`` still documents them, but FastAPI skips its
+own validate/serialize pass when a Response is returned.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, require_admin
+from app.core.dependencies import (
+    get_current_user,
+    get_read_user_repository,
+    get_user_repository,
+    require_admin,
+)
 from app.core.security import get_password_hash
-from app.models.user import Profile, User, UserRole
+from app.middleware.timing import timed
+from app.middleware.tracing import traced
+from app.repositories import (
+    DuplicateUserError,
+    UserChanges,
+    UserRepository,
+    normalize_user_id,
+    utc_today,
+)
 from app.schemas.auth import TokenData
-from app.schemas.user import UserCreate, UserOut, UserUpdate
+from app.schemas.batch import (
+    BatchResultOut,
+    BatchStatus,
+    UserBatchDelete,
+    UserBatchUpdate,
+    batch_result_json,
+)
+from app.schemas.stats import UserStatsOut
+from app.schemas.user import (
+    UserCreate,
+    UserOut,
+    UserUpdate,
+    user_list_json,
+    user_out_json,
+)
 
 router = APIRouter(prefix="/api/v1/users", tags=["users"])
 
 
-@router.get("", response_model=list[UserOut])
-def list_users(
-    _current_user: TokenData = Depends(require_admin), db: Session = Depends(get_db)
-) -> list[UserOut]:
-    """Retrieve a list of users from database. (Admin only)"""
-    # Query all users from database
-    users = db.query(User).all()
-
-    return [UserOut.from_model(user) for user in users]
-
-
-@router.get("/me", response_model=UserOut)
-def get_my_profile(
-    current_user: TokenData = Depends(get_current_user),  # 🔒 Login required
-    db: Session = Depends(get_db),
-) -> UserOut:
-    """Get the current user's profile from database."""
+def _current_user_id(current_user: TokenData) -> str:
+    """Return the authenticated user's id."""
     if not current_user.user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid user token",
         )
+    return current_user.user_id
+
+
+def _changes_from(dto: UserUpdate) -> UserChanges:
+    """Translate a partial update payload into repository changes."""
+    changes: UserChanges = {}
+    if dto.email is not None:
+        changes["email"] = dto.email
+    if dto.username is not None:
+        changes["username"] = dto.username
+    if dto.password is not None:
+        changes["password_hash"] = get_password_hash(dto.password)
+    if dto.role is not None:
+        changes["role"] = dto.role
+    if dto.first_name is not None:
+        changes["first_name"] = dto.first_name
+    if dto.last_name is not None:
+        changes["last_name"] = dto.last_name
+    return changes
+
+
+def _render(
+    encode: Callable[[Any], bytes], payload: Any, status_code: int = status.HTTP_200_OK
+) -> Response:
+    """Serialize trusted output models straight to JSON bytes."""
+    with timed("serialize"), traced("serialize"):
+        body = encode(payload)
+    return Response(body, status_code=status_code, media_type="application/json")
+
 
-    # Convert string user_id back to integer for database query
+def _apply_update(repo: UserRepository, user_id: str, dto: UserUpdate) -> Response:
+    """Apply an update through the repository and map conflicts to HTTP errors."""
     try:
-        user_id = int(current_user.user_id)
-    except (ValueError, TypeError) as exc:
+        user = repo.update(user_id, _changes_from(dto))
+    except DuplicateUserError as exc:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user token format",
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User with this email or username already exists",
         ) from exc
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    return _render(user_out_json, UserOut.from_stored(user))
+
+
+@router.get("", response_model=list[UserOut])
+def list_users(
+    _current_user: TokenData = Depends(require_admin),
+    repo: UserRepository = Depends(get_read_user_repository),
+) -> Response:
+    """Retrieve a list of users from database. (Admin only)"""
+    return _render(user_list_json, [UserOut.from_stored(user) for user in repo.list_all()])
+
+
+@router.get("/search", response_model=list[UserOut])
+def search_users(
+    q: str = Query(min_length=1, max_length=100, description="Email, username or name"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    _current_user: TokenData = Depends(require_admin),
+    repo: UserRepository = Depends(get_read_user_repository),
+) -> Response:
+    """Search users by email, username or name, best matches first. (Admin only)"""
+    users = repo.search(q, limit=limit, offset=offset)
+    return _render(user_list_json, [UserOut.from_stored(user) for user in users])
+
+
+@router.get("/stats", response_model=UserStatsOut)
+def user_stats(
+    days: int = Query(30, ge=1, le=366, description="Signups window, today included"),
+    _current_user: TokenData = Depends(require_admin),
+    repo: UserRepository = Depends(get_read_user_repository),
+) -> UserStatsOut:
+    """Users per role and signups per day, from maintained counters. (Admin only)"""
+    since = utc_today() - timedelta(days=days - 1)
+    return UserStatsOut.from_stats(repo.stats(since), since, days)
+
 
-    # Query user from database using integer ID
-    user = db.query(User).filter(User.id == user_id).first()
+@router.patch(":batchUpdate", response_model=BatchResultOut)
+def batch_update_users(
+    dto: UserBatchUpdate,
+    _current_user: TokenData = Depends(require_admin),
+    repo: UserRepository = Depends(get_user_repository),
+) -> Response:
+    """Set the role of many users in one transaction, with an outcome per id. (Admin only)"""
+    # dto.ids are canonical, as the repository keys its results. There is no user
+    # cache to invalidate: like single-user writes, the commit only refreshes the
+    # caller's read-your-writes window (Session after_commit hook)
+    previous = repo.set_roles(dto.ids, dto.role)
+    statuses: dict[str, BatchStatus] = {}
+    for user_id in dto.ids:
+        old = previous.get(user_id)
+        statuses[user_id] = (
+            "not_found" if old is None else "unchanged" if old == dto.role else "updated"
+        )
+    return _render(batch_result_json, BatchResultOut.from_statuses(statuses))
+
+
+@router.post(":batchDelete", response_model=BatchResultOut)
+def batch_delete_users(
+    dto: UserBatchDelete,
+    _current_user: TokenData = Depends(require_admin),
+    repo: UserRepository = Depends(get_user_repository),
+) -> Response:
+    """Delete many users in one transaction, with an outcome per id. (Admin only)"""
+    deleted = repo.delete_many(dto.ids)
+    statuses: dict[str, BatchStatus] = {
+        user_id: "deleted" if user_id in deleted else "not_found" for user_id in dto.ids
+    }
+    return _render(batch_result_json, BatchResultOut.from_statuses(statuses))
+
+
+@router.get("/me", response_model=UserOut)
+def get_my_profile(
+    current_user: TokenData = Depends(get_current_user),  # 🔒 Login required
+    repo: UserRepository = Depends(get_read_user_repository),
+) -> Response:
+    """Get the current user's profile from database."""
+    user = repo.get(_current_user_id(current_user))
 
     if not user:
         raise HTTPException(
@@ -56,36 +183,17 @@ def get_my_profile(
             detail="User profile not found",
         )
 
-    return UserOut.from_model(user)
+    return _render(user_out_json, UserOut.from_stored(user))
 
 
 @router.put("/me", response_model=UserOut)
 def update_my_profile(
     dto: UserUpdate,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> UserOut:
+    repo: UserRepository = Depends(get_user_repository),
+) -> Response:
     """Update the current user's own profile."""
-    if not current_user.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user token",
-        )
-
-    try:
-        user_id = int(current_user.user_id)
-    except (ValueError, TypeError) as exc:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user token format",
-        ) from exc
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
+    user_id = _current_user_id(current_user)
 
     # Users cannot change their own role
     if dto.role is not None:
@@ -94,75 +202,39 @@ def update_my_profile(
             detail="Cannot change your own role",
         )
 
-    if dto.email is not None:
-        user.email = dto.email
-    if dto.username is not None:
-        user.username = dto.username
-    if dto.password is not None:
-        user.password = get_password_hash(dto.password)
-
-    if dto.first_name is not None or dto.last_name is not None:
-        if not user.profile:
-            user.profile = Profile(user_id=user.id)
-            db.add(user.profile)
-        if dto.first_name is not None:
-            user.profile.first_name = dto.first_name
-        if dto.last_name is not None:
-            user.profile.last_name = dto.last_name
-
-    db.commit()
-    db.refresh(user)
-
-    return UserOut.from_model(user)
+    return _apply_update(repo, user_id, dto)
 
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_my_account(
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    repo: UserRepository = Depends(get_user_repository),
 ) -> None:
     """Delete the current user's own account."""
-    if not current_user.user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user token",
-        )
-
-    try:
-        user_id = int(current_user.user_id)
-    except (ValueError, TypeError) as exc:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid user token format",
-        ) from exc
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    if not repo.delete(_current_user_id(current_user)):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
 
-    db.delete(user)
-    db.commit()
-
 
 @router.get("/{user_id}", response_model=UserOut)
 def get_user(
-    user_id: int,
+    user_id: str,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> UserOut:
+    repo: UserRepository = Depends(get_read_user_repository),
+) -> Response:
     """Retrieve a user by ID from database. Can only view own profile or must be admin."""
+    # Ids are integers on SQL, "u_..." strings on the JSON backend: the repository parses them
+    user_id = normalize_user_id(user_id)
     # Check authorization: must be viewing own profile OR be an admin
-    if str(user_id) != current_user.user_id and "admin" not in current_user.roles:
+    if user_id != current_user.user_id and "admin" not in current_user.roles:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view this user",
         )
 
-    # Query user from database using integer ID
-    user = db.query(User).filter(User.id == user_id).first()
+    user = repo.get(user_id)
 
     if not user:
         raise HTTPException(
@@ -170,62 +242,53 @@ def get_user(
             detail="User not found",
         )
 
-    return UserOut.from_model(user)
+    return _render(user_out_json, UserOut.from_stored(user))
 
 
 @router.post("", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 def create_user(
     dto: UserCreate,
     _current_user: TokenData = Depends(require_admin),
-    db: Session = Depends(get_db),
-) -> UserOut:
+    repo: UserRepository = Depends(get_user_repository),
+) -> Response:
     """Create a new user. (Admin only)"""
-    # Check if user already exists
-    existing_user = (
-        db.query(User).filter((User.email == dto.email) | (User.username == dto.username)).first()
-    )
-
-    if existing_user:
+    # Check if user already exists (before paying for the password hash)
+    if repo.exists(dto.email, dto.username):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User with this email or username already exists",
         )
 
     # Create new user with forced USER role (ignore dto.role for security)
-    user = User(
-        email=dto.email,
-        username=dto.username,
-        password=get_password_hash(dto.password),
-        role=UserRole.USER,  # Always create as USER, not dto.role
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    # Create profile if first_name or last_name provided
-    if dto.first_name or dto.last_name:
-        profile = Profile(
-            user_id=user.id,
+    try:
+        user = repo.create(
+            email=dto.email,
+            username=dto.username,
+            password_hash=get_password_hash(dto.password),
+            role="user",  # Always create as USER, not dto.role
             first_name=dto.first_name,
             last_name=dto.last_name,
         )
-        db.add(profile)
-        db.commit()
-        db.refresh(user)  # Refresh to include profile
+    except DuplicateUserError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="User with this email or username already exists",
+        ) from exc
 
-    return UserOut.from_model(user)
+    return _render(user_out_json, UserOut.from_stored(user), status.HTTP_201_CREATED)
 
 
 @router.put("/{user_id}", response_model=UserOut)
 def update_user(
-    user_id: int,
+    user_id: str,
     dto: UserUpdate,
     current_user: TokenData = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> UserOut:
+    repo: UserRepository = Depends(get_user_repository),
+) -> Response:
     """Update an existing user. Can only update own profile or must be admin."""
+    user_id = normalize_user_id(user_id)
     # Check authorization: must be updating own profile OR be an admin
-    is_own_profile = str(user_id) == current_user.user_id
+    is_own_profile = user_id == current_user.user_id
     is_admin = "admin" in current_user.roles
 
     if not is_own_profile and not is_admin:
@@ -241,56 +304,19 @@ def update_user(
             detail="Cannot change your own role",
         )
 
-    # Find user in database
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-
-    # Update fields that are provided
-    if dto.email is not None:
-        user.email = dto.email
-    if dto.username is not None:
-        user.username = dto.username
-    if dto.password is not None:
-        user.password = get_password_hash(dto.password)
-    if dto.role is not None:
-        user.role = UserRole(dto.role)
-
-    # Update profile fields if they exist
-    if dto.first_name is not None or dto.last_name is not None:
-        if not user.profile:
-            user.profile = Profile(user_id=user.id)
-            db.add(user.profile)
-
-        if dto.first_name is not None:
-            user.profile.first_name = dto.first_name
-        if dto.last_name is not None:
-            user.profile.last_name = dto.last_name
-
-    db.commit()
-    db.refresh(user)
-
-    return UserOut.from_model(user)
+    return _apply_update(repo, user_id, dto)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
-    user_id: int,
+    user_id: str,
     _current_user: TokenData = Depends(require_admin),  # 🔒 Admin only
-    db: Session = Depends(get_db),
+    repo: UserRepository = Depends(get_user_repository),
 ) -> None:
     """Delete a user by ID. (Admin only)"""
-    # Find user in database
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # Delete user (cascade will delete profile automatically)
+    if not repo.delete(normalize_user_id(user_id)):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-
-    # Delete user (cascade will delete profile automatically)
-    db.delete(user)
-    db.commit()
@@ -2,25 +2,177 @@
 Database configuration and session management.
 """
 
-from collections.abc import Generator
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Generator, Sequence
+from typing import Any
 
-from sqlalchemy import create_engine
+from fastapi import Depends
+from sqlalchemy import Engine, Pool, QueuePool, create_engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.util import queue as sqla_queue
+
+from app.core.settings import Settings, settings
+from app.middleware.profiling import install_sql_hooks
+from app.middleware.read_your_writes import note_write, prefers_primary
+from app.middleware.timing import install_sql_timing
+from app.middleware.tracing import install_sql_tracing, start_span
+from app.models.base import SCHEMA_NAME, Base
+
+
+def _dialect_options(url: str) -> dict[str, Any]:
+    """Driver-specific engine options (pool size, server-side prepares, local SQLite)."""
+    if not url.startswith("sqlite"):
+        options: dict[str, Any] = {
+            "pool_size": settings.database_pool_size,
+            "max_overflow": settings.database_max_overflow,
+        }
+        if url.startswith("postgresql+psycopg:"):
+            # psycopg2 cannot prepare server-side; psycopg 3 does after prepare_threshold runs
+            options["connect_args"] = {"prepare_threshold": settings.database_prepare_threshold}
+        return options
+    return {
+        # SQLite has no schemas: map core_user_service.* onto the main database
+        "execution_options": {"schema_translate_map": {SCHEMA_NAME: None}},
+        "connect_args": {"check_same_thread": False},
+    }
+
+
+logger = logging.getLogger(__name__)
+
+
+def _build_engine(url: str) -> Engine:
+    """Create an engine with the request instrumentation enabled in settings."""
+    built = create_engine(
+        url,
+        echo=settings.database_echo,  # Log SQL queries in development
+        pool_pre_ping=True,  # Verify connections before use
+        pool_recycle=300,  # Recycle connections every 5 minutes
+        query_cache_size=settings.database_query_cache_size,
+        **_dialect_options(url),
+    )
+    install_sql_timing(built)
+    if settings.profiling_enabled:
+        install_sql_hooks(built)
+    if settings.tracing_enabled:
+        install_sql_tracing(built)
+    return built
+
+
+def resize_pool(pool: Pool, size: int, max_overflow: int) -> None:
+    """
+    Change a QueuePool's limits in place, keeping its open connections.
+
+    Growing takes effect at once. Shrinking closes the surplus idle
+    connections now and checked-out ones as they come back (QueuePool
+    closes what no longer fits its queue).
+    """
+    if not isinstance(pool, QueuePool) or size < 1:
+        return
+    # pylint: disable=protected-access
+    with pool._overflow_lock:
+        # _overflow counts open connections beyond the queue size: shift it with the size
+        pool._overflow -= size - pool._pool.maxsize
+        pool._pool.maxsize = size
+        pool._max_overflow = max_overflow
+    # The queue only refuses a check-in when exactly full: trim it to the new size
+    while pool._pool.qsize() > size:
+        try:
+            record = pool._pool.get(False)
+        except sqla_queue.Empty:
+            break
+        record.close()
+        pool._dec_overflow()
+
+
+class ReplicaSet:
+    """
+    Read replicas served round-robin; a replica that fails to hand out a
+    connection is ejected for ``eject_seconds`` and then tried again.
+    """
+
+    def __init__(self, engines: Sequence[Engine], eject_seconds: float = 30.0) -> None:
+        self.engines = list(engines)
+        self.eject_seconds = eject_seconds
+        self._sessions = {
+            replica: sessionmaker(autocommit=False, autoflush=False, bind=replica)
+            for replica in self.engines
+        }
+        self._ejected_until: dict[Engine, float] = {}
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def healthy(self) -> list[Engine]:
+        """Replicas not currently ejected, rotated so callers spread the load."""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.engines if self._ejected_until.get(e, 0.0) <= now]
+        if not candidates:
+            return []
+        offset = next(self._counter) % len(candidates)
+        return candidates[offset:] + candidates[:offset]
+
+    def eject(self, replica: Engine) -> None:
+        with self._lock:
+            self._ejected_until[replica] = time.monotonic() + self.eject_seconds
+
+    def session(self) -> Session | None:
+        """Session bound to the first healthy replica that accepts a connection."""
+        for replica in self.healthy():
+            session = self._sessions[replica]()
+            try:
+                session.connection()  # checkout + pre-ping
+            except DBAPIError:
+                session.close()
+                self.eject(replica)
+                logger.warning(
+                    "Replica %s ejected for %.0fs",
+                    replica.url.render_as_string(hide_password=True),
+                    self.eject_seconds,
+                )
+                continue
+            return session
+        return None
 
-from app.core.settings import settings
-from app.models.base import Base
 
 # Create database engine
-engine = create_engine(
-    settings.database_url,
-    echo=settings.database_echo,  # Log SQL queries in development
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,  # Recycle connections every 5 minutes
-)
+engine = _build_engine(settings.database_url)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replicas = ReplicaSet(
+    [_build_engine(url) for url in settings.database_replica_urls],
+    eject_seconds=settings.replica_eject_seconds,
+)
+
+
+def apply_pool_settings(current: Settings, changed: frozenset[str]) -> None:
+    """Settings subscriber: resize the primary and replica pools, update ejection."""
+    if changed & {"database_pool_size", "database_max_overflow"}:
+        for pooled in (engine, *replicas.engines):
+            resize_pool(pooled.pool, current.database_pool_size, current.database_max_overflow)
+    if "replica_eject_seconds" in changed:
+        replicas.eject_seconds = current.replica_eject_seconds
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(_session: Session) -> None:
+    """Keep the committing client on the primary (read-your-writes)."""
+    note_write()
+
+
+def dispose_engines() -> None:
+    """Close every pooled connection (primary and replicas), e.g. on shutdown."""
+    for pooled in (engine, *replicas.engines):
+        pooled.dispose()
+
 
 def create_tables() -> None:
     """Create all database tables. Use only in development."""
@@ -39,10 +191,32 @@ def get_db() -> Generator[Session]:
     ```
     """
     db = SessionLocal()
+    span = start_span("db.session")
     try:
         yield db
     finally:
         db.close()
+        if span is not None:
+            span.end()
+
+
+def get_read_db(db: Session = Depends(get_db)) -> Generator[Session]:
+    """
+    Session for read-only endpoints: a healthy replica when configured, the
+    primary session otherwise or while the client is inside its
+    read-your-writes window (see app/middleware/read_your_writes.py).
+    """
+    if not replicas or prefers_primary():
+        yield db
+        return
+    session = replicas.session()
+    if session is None:
+        yield db
+        return
+    try:
+        yield session
+    finally:
+        session.close()
 
 
 # For direct database access (use sparingly)
@@ -2,26 +2,64 @@
 FastAPI dependencies for authentication and authorization.
 """
 
+from functools import cache
 from typing import Any
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import verify_token
-from app.models.user import User, UserRole
+from app.core.settings import settings
+from app.middleware.profiling import record_principal
+from app.middleware.tracing import traced
+from app.models.user import UserRole
+from app.repositories import (
+    InMemoryUserRepository,
+    JsonFileUserRepository,
+    SqlUserRepository,
+    UserRepository,
+)
 from app.schemas.auth import TokenData
 
 # HTTP Bearer token security scheme
 security = HTTPBearer(auto_error=False)
 
 
+@cache
+def _memory_repository() -> InMemoryUserRepository:
+    """Process-wide in-memory repository (state must outlive a request)."""
+    return InMemoryUserRepository()
+
+
+def get_user_repository(db: Session = Depends(get_db)) -> UserRepository:
+    """Return the user repository for the backend selected in settings.user_backend."""
+    backend = settings.user_backend.lower()
+    if backend == "json":
+        return JsonFileUserRepository()
+    if backend == "memory":
+        return _memory_repository()
+    return SqlUserRepository(db)
+
+
+def get_read_user_repository(db: Session = Depends(get_read_db)) -> UserRepository:
+    """Same as get_user_repository, on a read replica when one is configured."""
+    return get_user_repository(db)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    db: Session = Depends(get_db),
+    repo: UserRepository = Depends(get_read_user_repository),
 ) -> TokenData:
     """Extract and validate the current user from JWT token, fetch roles from DB."""
+    with traced("get_current_user"):
+        return _authenticate(credentials, repo)
+
+
+def _authenticate(
+    credentials: HTTPAuthorizationCredentials | None, repo: UserRepository
+) -> TokenData:
     if credentials is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -46,14 +84,15 @@ async def get_current_user(
             detail="Token invalide",
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    user = repo.get(str(user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Utilisateur introuvable",
         )
 
-    roles = ["admin", "user"] if user.role == UserRole.ADMIN else ["user"]
+    roles = ["admin", "user"] if user.role == UserRole.ADMIN.value else ["user"]
+    record_principal(roles)
 
     return TokenData(user_id=user_id, roles=roles)
 
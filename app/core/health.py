@@ -0,0 +1,157 @@
+"""
+Background health monitor behind /health-db and /ready.
+
+Kubernetes probes every pod several times a minute; answering each probe
+with its own session and ``SELECT 1`` turns them into steady database
+noise, and a probe waiting for a pool slot hangs exactly when the service
+is saturated. Instead, one daemon thread probes on an interval:
+
+- pool saturation, read from the pool's counters (no connection needed)
+- database connectivity, ``SELECT 1`` on a pooled connection, skipped
+  while the pool is exhausted so the probe never waits for a slot
+- signing key availability, a sign/verify round trip with the RSA key
+
+The endpoints only read the last snapshot. A snapshot older than
+``stale_after`` counts as not ready: the monitor itself is stuck.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from sqlalchemy import Engine, Pool, QueuePool, text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+_PROBE_PAYLOAD = b"core-user-service health probe"
+
+
+@dataclass(frozen=True, slots=True)
+class HealthState:  # pylint: disable=too-many-instance-attributes
+    """One probe result; replaced as a whole, so readers never see a partial update."""
+
+    database: bool = False
+    keys: bool = False
+    pool_exhausted: bool = False
+    pool: dict[str, int] = field(default_factory=dict)
+    latency_ms: float | None = None
+    error: str | None = None
+    checked_at: str | None = None  # ISO 8601, UTC
+    monotonic: float = 0.0  # time.monotonic() of the probe, 0 = never probed
+
+    def problems(self, now: float, stale_after: float) -> list[str]:
+        """Reasons the service should not receive traffic (empty when ready)."""
+        if not self.monotonic:
+            return ["not_probed"]
+        reasons = []
+        if now - self.monotonic > stale_after:
+            reasons.append("stale")
+        if self.pool_exhausted:
+            reasons.append("pool_exhausted")
+        elif not self.database:
+            reasons.append("database_unreachable")
+        if not self.keys:
+            reasons.append("signing_key_unavailable")
+        return reasons
+
+
+def pool_status(pool: Pool) -> tuple[dict[str, int], bool]:
+    """Pool counters and whether every slot is checked out (QueuePool only)."""
+    if not isinstance(pool, QueuePool):
+        return {}, False
+    size, checked_out = pool.size(), pool.checkedout()
+    max_overflow: int = pool._max_overflow  # pylint: disable=protected-access
+    status = {"size": size, "checked_out": checked_out, "max_overflow": max_overflow}
+    return status, max_overflow >= 0 and checked_out >= size + max_overflow
+
+
+def keys_usable(private_key: rsa.RSAPrivateKey) -> bool:
+    """True if the key still signs and its public half verifies the signature."""
+    try:
+        signature = private_key.sign(_PROBE_PAYLOAD, padding.PKCS1v15(), hashes.SHA256())
+        private_key.public_key().verify(
+            signature, _PROBE_PAYLOAD, padding.PKCS1v15(), hashes.SHA256()
+        )
+    except (InvalidSignature, ValueError, TypeError):
+        return False
+    return True
+
+
+class HealthMonitor:
+    """Probes the database, the pool and the signing key every ``interval`` seconds."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        private_key: rsa.RSAPrivateKey,
+        *,
+        interval: float = 5.0,
+        stale_after: float = 30.0,
+    ) -> None:
+        self.engine = engine
+        self.private_key = private_key
+        self.interval = interval
+        self.stale_after = stale_after
+        self.state = HealthState()
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    def problems(self) -> list[str]:
+        # Probed once at startup only (interval 0): the result cannot go stale
+        stale_after = self.stale_after if self.interval > 0 else float("inf")
+        return self.state.problems(time.monotonic(), stale_after)
+
+    def probe(self) -> HealthState:
+        """Run every check once and publish the result."""
+        pool, exhausted = pool_status(self.engine.pool)
+        database, latency_ms, error = False, None, None
+        if exhausted:
+            error = "connection pool exhausted"
+        else:
+            started = time.perf_counter()
+            try:
+                with self.engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                database = True
+                latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            except SQLAlchemyError as exc:
+                error = str(exc)
+        state = HealthState(
+            database=database,
+            keys=keys_usable(self.private_key),
+            pool_exhausted=exhausted,
+            pool=pool,
+            latency_ms=latency_ms,
+            error=error,
+            checked_at=datetime.now(UTC).isoformat(),
+            monotonic=time.monotonic(),
+        )
+        if state.database != self.state.database and self.state.monotonic:
+            logger.warning("Database health changed: connected=%s (%s)", state.database, error)
+        self.state = state
+        return state
+
+    def start(self) -> None:
+        if self._worker is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.probe()
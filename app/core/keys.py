@@ -3,7 +3,9 @@ RSA key management for JWT signing and JWKS endpoint.
 """
 
 import base64
+import json
 import logging
+from functools import cache
 from typing import Any
 
 from cryptography.hazmat.primitives import serialization
@@ -66,3 +68,9 @@ def get_jwks() -> dict[str, Any]:
             }
         ]
     }
+
+
+@cache
+def jwks_json() -> bytes:
+    """The JWKS document serialized once; the key only changes with a restart."""
+    return json.dumps(get_jwks(), separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,52 @@
+"""
+Structured JSON logging for the ``app`` logger namespace.
+
+Records are handed to a QueueHandler and written by a QueueListener
+thread, so formatting and I/O never run on the event loop.
+"""
+
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from pythonjsonlogger import jsonlogger
+
+from app.core.settings import Settings, settings
+
+_listener: QueueListener | None = None
+
+
+def json_formatter() -> logging.Formatter:
+    """One JSON object per line; ``extra`` fields become top-level keys."""
+    return jsonlogger.JsonFormatter(  # type: ignore[no-untyped-call]
+        "%(asctime)s %(levelname)s %(name)s %(message)s",
+        rename_fields={"asctime": "timestamp", "levelname": "level", "name": "logger"},
+        reserved_attrs=(*jsonlogger.RESERVED_ATTRS, "taskName"),
+    )
+
+
+def configure_logging() -> None:
+    """Route ``app.*`` loggers through a background JSON writer (idempotent)."""
+    global _listener  # pylint: disable=global-statement
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(json_formatter())
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    app_logger = logging.getLogger("app")
+    app_logger.addHandler(QueueHandler(log_queue))
+    app_logger.setLevel(settings.log_level.upper())
+    app_logger.propagate = False
+
+
+def apply_log_level(current: Settings, changed: frozenset[str]) -> None:
+    """Settings subscriber: new ``log_level`` for the ``app`` loggers."""
+    if "log_level" in changed:
+        logging.getLogger("app").setLevel(current.log_level.upper())
@@ -0,0 +1,194 @@
+"""
+Online-safe migration helpers for the Alembic revisions in alembic/versions.
+
+A migration that locks ``users`` for the length of a table rewrite or an
+index build stalls every request. Worse, a DDL statement waiting for its
+lock makes all later queries on the table queue behind it. The helpers:
+
+- ``create_index_concurrently`` / ``drop_index_concurrently``: Postgres
+  ``CONCURRENTLY`` builds outside the migration transaction, writes keep
+  flowing; an INVALID leftover of an interrupted build is dropped first.
+  ``rebuild_index_concurrently`` swaps an index for a new definition
+- ``backfill``: UPDATE in primary-key ranges, each batch committed on its
+  own with a pause in between, so no long transaction holds row locks
+- ``lock_timeout``: DDL gives up after a few seconds instead of queueing
+  traffic behind it (set by default in alembic/env.py); rerun the upgrade
+- ``single_runner``: a session advisory lock, so when N pods start at once
+  one migrates and the others wait, then find the schema at head
+
+Other databases (SQLite in development and tests) run the plain forms.
+"""
+
+from __future__ import annotations
+
+import time
+import zlib
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import Connection, text
+from sqlalchemy.sql.elements import TextClause
+
+from alembic import op
+from app.models.base import SCHEMA_NAME
+
+# pg_advisory_lock key shared by every migration runner of this service
+MIGRATION_LOCK_KEY = zlib.crc32(f"{SCHEMA_NAME}.migrations".encode())
+
+_INDEX_VALID = text(
+    "SELECT i.indisvalid FROM pg_index i "
+    "JOIN pg_class c ON c.oid = i.indexrelid "
+    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+    "WHERE n.nspname = :schema AND c.relname = :name"
+)
+
+
+def _is_postgresql() -> bool:
+    return bool(op.get_bind().dialect.name == "postgresql")
+
+
+def _offline() -> bool:
+    """``alembic upgrade --sql``: statements are rendered, nothing is queried."""
+    return bool(op.get_context().as_sql)
+
+
+@contextmanager
+def single_runner(connection: Connection) -> Iterator[None]:
+    """Hold the migration advisory lock (Postgres) while the block runs."""
+    if connection.dialect.name != "postgresql":
+        yield
+        return
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    connection.commit()  # session-level lock: survives the commits of the migrations
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.commit()
+
+
+@contextmanager
+def lock_timeout(timeout: str) -> Iterator[None]:
+    """Run the block with another ``lock_timeout`` (e.g. "2s"), then restore it."""
+    if not _is_postgresql() or _offline():
+        yield
+        return
+    previous = op.get_bind().execute(text("SHOW lock_timeout")).scalar()
+    op.execute(f"SET lock_timeout = '{timeout}'")
+    try:
+        yield
+    finally:
+        op.execute(f"SET lock_timeout = '{previous}'")
+
+
+def create_index_concurrently(  # pylint: disable=too-many-arguments
+    name: str,
+    table: str,
+    columns: Sequence[str | TextClause],
+    *,
+    unique: bool = False,
+    where: TextClause | None = None,
+    using: str | None = None,
+    schema: str = SCHEMA_NAME,
+) -> None:
+    """
+    CREATE INDEX CONCURRENTLY on Postgres (``using``: access method, e.g.
+    "gin"), a plain CREATE INDEX elsewhere.
+    """
+    if not _is_postgresql():
+        op.create_index(name, table, columns, unique=unique, schema=schema, sqlite_where=where)
+        return
+    with op.get_context().autocommit_block():  # CONCURRENTLY cannot run in a transaction
+        if not _offline():
+            valid = op.get_bind().execute(_INDEX_VALID, {"schema": schema, "name": name}).scalar()
+            if valid is False:  # leftover of an interrupted build
+                op.drop_index(name, table_name=table, schema=schema, postgresql_concurrently=True)
+        op.create_index(
+            name,
+            table,
+            columns,
+            unique=unique,
+            schema=schema,
+            postgresql_where=where,
+            postgresql_using=using,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def drop_index_concurrently(name: str, table: str, *, schema: str = SCHEMA_NAME) -> None:
+    """DROP INDEX CONCURRENTLY on Postgres, a plain DROP INDEX elsewhere."""
+    if not _is_postgresql():
+        op.drop_index(name, table_name=table, schema=schema)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            name, table_name=table, schema=schema, postgresql_concurrently=True, if_exists=True
+        )
+
+
+def rebuild_index_concurrently(  # pylint: disable=too-many-arguments
+    name: str,
+    table: str,
+    columns: Sequence[str | TextClause],
+    *,
+    unique: bool = False,
+    where: TextClause | None = None,
+    schema: str = SCHEMA_NAME,
+) -> None:
+    """
+    Give index ``name`` a new definition without a window where it is
+    missing. On Postgres the new index is built CONCURRENTLY as
+    ``<name>_new``, the old one dropped CONCURRENTLY, then the new one
+    renamed (rerunning after an interruption resumes where it stopped);
+    elsewhere a plain drop and create.
+    """
+    if not _is_postgresql():
+        op.drop_index(name, table_name=table, schema=schema)
+        op.create_index(name, table, columns, unique=unique, schema=schema, sqlite_where=where)
+        return
+    staging = f"{name}_new"
+    create_index_concurrently(staging, table, columns, unique=unique, where=where, schema=schema)
+    drop_index_concurrently(name, table, schema=schema)
+    op.execute(f"ALTER INDEX {schema}.{staging} RENAME TO {name}")
+
+
+def backfill(  # pylint: disable=too-many-arguments,too-many-locals
+    table: str,
+    assignments: str,
+    where: str | None = None,
+    *,
+    params: dict[str, Any] | None = None,
+    key: str = "id",
+    batch_size: int = 5_000,
+    pause: float = 0.05,
+    schema: str = SCHEMA_NAME,
+) -> int:
+    """
+    ``UPDATE table SET assignments [WHERE where]`` over ``key`` ranges of
+    ``batch_size``, one committed transaction per batch with ``pause``
+    seconds between batches; returns the number of rows updated.
+    Offline (``--sql``) it renders a single UPDATE.
+    """
+    qualified = f"{schema}.{table}"
+    condition = f" AND ({where})" if where else ""
+    if _offline():
+        op.execute(f"UPDATE {qualified} SET {assignments} WHERE TRUE{condition}")
+        return 0
+    update = text(
+        f"UPDATE {qualified} SET {assignments} WHERE {key} >= :lo AND {key} < :hi{condition}"
+    )
+    total = 0
+    with op.get_context().autocommit_block():  # every batch commits on its own
+        bind = op.get_bind()
+        bounds = bind.execute(text(f"SELECT min({key}), max({key}) FROM {qualified}")).one()
+        if bounds[0] is None:
+            return 0
+        low, high = int(bounds[0]), int(bounds[1])
+        for start in range(low, high + 1, batch_size):
+            result = bind.execute(update, {**(params or {}), "lo": start, "hi": start + batch_size})
+            total += result.rowcount
+            if pause:
+                time.sleep(pause)
+    return total
@@ -1,6 +1,27 @@
+"""
+Application settings: static fields fixed at startup, tunable fields reloadable.
+
+Most fields shape objects built once (engines, middleware stack, keys) and
+only change with a restart. The fields in ``TUNABLE_FIELDS`` can change in
+a running worker: ``SettingsProvider.reload()`` (SIGHUP, see app/main.py)
+re-reads the environment and the ``SETTINGS_FILE`` overlay, applies the
+changed tunables to the shared ``settings`` object in place, and notifies
+subscribers so they resize what they own (pool, admission gates, ...).
+A changed static field is only logged: it needs a restart.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+
+from dotenv import dotenv_values
 from pydantic import AnyHttpUrl
 from pydantic_settings import BaseSettings
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     """
@@ -15,11 +36,81 @@ class Settings(BaseSettings):
     env: str = "dev"
     port: int = 8080
     log_level: str = "info"
+    access_log_enabled: bool = True  # One JSON line per request on the app.access logger
+    server_timing_enabled: bool = True  # Server-Timing header with db/bcrypt/jwt/serialize spans
+    settings_file: str | None = None  # Tunable overrides (.env format), re-read on SIGHUP
+    # CORS (app/middleware/cors.py); preflights are answered before any other middleware
     cors_origins: list[AnyHttpUrl] | list[str] = []
+    cors_origin_regex: str | None = None  # e.g. https://.*\.example\.com, matched in full
+    cors_allow_methods: list[str] = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+    cors_allow_headers: list[str] = [
+        "Authorization",
+        "Content-Type",
+        "X-Read-Primary-Until",
+        "Idempotency-Key",
+        "traceparent",
+        "tracestate",
+    ]
+    cors_expose_headers: list[str] = [
+        "Server-Timing",
+        "X-Read-Primary-Until",
+        "Retry-After",
+        "Idempotent-Replayed",
+    ]
+    cors_allow_credentials: bool = True
+    cors_max_age_seconds: int = 7200  # Browser preflight cache (Chromium caps it at 2 h)
 
     # Database settings
     database_url: str = ""  # Loaded from .env, empty default for validation
     database_echo: bool = False  # Set to True for SQL query logging
+    database_query_cache_size: int = 500  # SQLAlchemy compiled-statement cache per engine
+    database_pool_size: int = 5  # Connections kept per engine (server databases)
+    database_max_overflow: int = 10  # Extra connections opened under load, closed when idle
+    # Startup warm-up before /ready turns READY (app/core/warmup.py)
+    warmup_enabled: bool = True
+    warmup_pool_connections: int = 4  # Opened per engine up front (capped at the pool size)
+    # psycopg 3 only (postgresql+psycopg://): prepare server-side after N runs, None = never
+    database_prepare_threshold: int | None = 5
+    user_backend: str = "sql"  # User repository backend: sql | json | memory
+    database_replica_urls: list[str] = []  # Read replicas for GET endpoints (JSON list)
+    replica_sticky_seconds: float = 5.0  # Read-your-writes: reads stay on primary after a write
+    replica_eject_seconds: float = 30.0  # How long a failing replica is skipped
+    replica_sticky_secret: str = ""  # Signs read_primary_until; "" = random per worker
+    # Soft-deleted users are hard-deleted by a background worker (sql backend)
+    purge_interval_seconds: float = 60.0  # 0 disables the worker
+    purge_batch_size: int = 500  # Users deleted per transaction
+    purge_grace_seconds: float = 0.0  # Keep deleted rows at least this long
+    purge_batch_pause_seconds: float = 0.1  # Pause between batches of one run
+    # Idempotency-Key on register / create user (app/middleware/idempotency.py)
+    idempotency_enabled: bool = True
+    idempotency_ttl_seconds: float = 86_400.0  # Replay window of a recorded response
+    idempotency_lock_seconds: float = 30.0  # Reservation of a request still running
+    idempotency_cache_size: int = 10_000  # Responses kept in process memory
+    idempotency_expiry_interval_seconds: float = 300.0  # 0 disables the expiry worker
+    idempotency_expiry_batch_size: int = 1_000  # Expired keys deleted per transaction
+    # /health-db and /ready serve the last result of a background probe (app/core/health.py)
+    health_check_interval_seconds: float = 5.0  # 0: probe once at startup only
+    health_stale_seconds: float = 30.0  # Older probe results make /ready fail
+
+    # Admission control per route class (app/middleware/admission.py): concurrent
+    # requests, then a bounded wait queue; beyond that 503 + Retry-After
+    admission_enabled: bool = True
+    admission_max_wait_seconds: float = 1.0  # Longest time a request may wait for a slot
+    admission_auth_concurrency: int = 4  # login/register: bcrypt, about one per core
+    admission_auth_queue: int = 32
+    admission_admin_concurrency: int = 2  # list/search/stats/batch/debug
+    admission_admin_queue: int = 8
+    admission_default_concurrency: int = 32  # everything else
+    admission_default_queue: int = 128
+
+    # Response compression (app/middleware/compression.py); br/zstd need the
+    # "compression" extra, encodings missing at runtime are skipped
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # Bytes; smaller complete bodies are sent as is
+    compression_encodings: list[str] = ["zstd", "br", "gzip"]  # Server preference
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
 
     # Security settings (RS256)
     rsa_private_key: str = ""  # PEM-encoded RSA private key (env: RSA_PRIVATE_KEY)
@@ -27,8 +118,123 @@ class Settings(BaseSettings):
     jwt_kid: str = "visiobook-key-1"
     jwt_issuer: str = "core-user-service"
     access_token_expire_minutes: int = 30
+    bcrypt_rounds: int = 12  # bcrypt cost factor; lower only in tests
+
+    # Profiling (opt-in): sampled or X-Debug-Profile requests, see app/middleware/profiling.py
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0  # Fraction of requests profiled automatically
+    profiling_buffer_size: int = 50  # Number of recent profiles kept in memory
+    profiling_header_secret: str = ""  # X-Debug-Profile value that starts profiling; "" = off
+
+    # Tracing (W3C traceparent, OTLP/JSON export), see app/middleware/tracing.py
+    tracing_enabled: bool = False
+    tracing_sample_rate: float = 0.01  # Share of new traces recorded; incoming traceparent wins
+    tracing_exporter: str = "file"  # file | memory
+    tracing_file: str = "traces.jsonl"  # OTLP/JSON lines, for the file exporter
 
     model_config = {"env_file": ".env", "case_sensitive": False, "extra": "ignore"}
 
 
-settings = Settings()
+# Fields a running worker picks up on reload; everything else needs a restart
+TUNABLE_FIELDS = frozenset(
+    {
+        "log_level",
+        "access_token_expire_minutes",
+        "bcrypt_rounds",
+        "database_pool_size",
+        "database_max_overflow",
+        "replica_eject_seconds",
+        "purge_batch_size",
+        "purge_grace_seconds",
+        "purge_batch_pause_seconds",
+        "idempotency_ttl_seconds",
+        "idempotency_lock_seconds",
+        "idempotency_expiry_batch_size",
+        "health_stale_seconds",
+        "admission_max_wait_seconds",
+        "admission_auth_concurrency",
+        "admission_auth_queue",
+        "admission_admin_concurrency",
+        "admission_admin_queue",
+        "admission_default_concurrency",
+        "admission_default_queue",
+        "tracing_sample_rate",
+    }
+)
+
+Subscriber = Callable[[Settings, frozenset[str]], None]
+
+
+def tunable_overrides(path: str) -> dict[str, str]:
+    """Tunable values from a .env-format overlay file; other keys are ignored."""
+    overrides: dict[str, str] = {}
+    for key, value in dotenv_values(path).items():
+        name = key.lower()
+        if name not in TUNABLE_FIELDS:
+            logger.warning("%s: %s is not runtime-tunable, ignored", path, key)
+        elif value is not None:
+            overrides[name] = value
+    return overrides
+
+
+def load_settings() -> Settings:
+    """Environment and .env, then the SETTINGS_FILE overlay (which wins) for tunables."""
+    loaded = Settings()
+    if not loaded.settings_file:
+        return loaded
+    return Settings(**tunable_overrides(loaded.settings_file))  # type: ignore[arg-type]
+
+
+class SettingsProvider:
+    """Owns the live settings object and applies tunable changes to it."""
+
+    def __init__(self, current: Settings, loader: Callable[[], Settings] = load_settings) -> None:
+        self.current = current
+        self._loader = loader
+        self._subscribers: list[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Call ``subscriber(settings, changed_fields)`` after each effective reload."""
+        self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        if subscriber in self._subscribers:
+            self._subscribers.remove(subscriber)
+
+    def reload(self) -> frozenset[str]:
+        """Re-read the sources and apply changed tunables; returns their names."""
+        with self._lock:
+            try:
+                fresh = self._loader()
+            except (OSError, ValueError):  # pydantic's ValidationError is a ValueError
+                logger.exception("Settings reload failed, keeping the current values")
+                return frozenset()
+            changed = frozenset(
+                name
+                for name in TUNABLE_FIELDS
+                if getattr(fresh, name) != getattr(self.current, name)
+            )
+            restart = sorted(
+                name
+                for name in type(fresh).model_fields
+                if name not in TUNABLE_FIELDS
+                and getattr(fresh, name) != getattr(self.current, name)
+            )
+            if restart:
+                logger.warning("Settings changed but need a restart: %s", ", ".join(restart))
+            if not changed:
+                return changed
+            for name in changed:
+                setattr(self.current, name, getattr(fresh, name))
+            logger.info("Settings reloaded: %s", ", ".join(sorted(changed)))
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber(self.current, changed)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Settings subscriber %r failed", subscriber)
+            return changed
+
+
+settings = load_settings()
+provider = SettingsProvider(settings)
@@ -0,0 +1,85 @@
+"""
+Startup warm-up, run by the lifespan before the first health probe.
+
+A fresh worker otherwise makes its first requests pay for one-time work:
+TCP/TLS connects and authentication for each pool connection, ORM mapper
+configuration, statement compilation (cached per engine afterwards) and
+the JWKS rendering. Warming up does all of it before ``/ready`` turns
+READY, since readiness only flips with the first probe that follows.
+
+Each step is timed; the report is logged and kept on ``app.state.warmup``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from typing import Any
+
+from sqlalchemy import Connection, Engine, QueuePool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, configure_mappers
+
+from app.core.keys import jwks_json
+from app.repositories.sql import warm_up_statements
+
+logger = logging.getLogger(__name__)
+
+
+def open_connections(engine: Engine, count: int) -> int:
+    """Open ``count`` pool connections at once and return them to the pool idle."""
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        count = min(count, pool.size())  # more would be closed on check-in
+    with ExitStack() as stack:
+        connections: list[Connection] = [
+            stack.enter_context(engine.connect()) for _ in range(count)
+        ]
+    return len(connections)
+
+
+class WarmUp:
+    """Runs the warm-up steps once and keeps their timings."""
+
+    def __init__(self, engines: list[Engine], *, connections: int = 4, sql: bool = True) -> None:
+        self.engines = engines  # primary first, then the read replicas
+        self.connections = connections
+        self.sql = sql  # False for the json/memory backends: no hot statements
+        self.report: dict[str, Any] = {}
+
+    @contextmanager
+    def _step(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        except SQLAlchemyError as exc:  # warm-up is an optimization: never block startup
+            logger.warning("Warm-up step %s failed: %s", name, exc)
+            self.report[f"{name}_error"] = str(exc)
+        finally:
+            self.report[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    def run(self) -> dict[str, Any]:
+        started = time.perf_counter()
+        with self._step("mappers"):
+            configure_mappers()
+        with self._step("jwks"):
+            self.report["jwks_bytes"] = len(jwks_json())
+        with self._step("pool"):
+            self.report["connections"] = sum(
+                open_connections(engine, self.connections) for engine in self.engines
+            )
+        if self.sql:
+            with self._step("statements"):
+                self.report["statements"] = sum(
+                    _on_session(engine, warm_up_statements) for engine in self.engines
+                )
+        self.report["total_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        logger.info("Warm-up done in %.1f ms", self.report["total_ms"], extra=self.report)
+        return self.report
+
+
+def _on_session(engine: Engine, work: Callable[[Session], int]) -> int:
+    with Session(engine) as db:
+        return work(db)
@@ -5,18 +5,63 @@ Initializes FastAPI app, CORS, health/ready endpoints, and API routers.
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import signal
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from typing import Any
 
-from fastapi import FastAPI, status
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, Request, Response, status
 from fastapi.responses import JSONResponse
-from sqlalchemy import text
-from sqlalchemy.exc import SQLAlchemyError
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
 
 from app.api.v1.auth import router as auth_router
+from app.api.v1.debug import router as debug_router
 from app.api.v1.users import router as users_router
-from app.core.database import SessionLocal
-from app.core.settings import settings
+from app.core import keys
+from app.core.database import (
+    SessionLocal,
+    apply_pool_settings,
+    dispose_engines,
+    engine,
+    replicas,
+)
+from app.core.health import HealthMonitor
+from app.core.logging_config import apply_log_level, configure_logging
+from app.core.settings import Settings, Subscriber, provider, settings
+from app.core.warmup import WarmUp
+from app.middleware.admission import (
+    ADMIN,
+    AUTH,
+    DEFAULT,
+    AdmissionCollector,
+    AdmissionController,
+    AdmissionMiddleware,
+    ClassLimit,
+)
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.cors import CachedCORSMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.profiling import ProfileStore, ProfilingMiddleware
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.middleware.timing import ServerTimingMiddleware, TimedJSONResponse
+from app.middleware.tracing import (
+    BatchSpanProcessor,
+    FileSpanExporter,
+    InMemorySpanExporter,
+    SpanExporter,
+    Tracer,
+    TracingMiddleware,
+)
+from app.services.idempotency import IdempotencyExpiryWorker, IdempotencyStore
+from app.services.purge_worker import PurgeWorker
+
+logger = logging.getLogger(__name__)
+
+# Creation endpoints retried by clients on timeouts: honour Idempotency-Key
+IDEMPOTENT_ROUTES = frozenset({("POST", "/api/v1/auth/register"), ("POST", "/api/v1/users")})
 
 
 def _compute_cors_origins() -> list[str]:
@@ -24,39 +69,254 @@ def _compute_cors_origins() -> list[str]:
     Compute allowed CORS origins from settings.
 
     - Converts settings.cors_origins (List[AnyHttpUrl] | List[str]) into list[str].
-    - If environment is "dev" and no origins are configured, returns ["*"].
+    - If environment is "dev" and neither origins nor an origin regex are
+      configured, returns ["*"].
     """
     raw: list[str] = [str(o) for o in settings.cors_origins] if settings.cors_origins else []
-    if settings.env.lower() == "dev" and not raw:
+    if settings.env.lower() == "dev" and not raw and not settings.cors_origin_regex:
         return ["*"]
     return raw
 
 
+def _admission_limits(current: Settings) -> dict[str, ClassLimit]:
+    """Per-route-class admission limits from settings."""
+    return {
+        AUTH: ClassLimit(current.admission_auth_concurrency, current.admission_auth_queue),
+        ADMIN: ClassLimit(current.admission_admin_concurrency, current.admission_admin_queue),
+        DEFAULT: ClassLimit(current.admission_default_concurrency, current.admission_default_queue),
+    }
+
+
+def _create_admission() -> AdmissionController:
+    """Build the admission controller from settings."""
+    return AdmissionController(
+        _admission_limits(settings), max_wait=settings.admission_max_wait_seconds
+    )
+
+
+def _create_idempotency_store() -> IdempotencyStore:
+    """Table-backed store for the sql backend, in-process only otherwise."""
+    return IdempotencyStore(
+        SessionLocal if settings.user_backend.lower() == "sql" else None,
+        ttl=settings.idempotency_ttl_seconds,
+        lock_seconds=settings.idempotency_lock_seconds,
+        cache_size=settings.idempotency_cache_size,
+    )
+
+
+def _create_tracer() -> Tracer:
+    """Build the tracer and its batching exporter from settings."""
+    exporter: SpanExporter
+    if settings.tracing_exporter.lower() == "memory":
+        exporter = InMemorySpanExporter()
+    else:
+        exporter = FileSpanExporter(settings.tracing_file, settings.service_name)
+    return Tracer(BatchSpanProcessor(exporter), settings.tracing_sample_rate)
+
+
+def _app_subscriber(application: FastAPI) -> Subscriber:
+    """Settings subscriber resizing what this application instance owns."""
+
+    def apply(current: Settings, changed: frozenset[str]) -> None:
+        admission: AdmissionController | None = application.state.admission
+        if admission is not None and any(name.startswith("admission_") for name in changed):
+            admission.resize(_admission_limits(current), current.admission_max_wait_seconds)
+        application.state.health_monitor.stale_after = current.health_stale_seconds
+        tracer: Tracer | None = getattr(application.state, "tracer", None)
+        if tracer is not None:
+            tracer.sample_rate = current.tracing_sample_rate
+        worker: PurgeWorker | None = application.state.purge_worker
+        if worker is not None:
+            worker.batch_size = current.purge_batch_size
+            worker.grace = current.purge_grace_seconds
+            worker.pause = current.purge_batch_pause_seconds
+        store: IdempotencyStore = application.state.idempotency
+        store.ttl = current.idempotency_ttl_seconds
+        store.lock_seconds = current.idempotency_lock_seconds
+        expiry: IdempotencyExpiryWorker | None = application.state.idempotency_expiry
+        if expiry is not None:
+            expiry.batch_size = current.idempotency_expiry_batch_size
+
+    return apply
+
+
+def _install_reload_signal(loop: asyncio.AbstractEventLoop) -> bool:
+    """Reload tunable settings on SIGHUP, on the event loop (where admission gates live)."""
+    sighup = getattr(signal, "SIGHUP", None)
+    if sighup is None:  # Windows
+        return False
+    try:
+        loop.add_signal_handler(sighup, provider.reload)
+    except (NotImplementedError, RuntimeError, ValueError):  # not the main thread
+        logger.debug("SIGHUP settings reload unavailable outside the main thread")
+        return False
+    return True
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI) -> AsyncIterator[None]:
+    """
+    Warm up (pool, mappers, hot statements, JWKS), then probe health: /ready
+    turns READY only with that first probe. Runs the health monitor, the
+    purge worker and the idempotency key expiry while serving, reloads
+    tunable settings on SIGHUP, and closes the pooled connections on shutdown.
+    """
+    if settings.warmup_enabled:
+        warmup = WarmUp(
+            [engine, *replicas.engines],
+            connections=settings.warmup_pool_connections,
+            sql=settings.user_backend.lower() == "sql",
+        )
+        application.state.warmup = await asyncio.to_thread(warmup.run)
+    monitor: HealthMonitor = application.state.health_monitor
+    monitor.probe()
+    monitor.start()
+    worker: PurgeWorker | None = None
+    if settings.user_backend.lower() == "sql" and settings.purge_interval_seconds > 0:
+        worker = PurgeWorker(
+            SessionLocal,
+            interval=settings.purge_interval_seconds,
+            batch_size=settings.purge_batch_size,
+            grace=settings.purge_grace_seconds,
+            pause=settings.purge_batch_pause_seconds,
+        )
+        worker.start()
+    application.state.purge_worker = worker
+    expiry: IdempotencyExpiryWorker | None = None
+    if settings.idempotency_enabled and settings.idempotency_expiry_interval_seconds > 0:
+        expiry = IdempotencyExpiryWorker(
+            application.state.idempotency,
+            interval=settings.idempotency_expiry_interval_seconds,
+            batch_size=settings.idempotency_expiry_batch_size,
+        )
+        expiry.start()
+    application.state.idempotency_expiry = expiry
+
+    subscribers = (apply_log_level, apply_pool_settings, _app_subscriber(application))
+    for subscriber in subscribers:
+        provider.subscribe(subscriber)
+    loop = asyncio.get_running_loop()
+    reload_signal = _install_reload_signal(loop)
+    try:
+        yield
+    finally:
+        if reload_signal:
+            loop.remove_signal_handler(signal.SIGHUP)
+        for subscriber in subscribers:
+            provider.unsubscribe(subscriber)
+        if worker is not None:
+            worker.stop()
+        if expiry is not None:
+            expiry.stop()
+        monitor.stop()
+        dispose_engines()
+
+
 def create_app() -> FastAPI:
     """
     Create and configure the FastAPI application.
 
     Includes:
     - Service metadata (title, version)
-    - CORS middleware
-    - Health and readiness endpoints
+    - CORS middleware, outermost, with cached preflight answers
+    - Read-your-writes stickiness when read replicas are configured
+    - Opt-in request profiling (settings.profiling_enabled)
+    - Server-Timing header and JSON access log
+    - Opt-in tracing with W3C traceparent propagation (settings.tracing_enabled)
+    - Response compression: gzip, brotli/zstd when installed (settings.compression_enabled)
+    - Admission control / load shedding per route class (settings.admission_enabled)
+    - Health and readiness endpoints, served from a background health monitor
+    - Idempotency-Key replay on register / create user (settings.idempotency_enabled)
     - API routers (users, etc.)
+    - Startup warm-up before readiness, pool disposal on shutdown (lifespan)
+    - Background purge of soft-deleted users and expired idempotency keys (lifespan)
+    - Tunable settings reloaded on SIGHUP (lifespan, see app/core/settings.py)
     """
+    configure_logging()
     application = FastAPI(
         title=settings.service_name,
         version=settings.service_version,
         docs_url="/api/docs",  # Swagger UI at /api/docs
         redoc_url="/api/redoc",  # ReDoc at /api/redoc
         openapi_url="/api/openapi.json",  # OpenAPI schema
+        default_response_class=TimedJSONResponse,
+        lifespan=lifespan,
     )
 
-    # Enable CORS middleware
+    application.state.warmup = {}  # Step timings once the lifespan warmed up
+    application.state.health_monitor = HealthMonitor(
+        engine,
+        keys.private_key,
+        interval=settings.health_check_interval_seconds,
+        stale_after=settings.health_stale_seconds,
+    )
+
+    # Innermost: a replayed retry skips the route, its dependencies and bcrypt
+    application.state.idempotency = _create_idempotency_store()
+    if settings.idempotency_enabled:
+        application.add_middleware(
+            IdempotencyMiddleware, store=application.state.idempotency, routes=IDEMPOTENT_ROUTES
+        )
+
+    # Read-your-writes: GETs stay on the primary for a while after a write
+    if settings.database_replica_urls:
+        application.add_middleware(
+            ReadYourWritesMiddleware,
+            window=settings.replica_sticky_seconds,
+            secret=settings.replica_sticky_secret,
+        )
+
+    # Profiles are always readable (empty unless profiling is enabled)
+    application.state.profile_store = ProfileStore(settings.profiling_buffer_size)
+    if settings.profiling_enabled:
+        application.add_middleware(
+            ProfilingMiddleware,
+            store=application.state.profile_store,
+            sample_rate=settings.profiling_sample_rate,
+            header_secret=settings.profiling_header_secret,
+        )
+
+    if settings.tracing_enabled:
+        application.state.tracer = _create_tracer()
+        application.add_middleware(TracingMiddleware, tracer=application.state.tracer)
+
+    if settings.compression_enabled:
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+            encodings=settings.compression_encodings,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+            zstd_level=settings.compression_zstd_level,
+        )
+
+    # Shed excess load before any work is done (probes bypass it); metrics are
+    # always readable, empty when admission control is disabled
+    application.state.admission = _create_admission() if settings.admission_enabled else None
+    application.state.metrics = CollectorRegistry()
+    if application.state.admission is not None:
+        application.add_middleware(AdmissionMiddleware, controller=application.state.admission)
+        application.state.metrics.register(AdmissionCollector(application.state.admission))
+
+    # Times everything below, including profiling and tracing
+    if settings.server_timing_enabled or settings.access_log_enabled:
+        application.add_middleware(
+            ServerTimingMiddleware,
+            server_timing=settings.server_timing_enabled,
+            access_log=settings.access_log_enabled,
+        )
+
+    # Outermost: preflights are answered without walking the stack, and every
+    # response (503 from admission included) carries the CORS headers
     application.add_middleware(
-        CORSMiddleware,
+        CachedCORSMiddleware,
         allow_origins=_compute_cors_origins(),
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_origin_regex=settings.cors_origin_regex,
+        allow_methods=settings.cors_allow_methods,
+        allow_headers=settings.cors_allow_headers,
+        allow_credentials=settings.cors_allow_credentials,
+        expose_headers=settings.cors_expose_headers,
+        max_age=settings.cors_max_age_seconds,
     )
 
     @application.get("/health")
@@ -77,42 +337,64 @@ def create_app() -> FastAPI:
             "version": settings.service_version,
         }
 
-    @application.get("/ready")
-    def ready() -> dict[str, str]:
-        """Readiness check endpoint. Returns 'READY' if the service is ready to accept traffic."""
-        return {"status": "READY"}
+    @application.get("/metrics", include_in_schema=False)
+    def metrics(request: Request) -> Response:
+        """Prometheus exposition of this worker's metrics (admission queues and shedding)."""
+        body = generate_latest(request.app.state.metrics)
+        return Response(body, media_type=CONTENT_TYPE_LATEST)
+
+    @application.get("/ready", response_model=None)
+    def ready(request: Request) -> dict[str, str] | JSONResponse:
+        """
+        Readiness check endpoint, from the health monitor's last probe (no I/O).
+
+        Returns 'READY', or 503 with the reasons (database unreachable, pool
+        exhausted, signing key unusable, stale probe) so traffic moves away.
+        """
+        problems = request.app.state.health_monitor.problems()
+        if not problems:
+            return {"status": "READY"}
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "NOT_READY", "reasons": problems},
+        )
 
     @application.get("/health-db", response_model=None)
-    def health_db() -> dict[str, str] | JSONResponse:
+    def health_db(request: Request) -> dict[str, Any] | JSONResponse:
         """
         Database health check endpoint.
 
-        Executes a simple SQL query (SELECT 1) to verify database connectivity.
+        Serves the health monitor's last ``SELECT 1`` probe (no query per call).
 
         Returns:
             200 OK with {"status": "healthy", "database": "connected"} if DB is accessible
             503 with structured error details if DB fails
         """
-        try:
-            db = SessionLocal()
-            db.execute(text("SELECT 1"))
-            db.close()
-            return {"status": "healthy", "database": "connected"}
-        except SQLAlchemyError as exc:
-            # Return 503 Service Unavailable with readable error details
-            return JSONResponse(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                content={
-                    "status": "unhealthy",
-                    "database": "disconnected",
-                    "error": str(exc),
-                    "code": status.HTTP_503_SERVICE_UNAVAILABLE,
-                },
-            )
+        state = request.app.state.health_monitor.state
+        details = {"checked_at": state.checked_at, "pool": state.pool}
+        if state.database:
+            return {
+                "status": "healthy",
+                "database": "connected",
+                "latency_ms": state.latency_ms,
+                **details,
+            }
+        # Return 503 Service Unavailable with readable error details
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={
+                "status": "unhealthy",
+                "database": "disconnected",
+                "error": state.error or "not probed yet",
+                "code": status.HTTP_503_SERVICE_UNAVAILABLE,
+                **details,
+            },
+        )
 
     # Register API routers
     application.include_router(users_router)
     application.include_router(auth_router)
+    application.include_router(debug_router)
 
     return application
 
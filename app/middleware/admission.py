@@ -0,0 +1,307 @@
+"""
+Admission control: per-route-class concurrency limits and load shedding.
+
+Without it a surge queues inside uvicorn, the threadpool and the SQLAlchemy
+pool until requests time out, and p99 explodes for everybody. Here each
+request belongs to a class with its own concurrency limit and a bounded
+wait queue:
+
+- ``auth``: routes hashing or checking a password with bcrypt (CPU-bound):
+  login, register, user creation and user updates (PUT may change the
+  password, and the body is not read here)
+- ``admin``: scans and bulk operations (list, search, stats, batches, debug)
+- ``default``: everything else, mostly cheap keyed reads and writes
+
+A request over the limit waits, first come first served, for at most
+``max_wait`` seconds. It is rejected at once with 503 + Retry-After when
+the queue is full or when the expected wait (queue position x smoothed
+service time / limit) already exceeds ``max_wait``; it would time out
+anyway, and failing fast keeps the admitted requests fast. Health and
+readiness probes bypass admission entirely. The wait shows up as the
+``queue`` Server-Timing span; queue depth and admitted/shed counts are
+exported as Prometheus metrics (``AdmissionCollector``, GET /metrics) and
+served as JSON by GET /api/v1/debug/admission.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middleware.timing import timed
+
+AUTH, ADMIN, DEFAULT = "auth", "admin", "default"
+
+# Never queued nor counted: orchestrators must see the real state under load
+PRIORITY_PATHS = frozenset({"/health", "/ready", "/health-db", "/metrics"})
+
+_AUTH_PATHS = frozenset({"/api/v1/auth/login", "/api/v1/auth/register"})
+_USERS_PATH = "/api/v1/users"
+_ADMIN_GET_PATHS = frozenset({"/api/v1/users", "/api/v1/users/search", "/api/v1/users/stats"})
+_EWMA_WEIGHT = 0.2  # Weight of the latest service time in the smoothed average
+
+_REJECTED_BODY = json.dumps(
+    {"detail": "Service surchargé, réessayez plus tard"}, ensure_ascii=False
+).encode("utf-8")
+
+
+def route_class(method: str, path: str) -> str | None:
+    """Admission class of a request; None for the priority (bypass) paths."""
+    if path in PRIORITY_PATHS:
+        return None
+    if (
+        path in _AUTH_PATHS
+        or (method == "POST" and path == _USERS_PATH)
+        or (method == "PUT" and path.startswith(f"{_USERS_PATH}/"))
+    ):
+        return AUTH
+    if (
+        (method == "GET" and path in _ADMIN_GET_PATHS)
+        or path.startswith("/api/v1/users:")
+        or path.startswith("/api/v1/debug/")
+    ):
+        return ADMIN
+    return DEFAULT
+
+
+@dataclass(frozen=True, slots=True)
+class ClassLimit:
+    """Concurrency limit and wait-queue bound of one route class."""
+
+    concurrency: int
+    queue: int
+
+
+class AdmissionGate:  # pylint: disable=too-many-instance-attributes
+    """Concurrency limiter with a bounded FIFO wait queue (one event loop)."""
+
+    def __init__(self, limit: ClassLimit) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0  # Queue full, or expected wait over the deadline
+        self.timed_out = 0  # Waited max_wait without getting a slot
+        self.service_time = 0.0  # Smoothed seconds a request holds its slot
+        self.wait_time = 0.0  # Total seconds spent queued by admitted requests
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def expected_wait(self) -> float:
+        """Seconds a request joining the queue now should wait for a slot."""
+        return (len(self._waiters) + 1) * self.service_time / self.limit.concurrency
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take a slot, waiting up to ``max_wait``; False means shed the request."""
+        if self.in_flight < self.limit.concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if len(self._waiters) >= self.limit.queue or self.expected_wait() > max_wait:
+            self.rejected += 1
+            return False
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, max_wait)
+        except TimeoutError:
+            if not waiter.cancelled():  # the slot was handed over as the wait expired
+                return self._admitted_after(started)
+            self._discard(waiter)
+            self.timed_out += 1
+            return False
+        except asyncio.CancelledError:  # client gone while queued
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            else:
+                self._discard(waiter)
+            raise
+        return self._admitted_after(started)
+
+    def release(self, service_time: float) -> None:
+        """Free a slot, handing it straight to the oldest live waiter if any."""
+        if service_time:
+            self.service_time += _EWMA_WEIGHT * (service_time - self.service_time)
+        # After a shrink, surplus slots are retired instead of handed over
+        if self.in_flight > self.limit.concurrency or not self._hand_over():
+            self.in_flight -= 1
+
+    def resize(self, limit: ClassLimit) -> None:
+        """Apply new limits in place (event loop thread); extra slots go to waiters."""
+        self.limit = limit
+        while self.in_flight < limit.concurrency and self._hand_over():
+            self.in_flight += 1
+
+    def retry_after(self, max_wait: float) -> int:
+        """Whole seconds a shed client should wait before retrying (at least 1)."""
+        return max(1, math.ceil(min(self.expected_wait(), 60.0) or max_wait))
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "concurrency": self.limit.concurrency,
+            "queue": self.limit.queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "service_ms": round(self.service_time * 1000, 3),
+            "wait_ms_total": round(self.wait_time * 1000, 3),
+        }
+
+    def _admitted_after(self, started: float) -> bool:
+        self.admitted += 1
+        self.wait_time += time.perf_counter() - started
+        return True
+
+    def _hand_over(self) -> bool:
+        """Give a slot to the oldest live waiter; False if nobody is waiting."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # in_flight unchanged: the slot changes hands
+                return True
+        return False
+
+    def _discard(self, waiter: asyncio.Future[None]) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionController:
+    """One gate per route class, shared by the middleware and the metrics endpoint."""
+
+    def __init__(self, limits: Mapping[str, ClassLimit], max_wait: float = 1.0) -> None:
+        self.max_wait = max_wait
+        self.gates = {name: AdmissionGate(limit) for name, limit in limits.items()}
+
+    def resize(self, limits: Mapping[str, ClassLimit], max_wait: float) -> None:
+        """New limits for existing classes, keeping counters and queued requests."""
+        self.max_wait = max_wait
+        for name, limit in limits.items():
+            if name in self.gates:
+                self.gates[name].resize(limit)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {name: gate.snapshot() for name, gate in self.gates.items()}
+
+
+class AdmissionCollector(Collector):
+    """Prometheus collector reading the gates at scrape time (nothing on the request path)."""
+
+    def __init__(self, controller: AdmissionController) -> None:
+        self.controller = controller
+
+    def collect(self) -> Iterator[Metric]:
+        labels = ["route_class"]
+        gauges = {
+            "in_flight": GaugeMetricFamily(
+                "admission_in_flight", "Requests holding a slot", labels=labels
+            ),
+            "waiting": GaugeMetricFamily(
+                "admission_queue_depth", "Requests waiting for a slot", labels=labels
+            ),
+            "concurrency": GaugeMetricFamily(
+                "admission_concurrency_limit", "Slots of the route class", labels=labels
+            ),
+            "queue": GaugeMetricFamily(
+                "admission_queue_limit", "Bound of the wait queue", labels=labels
+            ),
+        }
+        counters = {
+            "admitted": CounterMetricFamily(
+                "admission_admitted", "Requests given a slot", labels=labels
+            ),
+            "rejected": CounterMetricFamily(
+                "admission_rejected",
+                "Requests shed at once (queue full or expected wait too long)",
+                labels=labels,
+            ),
+            "timed_out": CounterMetricFamily(
+                "admission_timed_out", "Requests shed after waiting max_wait", labels=labels
+            ),
+        }
+        wait = CounterMetricFamily(
+            "admission_wait_seconds", "Time admitted requests spent queued", labels=labels
+        )
+        service = GaugeMetricFamily(
+            "admission_service_seconds", "Smoothed time a request holds its slot", labels=labels
+        )
+        for name, gate in self.controller.gates.items():
+            values = {
+                "in_flight": gate.in_flight,
+                "waiting": gate.waiting,
+                "concurrency": gate.limit.concurrency,
+                "queue": gate.limit.queue,
+                "admitted": gate.admitted,
+                "rejected": gate.rejected,
+                "timed_out": gate.timed_out,
+            }
+            for key, family in (gauges | counters).items():
+                family.add_metric([name], values[key])
+            wait.add_metric([name], gate.wait_time)
+            service.add_metric([name], gate.service_time)
+        yield from gauges.values()
+        yield from counters.values()
+        yield wait
+        yield service
+
+
+class AdmissionMiddleware:
+    """ASGI middleware admitting, queueing or shedding each HTTP request."""
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        name = route_class(scope["method"], scope["path"])
+        gate = self.controller.gates.get(name) if name is not None else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        with timed("queue"):
+            admitted = await gate.acquire(self.controller.max_wait)
+        if not admitted:
+            await _reject(send, gate.retry_after(self.controller.max_wait))
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.perf_counter() - started)
+
+
+async def _reject(send: Send, retry_after: int) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_REJECTED_BODY)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": _REJECTED_BODY})
@@ -0,0 +1,229 @@
+"""
+Response compression: gzip, plus brotli and zstd when their packages are installed.
+
+The encoding is negotiated from Accept-Encoding (q-values honoured, server
+preference breaking ties). Only text-like content types are compressed,
+and a complete body under ``minimum_size`` goes out untouched: framing
+overhead and CPU outweigh the bytes saved. A complete body is compressed
+in one shot with a correct Content-Length. A streamed body
+(``more_body``) is compressed chunk by chunk, each chunk flushed so the
+client can decode it on arrival. Compression time is reported as the
+``compress`` Server-Timing span.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.timing import timed
+
+try:  # optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # optional: pip install zstandard
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+_COMPRESSIBLE_PREFIXES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/",
+)
+
+
+class Compressor(Protocol):
+    def chunk(self, data: bytes) -> bytes:
+        """Compress ``data`` and flush, so everything so far is decodable."""
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last ``data`` and close the stream."""
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._z.compress(data) + self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return bytes(self._c.process(data) + self._c.flush())
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return bytes(self._c.process(data) + self._c.finish())
+
+
+class _Zstd:
+    def __init__(self, level: int) -> None:
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return bytes(self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return bytes(self._c.compress(data) + self._c.flush())
+
+
+def compressors(
+    gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3
+) -> dict[str, Callable[[], Compressor]]:
+    """Factories of every encoding usable in this environment."""
+    available: dict[str, Callable[[], Compressor]] = {"gzip": lambda: _Gzip(gzip_level)}
+    if brotli is not None:
+        available["br"] = lambda: _Brotli(brotli_quality)
+    if zstandard is not None:
+        available["zstd"] = lambda: _Zstd(zstd_level)
+    return available
+
+
+@lru_cache(maxsize=256)  # clients send a handful of distinct header values
+def negotiate(accept_encoding: str, preference: tuple[str, ...]) -> str | None:
+    """Best encoding in ``preference`` order among those the client accepts (q > 0)."""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        token, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in preference:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return content_type.startswith(_COMPRESSIBLE_PREFIXES) or "+json" in content_type
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the negotiated encoding."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: Sequence[str] = ("zstd", "br", "gzip"),
+        *,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.factories = compressors(gzip_level, brotli_quality, zstd_level)
+        # Server preference, restricted to what is installed
+        self.preference = tuple(e for e in encodings if e in self.factories)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate(accept, self.preference) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingSender(send, encoding, self.factories[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingSender:
+    """Holds the response start until the first body chunk decides how to send it."""
+
+    __slots__ = ("_send", "encoding", "factory", "minimum_size", "start", "compressor")
+
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        factory: Callable[[], Compressor],
+        minimum_size: int,
+    ) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.start: Message | None = None  # held http.response.start
+        self.compressor: Compressor | None = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more: bool = message.get("more_body", False)
+        if self.compressor is None:
+            if self.start is None:  # passing through (decided on an earlier chunk)
+                await self._send(message)
+                return
+            if not self._begin(len(body), more):
+                await self._send_start()
+                await self._send(message)
+                return
+
+        assert self.compressor is not None
+        with timed("compress"):
+            data = self.compressor.chunk(body) if more else self.compressor.finish(body)
+        if self.start is not None:
+            if not more:
+                MutableHeaders(scope=self.start)["content-length"] = str(len(data))
+            await self._send_start()
+        if data or not more:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more})
+
+    def _begin(self, size: int, more: bool) -> bool:
+        """Decide on the first body chunk; True if the response gets compressed."""
+        assert self.start is not None
+        headers = MutableHeaders(scope=self.start)
+        status: int = self.start["status"]
+        if status < 200 or status in (204, 304) or not _compressible(headers):
+            return False
+        headers.add_vary_header("Accept-Encoding")
+        if not more and size < self.minimum_size:
+            return False
+        headers["content-encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["content-length"]  # one-shot bodies get it back once compressed
+        self.compressor = self.factory()
+        return True
+
+    async def _send_start(self) -> None:
+        start, self.start = self.start, None
+        if start is not None:
+            await self._send(start)
@@ -0,0 +1,97 @@
+"""
+CORS with precomputed origin lookup and cached preflight answers.
+
+Starlette's ``CORSMiddleware`` checks the origin against a list and
+rebuilds the preflight response on every OPTIONS request. This subclass
+keeps its semantics and precomputes what only depends on the settings:
+
+- allowed origins in a frozenset (trailing ``/`` stripped, as browsers
+  send ``Origin`` without a path), checked before the optional regex
+- preflight responses memoized per (origin, method, requested headers);
+  a browser sends the same few combinations over and over
+
+Installed as the outermost middleware, a preflight is answered before
+timing, admission, compression or routing run. ``max_age`` lets the
+browser reuse the answer instead of preflighting every authenticated call
+(Chromium caps it at 2 hours).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from functools import lru_cache
+
+from starlette.datastructures import Headers
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+def normalize_origin(origin: str) -> str:
+    """``https://app.example.com/`` -> ``https://app.example.com`` (as sent in Origin)."""
+    return origin.rstrip("/")
+
+
+class CachedCORSMiddleware(CORSMiddleware):
+    """CORSMiddleware with a set-based origin check and memoized preflights."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        app: ASGIApp,
+        *,
+        allow_origins: Sequence[str] = (),
+        allow_methods: Sequence[str] = ("GET",),
+        allow_headers: Sequence[str] = (),
+        allow_credentials: bool = False,
+        allow_origin_regex: str | None = None,
+        expose_headers: Sequence[str] = (),
+        max_age: int = 600,
+        preflight_cache_size: int = 1024,
+    ) -> None:
+        origins = [normalize_origin(origin) for origin in allow_origins]
+        super().__init__(
+            app,
+            allow_origins=origins,
+            allow_methods=allow_methods,
+            allow_headers=allow_headers,
+            allow_credentials=allow_credentials,
+            allow_origin_regex=allow_origin_regex,
+            expose_headers=expose_headers,
+            max_age=max_age,
+        )
+        self.origin_set = frozenset(origins)
+        self._preflight = lru_cache(maxsize=preflight_cache_size)(self._build_preflight)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] == "OPTIONS":
+            headers = Headers(scope=scope)
+            origin = headers.get("origin")
+            method = headers.get("access-control-request-method")
+            if origin is not None and method is not None:
+                response = self._preflight(
+                    origin, method, headers.get("access-control-request-headers")
+                )
+                await response(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        if self.allow_all_origins or origin in self.origin_set:
+            return True
+        return self.allow_origin_regex is not None and bool(
+            self.allow_origin_regex.fullmatch(origin)
+        )
+
+    def _build_preflight(self, origin: str, method: str, requested_headers: str | None) -> Response:
+        """The response only depends on these three values: built once, then reused."""
+        raw = [
+            (b"origin", origin.encode("latin-1")),
+            (b"access-control-request-method", method.encode("latin-1")),
+        ]
+        if requested_headers is not None:
+            raw.append((b"access-control-request-headers", requested_headers.encode("latin-1")))
+        return self.preflight_response(request_headers=Headers(raw=raw))
+
+    def preflight_cache_info(self) -> dict[str, int]:
+        info = self._preflight.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
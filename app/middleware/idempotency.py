@@ -0,0 +1,218 @@
+"""
+Idempotency-Key support for the creation endpoints.
+
+Mobile clients retry POST /api/v1/auth/register and POST /api/v1/users on
+timeouts. Without a key, each retry costs a database round trip (and a
+bcrypt hash when it races the first attempt), then ends in a 409 although
+the first attempt succeeded. With an ``Idempotency-Key`` header, the first
+request of a key runs and its response is recorded
+(app/services/idempotency.py). Retries get that response back, marked
+``Idempotent-Replayed: true``, without running the handler:
+
+- a duplicate arriving while the first request runs in this worker waits
+  for it; in another worker it gets 409 + Retry-After
+- the same key with another body is rejected with 422
+- 5xx responses are not recorded: the next retry runs the request again
+- a replay carries the endpoint's headers too, and a successful one counts
+  as a write for read-your-writes: the retry that never saw the first
+  response keeps reading from the primary
+
+Keys are scoped to the route and the caller: the ``sub`` of a valid bearer
+token (a refreshed token keeps replaying, another user's never does), else
+the client address and User-Agent (anonymous register). Each request claims
+its key under a fresh token, so a request that outlived its reservation
+cannot overwrite or release the next claimant's.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import secrets
+from collections.abc import Iterable
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.security import verify_token
+from app.middleware.read_your_writes import note_write
+from app.services.idempotency import (
+    IdempotencyStore,
+    KeyInProgressError,
+    KeyReuseError,
+    RecordedResponse,
+)
+
+MAX_KEY_LENGTH = 255
+# Recomputed on replay or specific to one response
+_NOT_RECORDED = frozenset(
+    {b"content-length", b"content-type", b"transfer-encoding", b"connection", b"server-timing"}
+)
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware recording and replaying responses per Idempotency-Key."""
+
+    def __init__(
+        self, app: ASGIApp, *, store: IdempotencyStore, routes: Iterable[tuple[str, str]]
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.routes = frozenset(routes)  # (method, path) pairs
+        self._pending: dict[str, asyncio.Event] = {}  # keys running in this worker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= MAX_KEY_LENGTH:
+            detail = f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+            await JSONResponse({"detail": detail}, 400)(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        key_hash = _digest(scope["method"], scope["path"], await _caller(scope, headers), key)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        token = secrets.token_hex(16)
+        while (pending := self._pending.get(key_hash)) is not None:
+            await pending.wait()  # then replay what the first request recorded
+        done = self._pending[key_hash] = asyncio.Event()
+        try:
+            try:
+                recorded = self.store.cached(key_hash, fingerprint)
+                if recorded is None:
+                    recorded = await run_in_threadpool(
+                        self.store.claim, key_hash, fingerprint, token
+                    )
+            except KeyReuseError:
+                detail = "Idempotency-Key already used with a different request"
+                await JSONResponse({"detail": detail}, 422)(scope, receive, send)
+                return
+            except KeyInProgressError:
+                detail = "A request with this Idempotency-Key is in progress"
+                response = JSONResponse({"detail": detail}, 409, headers={"Retry-After": "1"})
+                await response(scope, receive, send)
+                return
+            if recorded is not None:
+                if recorded.status_code < 400:
+                    note_write()  # the write it answers may not have reached the replicas
+                await _replay(recorded, send)
+                return
+            await self._record(
+                scope,
+                _replaying(body, receive),
+                send,
+                key_hash=key_hash,
+                fingerprint=fingerprint,
+                token=token,
+            )
+        finally:
+            del self._pending[key_hash]
+            done.set()
+
+    async def _record(  # pylint: disable=too-many-arguments
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        *,
+        key_hash: str,
+        fingerprint: str,
+        token: str,
+    ) -> None:
+        """Run the request; record its response before the last body chunk leaves."""
+        start: Message = {}
+        chunks: list[bytes] = []
+        recorded = False
+
+        async def capture(message: Message) -> None:
+            nonlocal start, recorded
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and start["status"] < 500:
+                    response = RecordedResponse(
+                        start["status"],
+                        Headers(raw=start["headers"]).get("content-type"),
+                        b"".join(chunks),
+                        tuple(
+                            (name.decode("latin-1"), value.decode("latin-1"))
+                            for name, value in start["headers"]
+                            if name.lower() not in _NOT_RECORDED
+                        ),
+                    )
+                    await run_in_threadpool(
+                        self.store.complete, key_hash, fingerprint, response, token
+                    )
+                    recorded = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            if not recorded:  # 5xx or failure: a retry runs the request again
+                await run_in_threadpool(self.store.release, key_hash, token)
+
+
+async def _caller(scope: Scope, headers: Headers) -> str:
+    """Who a key belongs to: the token's subject, else the anonymous client."""
+    scheme, _, credentials = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        payload = await run_in_threadpool(verify_token, credentials)  # RSA: off the event loop
+        if payload is not None and payload.get("sub"):
+            return f"sub:{payload['sub']}"
+    # Invalid tokens too: the handler answers 401, replayed to that client only
+    client = scope.get("client")
+    return f"anonymous:{client[0] if client else ''}:{headers.get('user-agent', '')}"
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replaying(body: bytes, receive: Receive) -> Receive:
+    """A receive channel handing out the already read body first."""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+async def _replay(response: RecordedResponse, send: Send) -> None:
+    headers = [
+        (b"content-length", str(len(response.body)).encode()),
+        (b"idempotent-replayed", b"true"),
+    ]
+    if response.content_type is not None:
+        headers.append((b"content-type", response.content_type.encode("latin-1")))
+    headers += [
+        (name.encode("latin-1"), value.encode("latin-1")) for name, value in response.headers
+    ]
+    await send({"type": "http.response.start", "status": response.status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": response.body})
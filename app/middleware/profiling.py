@@ -0,0 +1,265 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it is sampled (settings.profiling_sample_rate) or
+carries the ``X-Debug-Profile`` header set to settings.profiling_header_secret
+(no secret configured: the header is ignored). The secret is checked before
+the profiler starts, so anonymous callers cannot slow requests down or hold
+the profiler; header-triggered profiles are then only kept when the request
+authenticated as an admin. A profile holds a cProfile
+call tree and every SQL statement executed for the request, and the last
+settings.profiling_buffer_size profiles are kept in memory for
+``/api/v1/debug/profiles``.
+
+On Python 3.12+ cProfile observes every thread, so the endpoint's threadpool
+work is captured, along with anything running concurrently. Only one request
+is profiled at a time; others pass through untouched.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import Connection, Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_HEADER = b"x-debug-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Bounds on what a single profile keeps
+MAX_SQL_STATEMENTS = 200
+MAX_TREE_DEPTH = 40
+MIN_NODE_FRACTION = 0.01  # drop call-tree branches under 1% of the request
+HOTSPOTS = 25
+
+FuncKey = tuple[str, int, str]
+
+APP_DIR = str(Path(__file__).resolve().parent.parent)
+
+
+@dataclass(slots=True)
+class SqlStatement:
+    """One SQL statement executed while a request was profiled."""
+
+    statement: str
+    duration_ms: float
+    rows: int
+
+
+@dataclass(slots=True)
+class RequestProfile:  # pylint: disable=too-many-instance-attributes
+    """Everything captured for one profiled request."""
+
+    id: str
+    method: str
+    path: str
+    trigger: str  # "sample" | "header"
+    started_at: float
+    status_code: int = 0
+    duration_ms: float = 0.0
+    roles: list[str] = field(default_factory=list)
+    sql: list[SqlStatement] = field(default_factory=list)
+    sql_count: int = 0
+    sql_ms: float = 0.0
+    stats: dict[FuncKey, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def authorized(self) -> bool:
+        """Sampled profiles are always kept; header requests need an admin caller."""
+        return self.trigger == "sample" or "admin" in self.roles
+
+    def add_sql(self, statement: str, duration: float, rows: int) -> None:
+        self.sql_count += 1
+        self.sql_ms += duration * 1000
+        if len(self.sql) < MAX_SQL_STATEMENTS:
+            self.sql.append(SqlStatement(statement, round(duration * 1000, 3), rows))
+
+    def call_tree(self) -> list[dict[str, Any]]:
+        """Call tree of the app's code rebuilt from the cProfile caller graph, hot branches only."""
+        children: dict[FuncKey, list[tuple[FuncKey, tuple[Any, ...]]]] = {}
+        roots = []
+        for func, (cc, nc, tt, ct, callers) in self.stats.items():
+            # The event loop's caller graph is cyclic: root the tree at application
+            # functions called from library code (endpoints, dependencies)
+            if _is_app(func) and not any(_is_app(caller) for caller in callers):
+                roots.append((func, (cc, nc, tt, ct)))
+            for caller, edge in callers.items():
+                children.setdefault(caller, []).append((func, edge))
+
+        threshold = self.duration_ms * MIN_NODE_FRACTION / 1000
+
+        def build(
+            entries: Iterable[tuple[FuncKey, tuple[Any, ...]]], depth: int, path: frozenset[FuncKey]
+        ) -> list[dict[str, Any]]:
+            nodes = []
+            for func, (_cc, nc, tt, ct) in sorted(entries, key=lambda e: -e[1][3]):
+                if ct < threshold or func in path:
+                    continue
+                node = _node(func, nc, tt, ct)
+                if depth < MAX_TREE_DEPTH:
+                    node["children"] = build(children.get(func, ()), depth + 1, path | {func})
+                nodes.append(node)
+            return nodes
+
+        return build(roots, 0, frozenset())
+
+    def hotspots(self) -> list[dict[str, Any]]:
+        """Functions with the highest self time."""
+        top = sorted(self.stats.items(), key=lambda item: -item[1][2])[:HOTSPOTS]
+        return [_node(func, nc, tt, ct) for func, (_cc, nc, tt, ct, _callers) in top]
+
+
+def _is_app(func: FuncKey) -> bool:
+    return func[0].startswith(APP_DIR) and func[0] != __file__
+
+
+def _node(func: FuncKey, calls: int, self_s: float, total_s: float) -> dict[str, Any]:
+    filename, line, name = func
+    label = name if filename == "~" else f"{name} ({filename}:{line})"
+    return {
+        "function": label,
+        "calls": calls,
+        "total_ms": round(total_s * 1000, 3),
+        "self_ms": round(self_s * 1000, 3),
+    }
+
+
+class ProfileStore:
+    """Thread-safe ring buffer of the most recent profiles."""
+
+    def __init__(self, size: int) -> None:
+        self._profiles: deque[RequestProfile] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+
+    def list(self) -> list[RequestProfile]:
+        """Profiles, most recent first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: str) -> RequestProfile | None:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+# Profile of the request being handled; copied into threadpool workers with the context
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+# cProfile can only run once per process on 3.12+ (sys.monitoring)
+_profiler_lock = threading.Lock()
+
+
+def record_principal(roles: list[str]) -> None:
+    """Tell the active profile (if any) who the caller is; called by get_current_user."""
+    profile = _current.get()
+    if profile is not None:
+        profile.roles = roles
+
+
+def _before_cursor_execute(conn: Connection, *_args: Any) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, cursor: Any, statement: str, *_args: Any) -> None:
+    profile = _current.get()
+    starts = conn.info.get("profile_query_start")
+    if profile is None or not starts:
+        return
+    profile.add_sql(statement, time.perf_counter() - starts.pop(), cursor.rowcount)
+
+
+def install_sql_hooks(engine: Engine) -> None:
+    """Record statement timings on ``engine`` for the request being profiled."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling sampled or header-flagged requests into ``store``."""
+
+    def __init__(
+        self, app: ASGIApp, store: ProfileStore, sample_rate: float = 0.0, header_secret: str = ""
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.header_secret = header_secret.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        # pylint: disable-next=consider-using-with
+        if trigger is None or not _profiler_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send, trigger)
+        finally:
+            _profiler_lock.release()
+
+    def _trigger(self, scope: Scope) -> str | None:
+        if self.header_secret and any(
+            name == PROFILE_HEADER and hmac.compare_digest(value, self.header_secret)
+            for name, value in scope["headers"]
+        ):
+            return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, trigger: str) -> None:
+        profile = RequestProfile(
+            id=uuid.uuid4().hex[:16],
+            method=scope["method"],
+            path=scope["path"],
+            trigger=trigger,
+            started_at=time.time(),
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if profile.authorized:
+                    MutableHeaders(scope=message).append(PROFILE_ID_HEADER, profile.id)
+            await send(message)
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiler (debugger, py-spy...) owns sys.monitoring
+            await self.app(scope, receive, send)
+            return
+
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            _current.reset(token)
+            if profile.authorized:
+                profile.stats = pstats.Stats(profiler).stats  # type: ignore[attr-defined]
+                self.store.add(profile)
@@ -0,0 +1,133 @@
+"""
+Read-your-writes stickiness for replica routing.
+
+When a request commits on the primary, the response carries a
+``read_primary_until`` cookie (and ``X-Read-Primary-Until`` header for
+non-browser clients) holding a Unix timestamp ``window`` seconds ahead,
+signed with a server secret (``<timestamp>.<hmac>``). Requests presenting a
+correctly signed timestamp still in the future read from the primary (see
+get_read_db), so clients see their own writes despite replica lag. Unsigned
+or tampered values are ignored: a client cannot pin its reads to the
+primary beyond the window its last write opened. Workers share the secret
+(``REPLICA_STICKY_SECRET``), or each signs with its own random key.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import time
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COOKIE_NAME = "read_primary_until"
+HEADER_NAME = "X-Read-Primary-Until"
+_HEADER_KEY = HEADER_NAME.lower().encode()
+_SIGNATURE_LENGTH = 32  # hex digits of HMAC-SHA256 kept (128 bits)
+
+
+class _RequestState:
+    __slots__ = ("primary_until", "wrote")
+
+    def __init__(self, primary_until: float) -> None:
+        self.primary_until = primary_until
+        self.wrote = False
+
+
+_state: ContextVar[_RequestState | None] = ContextVar("read_your_writes", default=None)
+
+
+def prefers_primary() -> bool:
+    """True while the current client is inside its read-your-writes window."""
+    state = _state.get()
+    return state is not None and (state.wrote or state.primary_until > time.time())
+
+
+def note_write() -> None:
+    """Record that the current request committed on the primary."""
+    state = _state.get()
+    if state is not None:
+        state.wrote = True
+
+
+def _signature(key: bytes, until: str) -> str:
+    return hmac.new(key, until.encode(), hashlib.sha256).hexdigest()[:_SIGNATURE_LENGTH]
+
+
+def _sign(key: bytes, until: float) -> str:
+    """The header/cookie value for a deadline."""
+    value = f"{until:.3f}"
+    return f"{value}.{_signature(key, value)}"
+
+
+def _verified(key: bytes, value: str) -> float:
+    """The deadline of a value signed with ``key``, 0 when unsigned or tampered."""
+    until, _, signature = value.strip().rpartition(".")
+    if not hmac.compare_digest(signature, _signature(key, until)):
+        return 0.0
+    try:
+        return float(until)
+    except ValueError:
+        return 0.0
+
+
+def _primary_until(scope: Scope, now: float, window: float, key: bytes) -> float:
+    """
+    Latest correctly signed stickiness deadline presented by the client
+    (header or cookie), capped at ``now + window``; 0 when absent or past.
+    """
+    deadline = 0.0
+    for name, value in scope["headers"]:
+        if name == _HEADER_KEY:
+            candidates = [value.decode("latin-1")]
+        elif name == b"cookie":
+            candidates = [
+                part.split("=", 1)[1]
+                for part in value.decode("latin-1").split(";")
+                if part.strip().startswith(f"{COOKIE_NAME}=")
+            ]
+        else:
+            continue
+        for candidate in candidates:
+            deadline = max(deadline, _verified(key, candidate))
+    if deadline <= now:
+        return 0.0
+    return min(deadline, now + window)
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware carrying the read-your-writes window across requests."""
+
+    def __init__(self, app: ASGIApp, window: float, secret: str = "") -> None:
+        self.app = app
+        self.window = window
+        # Without a shared secret, only this worker accepts the values it issued
+        self._key = secret.encode() or secrets.token_bytes(32)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = _RequestState(_primary_until(scope, time.time(), self.window, self._key))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and state.wrote:
+                until = _sign(self._key, time.time() + self.window)
+                headers = MutableHeaders(scope=message)
+                headers.append(HEADER_NAME, until)
+                headers.append(
+                    "Set-Cookie",
+                    f"{COOKIE_NAME}={until}; Max-Age={int(self.window) + 1}; Path=/; "
+                    "HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        token = _state.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _state.reset(token)
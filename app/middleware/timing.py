@@ -0,0 +1,159 @@
+"""
+Per-request timing spans, Server-Timing header and JSON access log.
+
+Code paths worth attributing wrap themselves in ``timed(name)`` (bcrypt and
+JWT in app/core/security.py, JSON rendering in TimedJSONResponse); SQL time
+and statement count come from cursor events on the engine. Outside a
+request ``timed`` is a no-op.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Connection, Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.tracing import traced
+
+access_logger = logging.getLogger("app.access")
+
+
+@dataclass(slots=True)
+class Span:
+    """Accumulated time and number of occurrences of one kind of work."""
+
+    duration: float = 0.0
+    count: int = 0
+
+
+class RequestTimings:
+    """Spans accumulated while handling one request."""
+
+    __slots__ = ("spans",)
+
+    def __init__(self) -> None:
+        self.spans: dict[str, Span] = {}
+
+    def add(self, name: str, duration: float) -> None:
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = Span()
+        span.duration += duration
+        span.count += 1
+
+    def server_timing(self, total: float) -> str:
+        """Render the spans as a Server-Timing header value (durations in ms)."""
+        parts = [
+            f'{name};dur={span.duration * 1000:.2f};desc="{span.count} calls"'
+            for name, span in self.spans.items()
+        ]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def log_fields(self) -> dict[str, float | int]:
+        fields: dict[str, float | int] = {}
+        for name, span in self.spans.items():
+            fields[f"{name}_ms"] = round(span.duration * 1000, 3)
+            fields[f"{name}_count"] = span.count
+        return fields
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Attribute the duration of the block to span ``name`` of the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn: Connection, *_args: Any) -> None:
+    if _current.get() is not None:
+        conn.info.setdefault("timing_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Connection, *_args: Any) -> None:
+    timings = _current.get()
+    starts = conn.info.get("timing_query_start")
+    if timings is not None and starts:
+        timings.add("db", time.perf_counter() - starts.pop())
+
+
+def install_sql_timing(engine: Engine) -> None:
+    """Account statement time on ``engine`` to the ``db`` span of the current request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class TimedJSONResponse(ORJSONResponse):
+    """orjson response recording its rendering time as the ``serialize`` span."""
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"), traced("serialize"):
+            return super().render(content)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware collecting spans for each request and reporting them."""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True, access_log: bool = True) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    header = timings.server_timing(time.perf_counter() - start)
+                    MutableHeaders(scope=message).append("Server-Timing", header)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if self.access_log:
+                duration_ms = round((time.perf_counter() - start) * 1000, 3)
+                access_logger.info(
+                    "%s %s %d",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": duration_ms,
+                        "client": scope["client"][0] if scope.get("client") else None,
+                        **timings.log_fields(),
+                    },
+                )
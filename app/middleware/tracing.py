@@ -0,0 +1,417 @@
+"""
+Lightweight OpenTelemetry-compatible tracing.
+
+Spans follow the OpenTelemetry data model and propagate W3C ``traceparent``
+headers; finished spans are batched by a background thread and exported as
+OTLP/JSON (one ``resourceSpans`` document per line, readable by the
+collector's ``otlpjsonfile`` receiver) or kept in memory for tests.
+
+Sampling is parent-based: an incoming ``traceparent`` decides, otherwise a
+trace is kept when its id falls under settings.tracing_sample_rate. Spans
+are only created inside a sampled request; elsewhere ``traced`` is a no-op.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+from sqlalchemy import Connection, Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+TRACEPARENT = b"traceparent"
+MAX_STATEMENT_LENGTH = 1024
+
+# OTLP enums
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_OK, STATUS_ERROR = 0, 1, 2
+
+
+@dataclass(slots=True)
+class Span:  # pylint: disable=too-many-instance-attributes
+    """One timed operation of a trace."""
+
+    tracer: Tracer = field(repr=False)
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str = ""
+    kind: int = KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: int = STATUS_UNSET
+
+    def child(self, name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Span:
+        return Span(
+            self.tracer,
+            name,
+            self.trace_id,
+            _new_span_id(),
+            self.span_id,
+            kind,
+            attributes=attributes,
+        )
+
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+        self.tracer.processor.on_end(self)
+
+    def to_otlp(self) -> dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64) or 1:016x}"
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128) or 1:032x}"
+
+
+def parse_traceparent(value: str) -> tuple[str, str, bool] | None:
+    """Return (trace_id, parent_span_id, sampled) from a W3C traceparent header."""
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    _version, trace_id, span_id, flags = parts[:4]
+    if len(trace_id) != 32 or len(span_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        if int(trace_id, 16) == 0 or int(span_id, 16) == 0:
+            return None
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    return trace_id.lower(), span_id.lower(), sampled
+
+
+def format_traceparent(span: Span) -> str:
+    return f"00-{span.trace_id}-{span.span_id}-01"
+
+
+class SpanExporter(Protocol):
+    """Destination of finished spans."""
+
+    def export(self, spans: Sequence[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class InMemorySpanExporter:
+    """Keeps exported spans in a list (tests, debugging)."""
+
+    def __init__(self) -> None:
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self._spans.extend(spans)
+
+    def get_finished_spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileSpanExporter:
+    """Appends one OTLP/JSON ``resourceSpans`` document per batch to ``path``."""
+
+    def __init__(self, path: str | Path, service_name: str) -> None:
+        self.path = Path(path)
+        self._resource = {"attributes": [_otlp_attribute("service.name", service_name)]}
+
+    def export(self, spans: Sequence[Span]) -> None:
+        document = {
+            "resourceSpans": [
+                {
+                    "resource": self._resource,
+                    "scopeSpans": [
+                        {"scope": {"name": "app"}, "spans": [s.to_otlp() for s in spans]}
+                    ],
+                }
+            ]
+        }
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(document, separators=(",", ":")) + "\n")
+
+    def shutdown(self) -> None:
+        pass
+
+
+class BatchSpanProcessor:  # pylint: disable=too-many-instance-attributes
+    """Queues finished spans and exports them in batches from a worker thread."""
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        max_queue_size: int = 2048,
+        max_batch_size: int = 512,
+        schedule_delay: float = 1.0,
+    ) -> None:
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.schedule_delay = schedule_delay
+        self.dropped = 0
+        self._queue: deque[Span] = deque()
+        self._condition = threading.Condition()
+        self._flush_requested = 0
+        self._flushed = 0
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._worker.start()
+        atexit.register(self.shutdown)
+
+    def on_end(self, span: Span) -> None:
+        """Queue a finished span; drop it when the queue is full (never block)."""
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.max_batch_size:
+            with self._condition:
+                self._condition.notify()
+
+    def force_flush(self, timeout: float = 5.0) -> None:
+        """Block until every span queued so far has been exported."""
+        with self._condition:
+            self._flush_requested += 1
+            target = self._flush_requested
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: self._flushed >= target or self._stopped, timeout)
+
+    def shutdown(self) -> None:
+        with self._condition:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._condition.notify()
+        self._worker.join(timeout=5.0)
+        self.exporter.shutdown()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                idle = (
+                    self._flush_requested <= self._flushed
+                    and len(self._queue) < self.max_batch_size
+                )
+                if idle and not self._stopped:
+                    self._condition.wait(self.schedule_delay)
+                stopping = self._stopped
+                flush_target = self._flush_requested
+            self._export_pending()
+            with self._condition:
+                self._flushed = flush_target
+                self._condition.notify_all()
+            if stopping:
+                return
+
+    def _export_pending(self) -> None:
+        while self._queue:
+            batch = [
+                self._queue.popleft() for _ in range(min(self.max_batch_size, len(self._queue)))
+            ]
+            self.exporter.export(batch)
+
+
+class Tracer:
+    """Creates root spans for requests according to the sampling rate."""
+
+    def __init__(self, processor: BatchSpanProcessor, sample_rate: float = 1.0) -> None:
+        self.processor = processor
+        self._sample_rate, self._threshold = 0.0, 0
+        self.sample_rate = sample_rate
+
+    @property
+    def sample_rate(self) -> float:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, rate: float) -> None:
+        """Share of new traces kept; can change while requests are served."""
+        self._sample_rate = rate
+        self._threshold = int(min(max(rate, 0.0), 1.0) * 2**64)
+
+    def should_sample(self, trace_id: str) -> bool:
+        """TraceIdRatioBased sampling on the lower 64 bits of the trace id."""
+        return int(trace_id[16:], 16) < self._threshold
+
+    def start_root(
+        self, name: str, traceparent: str | None, kind: int = KIND_SERVER, **attributes: Any
+    ) -> Span | None:
+        """Root span of a request, or None if the trace is not sampled."""
+        parent = parse_traceparent(traceparent) if traceparent else None
+        if parent is not None:
+            trace_id, parent_span_id, sampled = parent
+        else:
+            if not self._threshold:
+                return None
+            trace_id, parent_span_id = _new_trace_id(), ""
+            sampled = self.should_sample(trace_id)
+        if not sampled:
+            return None
+        return Span(
+            self, name, trace_id, _new_span_id(), parent_span_id, kind, attributes=attributes
+        )
+
+
+# Span of the code currently running; None outside sampled requests
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+@contextmanager
+def traced(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Run the block in a child span of the current span (no-op when not tracing)."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    span = parent.child(name, **attributes)
+    token = _current.set(span)
+    try:
+        yield span
+    except BaseException:
+        span.status = STATUS_ERROR
+        raise
+    finally:
+        _current.reset(token)
+        span.end()
+
+
+def start_span(name: str, **attributes: Any) -> Span | None:
+    """Child span that is *not* made current, for lifetimes spanning threads (get_db)."""
+    parent = _current.get()
+    return parent.child(name, **attributes) if parent is not None else None
+
+
+def _before_cursor_execute(conn: Connection, _cursor: Any, statement: str, *_args: Any) -> None:
+    parent = _current.get()
+    if parent is None:
+        return
+    span = parent.child(
+        "db.query",
+        KIND_CLIENT,
+        **{
+            "db.system": conn.dialect.name,
+            "db.operation.name": statement.split(None, 1)[0].upper() if statement else "",
+            "db.query.text": statement[:MAX_STATEMENT_LENGTH],
+        },
+    )
+    conn.info.setdefault("trace_query_spans", []).append(span)
+
+
+def _after_cursor_execute(conn: Connection, cursor: Any, *_args: Any) -> None:
+    spans = conn.info.get("trace_query_spans")
+    if spans and _current.get() is not None:
+        span = spans.pop()
+        if cursor.rowcount >= 0:
+            span.attributes["db.response.returned_rows"] = cursor.rowcount
+        span.end()
+
+
+def _handle_error(context: Any) -> None:
+    spans = context.connection.info.get("trace_query_spans") if context.connection else None
+    if spans and _current.get() is not None:
+        span = spans.pop()
+        span.status = STATUS_ERROR
+        span.attributes["error.type"] = type(context.original_exception).__name__
+        span.end()
+
+
+def install_sql_tracing(engine: Engine) -> None:
+    """Record one CLIENT span per statement executed on ``engine`` in a sampled request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a SERVER span per sampled request."""
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == TRACEPARENT),
+            None,
+        )
+        span = self.tracer.start_root(
+            f"{scope['method']} {scope['path']}",
+            traceparent,
+            **{"http.request.method": scope["method"], "url.path": scope["path"]},
+        )
+        if span is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                span.attributes["http.response.status_code"] = status_code
+                if status_code >= 500:
+                    span.status = STATUS_ERROR
+                MutableHeaders(scope=message).append("traceresponse", format_traceparent(span))
+            await send(message)
+
+        token = _current.set(span)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            span.status = STATUS_ERROR
+            raise
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                span.name = f"{scope['method']} {route.path}"
+                span.attributes["http.route"] = route.path
+            span.end()
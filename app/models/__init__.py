@@ -4,6 +4,8 @@ Imports all models for SQLAlchemy to register them.
 """
 
 from .base import BaseModel
+from .idempotency_key import IdempotencyKey
 from .user import Profile, User, UserRole
+from .user_counter import UserCounter
 
-__all__ = ["BaseModel", "User", "Profile", "UserRole"]
+__all__ = ["BaseModel", "IdempotencyKey", "User", "Profile", "UserRole", "UserCounter"]
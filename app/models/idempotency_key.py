@@ -0,0 +1,44 @@
+"""
+Responses recorded for Idempotency-Key requests (app/middleware/idempotency.py).
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, Index, Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    """
+    One client key, reserved while its first request runs, then holding the
+    response replayed to the retries.
+
+    ``status_code`` is NULL during the reservation, which ``claim_token``
+    ties to the request holding it. ``expires_at`` ends the reservation (a
+    worker that died mid-request) or the replay window; the expiry worker
+    deletes the rows past it.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # sha256 of route, caller and client key: a key only replays to the same request
+    key_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of the body
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    body: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    # Other response headers set by the endpoint, as [name, value] pairs
+    headers: Mapped[list[list[str]] | None] = mapped_column(JSON, nullable=True)
+    # Only the claimant's complete()/release() match the row while it is reserved
+    claim_token: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey({self.key_hash[:12]}, status={self.status_code})>"
+
+
+Index("ix_idempotency_keys_expires_at", IdempotencyKey.expires_at)
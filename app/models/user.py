@@ -5,8 +5,10 @@ User and profile models.
 from __future__ import annotations
 
 import enum
+from datetime import datetime
+from typing import Any
 
-from sqlalchemy import Enum, ForeignKey, Integer, String
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import SCHEMA_NAME, BaseModel
@@ -23,15 +25,18 @@ class User(BaseModel):
     """
     User model representing a user account.
 
-    Each user can have one profile with additional information.
+    Each user can have one profile with additional information. Deleting an
+    account sets ``deleted_at``; the row is invisible to every repository
+    query from then on and is hard-deleted later by the purge worker.
     """
 
     __tablename__ = "users"
 
-    email: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
-    username: Mapped[str] = mapped_column(String, unique=True, nullable=False, index=True)
+    email: Mapped[str] = mapped_column(String, nullable=False)
+    username: Mapped[str] = mapped_column(String, nullable=False)
     password: Mapped[str] = mapped_column(String, nullable=False)  # Hashed password
     role: Mapped[UserRole] = mapped_column(Enum(UserRole), default=UserRole.USER, nullable=False)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Relations
     profile: Mapped[Profile | None] = relationship(
@@ -42,6 +47,39 @@ class User(BaseModel):
         return f"<User(email='{self.email}', username='{self.username}')>"
 
 
+# Case-insensitive uniqueness among live accounts (a deleted account frees its
+# email and username); lookups compare lower(column) and filter deleted_at IS
+# NULL, so these partial indexes serve them
+_LIVE = User.deleted_at.is_(None)
+Index(
+    "ux_users_email_lower",
+    func.lower(User.email),
+    unique=True,
+    postgresql_where=_LIVE,
+    sqlite_where=_LIVE,
+)
+Index(
+    "ux_users_username_lower",
+    func.lower(User.username),
+    unique=True,
+    postgresql_where=_LIVE,
+    sqlite_where=_LIVE,
+)
+# Purge queue: only soft-deleted rows are indexed
+_DELETED = User.deleted_at.is_not(None)
+Index("ix_users_deleted_at", User.deleted_at, postgresql_where=_DELETED, sqlite_where=_DELETED)
+
+
+def _trigram_index(name: str, column: Any) -> Index:
+    """GIN pg_trgm index on lower(column): LIKE '%q%' and fuzzy (%) search."""
+    return Index(
+        name,
+        func.lower(column).label("value"),
+        postgresql_using="gin",
+        postgresql_ops={"value": "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
+
 class Profile(BaseModel):
     """
     User profile model with additional user information.
@@ -74,3 +112,13 @@ class Profile(BaseModel):
         if self.last_name:
             parts.append(self.last_name)
         return " ".join(parts) if parts else ""
+
+
+# Admin search (see app/repositories/sql.py): trigram indexes on PostgreSQL,
+# lower() B-trees serving the prefix-only fallback elsewhere
+_trigram_index("ix_users_email_trgm", User.email)
+_trigram_index("ix_users_username_trgm", User.username)
+_trigram_index("ix_profiles_first_name_trgm", Profile.first_name)
+_trigram_index("ix_profiles_last_name_trgm", Profile.last_name)
+Index("ix_profiles_first_name_lower", func.lower(Profile.first_name)).ddl_if(dialect="sqlite")
+Index("ix_profiles_last_name_lower", func.lower(Profile.last_name)).ddl_if(dialect="sqlite")
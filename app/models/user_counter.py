@@ -0,0 +1,33 @@
+"""
+Summary counters backing GET /api/v1/users/stats.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+# Counter kinds: users per role (bucket = role value), signups per UTC day
+# (bucket = ISO date)
+ROLE = "role"
+SIGNUPS = "signups"
+
+
+class UserCounter(Base):
+    """
+    One incrementally maintained count.
+
+    Rows are updated in the same transaction as the user writes (see
+    app/repositories/sql.py), so reading the stats never scans users.
+    """
+
+    __tablename__ = "user_counters"
+
+    kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    bucket: Mapped[str] = mapped_column(String(32), primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<UserCounter({self.kind}:{self.bucket}={self.count})>"
@@ -0,0 +1,40 @@
+"""
+User repositories: one contract, interchangeable storage backends.
+"""
+
+from .base import (
+    AsyncUserRepository,
+    DuplicateUserError,
+    Role,
+    StoredUser,
+    UserChanges,
+    UserRepository,
+    UserStats,
+    lookup_key,
+    normalize_email,
+    normalize_user_id,
+    rank_users,
+    utc_today,
+)
+from .json_file import JsonFileUserRepository
+from .memory import InMemoryUserRepository
+from .sql import AsyncSqlUserRepository, SqlUserRepository
+
+__all__ = [
+    "AsyncSqlUserRepository",
+    "AsyncUserRepository",
+    "DuplicateUserError",
+    "InMemoryUserRepository",
+    "JsonFileUserRepository",
+    "Role",
+    "SqlUserRepository",
+    "StoredUser",
+    "UserChanges",
+    "UserRepository",
+    "UserStats",
+    "lookup_key",
+    "normalize_email",
+    "normalize_user_id",
+    "rank_users",
+    "utc_today",
+]
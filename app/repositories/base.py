@@ -0,0 +1,219 @@
+"""
+Repository contract shared by every user storage backend.
+
+Routers and services talk to a ``UserRepository`` instead of a concrete
+storage (SQL session, JSON file, memory), so a backend can be swapped or
+optimised without touching the API layer.
+
+Emails and usernames are unique case-insensitively in every backend:
+emails are stored normalized (``normalize_email``), usernames keep the
+case they were registered with and are matched through ``lookup_key``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+from typing import Literal, Protocol, TypedDict
+
+# Allowed roles, mirrors app.schemas.user.UserRole
+Role = Literal["admin", "user"]
+
+
+def normalize_email(email: str) -> str:
+    """Canonical stored form of an email address."""
+    return email.strip().lower()
+
+
+def normalize_user_id(user_id: str) -> str:
+    """
+    Canonical form of a user id: integer ids (SQL, memory) without blanks,
+    sign or leading zeros, other ids (JSON ``u_...``) only stripped.
+    """
+    value = user_id.strip()
+    try:
+        return str(int(value))
+    except ValueError:
+        return value
+
+
+def lookup_key(value: str) -> str:
+    """Case-insensitive username key, the Python side of SQL ``lower(username)``."""
+    return value.lower()
+
+
+# Search ranks, best first: a field equals the query, starts with it, contains it
+RANK_EXACT, RANK_PREFIX, RANK_CONTAINS = 3, 2, 1
+
+
+class DuplicateUserError(Exception):
+    """Raised when a write would violate email/username uniqueness."""
+
+
+@dataclass(frozen=True, slots=True)
+class StoredUser:
+    """Backend-neutral snapshot of a user and its profile fields."""
+
+    id: str
+    email: str
+    username: str
+    password_hash: str
+    role: Role = "user"
+    first_name: str | None = None
+    last_name: str | None = None
+
+
+def search_rank(user: StoredUser, query: str) -> int:
+    """Best rank of the query over email, username and names; 0 if nothing matches."""
+    rank = 0
+    for value in (user.email, user.username, user.first_name, user.last_name):
+        if not value:
+            continue
+        value = value.lower()
+        if value == query:
+            return RANK_EXACT
+        if value.startswith(query):
+            rank = RANK_PREFIX
+        elif rank < RANK_CONTAINS and query in value:
+            rank = RANK_CONTAINS
+    return rank
+
+
+def rank_users(
+    users: Iterable[StoredUser], query: str, limit: int, offset: int = 0
+) -> list[StoredUser]:
+    """Reference search for scan-based backends: rank desc, then username."""
+    query = query.strip().lower()
+    ranked = [(rank, user) for user in users if (rank := search_rank(user, query))]
+    ranked.sort(key=lambda item: (-item[0], lookup_key(item[1].username)))
+    return [user for _, user in ranked[offset : offset + limit]]
+
+
+def utc_today() -> date:
+    """Day a signup is counted under."""
+    return datetime.now(UTC).date()
+
+
+@dataclass(frozen=True, slots=True)
+class UserStats:
+    """
+    User counts per role, and existing accounts per UTC creation day (days
+    without any omitted): deleting a user also removes its signup.
+    """
+
+    by_role: dict[str, int] = field(default_factory=dict)
+    signups: dict[date, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.by_role.values())
+
+
+class UserChanges(TypedDict, total=False):
+    """Partial update accepted by ``UserRepository.update``."""
+
+    email: str
+    username: str
+    password_hash: str
+    role: Role
+    first_name: str
+    last_name: str
+
+
+class UserRepository(Protocol):
+    """Synchronous user repository."""
+
+    def get(self, user_id: str) -> StoredUser | None:
+        """Return a user by id, None if missing."""
+
+    def get_by_email(self, email: str) -> StoredUser | None:
+        """Return a user by email, None if missing."""
+
+    def get_by_username(self, username: str) -> StoredUser | None:
+        """Return a user by username, None if missing."""
+
+    def exists(self, email: str, username: str) -> bool:
+        """Return True if a user already holds this email or username."""
+
+    def list_all(self) -> list[StoredUser]:
+        """Return every user."""
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list[StoredUser]:
+        """Users matching ``query`` (email, username, names), best matches first."""
+
+    def stats(self, since: date) -> UserStats:
+        """Users per role, and signups per day from ``since`` on."""
+
+    def create(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        email: str,
+        username: str,
+        password_hash: str,
+        role: Role = "user",
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> StoredUser:
+        """Persist a new user; raises DuplicateUserError on conflict."""
+
+    def update(self, user_id: str, changes: UserChanges) -> StoredUser | None:
+        """Apply a partial update; None if missing, DuplicateUserError on conflict."""
+
+    def delete(self, user_id: str) -> bool:
+        """Delete a user; returns True if something was deleted."""
+
+    def set_roles(self, user_ids: Sequence[str], role: Role) -> dict[str, Role]:
+        """Give ``role`` to the listed users at once; returns each found user's previous role."""
+
+    def delete_many(self, user_ids: Sequence[str]) -> set[str]:
+        """Delete the listed users at once; returns the ids that were deleted."""
+
+
+class AsyncUserRepository(Protocol):
+    """Asynchronous counterpart of ``UserRepository``."""
+
+    async def get(self, user_id: str) -> StoredUser | None:
+        """Return a user by id, None if missing."""
+
+    async def get_by_email(self, email: str) -> StoredUser | None:
+        """Return a user by email, None if missing."""
+
+    async def get_by_username(self, username: str) -> StoredUser | None:
+        """Return a user by username, None if missing."""
+
+    async def exists(self, email: str, username: str) -> bool:
+        """Return True if a user already holds this email or username."""
+
+    async def list_all(self) -> list[StoredUser]:
+        """Return every user."""
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> list[StoredUser]:
+        """Users matching ``query`` (email, username, names), best matches first."""
+
+    async def stats(self, since: date) -> UserStats:
+        """Users per role, and signups per day from ``since`` on."""
+
+    async def create(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        email: str,
+        username: str,
+        password_hash: str,
+        role: Role = "user",
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> StoredUser:
+        """Persist a new user; raises DuplicateUserError on conflict."""
+
+    async def update(self, user_id: str, changes: UserChanges) -> StoredUser | None:
+        """Apply a partial update; None if missing, DuplicateUserError on conflict."""
+
+    async def delete(self, user_id: str) -> bool:
+        """Delete a user; returns True if something was deleted."""
+
+    async def set_roles(self, user_ids: Sequence[str], role: Role) -> dict[str, Role]:
+        """Give ``role`` to the listed users at once; returns each found user's previous role."""
+
+    async def delete_many(self, user_ids: Sequence[str]) -> set[str]:
+        """Delete the listed users at once; returns the ids that were deleted."""
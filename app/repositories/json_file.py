@@ -0,0 +1,130 @@
+"""
+User repository over the local JSON store (offline/dev backend).
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from collections.abc import Sequence
+from datetime import date
+from typing import Any
+
+from app.repositories.base import (
+    DuplicateUserError,
+    Role,
+    StoredUser,
+    UserChanges,
+    UserStats,
+    normalize_email,
+    rank_users,
+    utc_today,
+)
+from app.services.user_service import (
+    JsonUserStore,
+    UserRecordOptional,
+    _ensure_literal_role,
+    get_store,
+)
+
+
+def _to_stored(record: UserRecordOptional) -> StoredUser:
+    return StoredUser(
+        id=record["id"],
+        email=record["email"],
+        username=record["username"],
+        password_hash=record.get("password", ""),
+        role=_ensure_literal_role(record.get("role")),
+        first_name=record.get("first_name"),
+        last_name=record.get("last_name"),
+    )
+
+
+class JsonFileUserRepository:
+    """Repository adapter for ``JsonUserStore``; ``password`` holds the hash."""
+
+    def __init__(self, store: JsonUserStore | None = None) -> None:
+        self.store = store or get_store()
+
+    def get(self, user_id: str) -> StoredUser | None:
+        record = self.store.get(user_id)
+        return _to_stored(record) if record is not None else None
+
+    def get_by_email(self, email: str) -> StoredUser | None:
+        record = self.store.get_by_email(normalize_email(email))
+        return _to_stored(record) if record is not None else None
+
+    def get_by_username(self, username: str) -> StoredUser | None:
+        record = self.store.get_by_username(username)
+        return _to_stored(record) if record is not None else None
+
+    def exists(self, email: str, username: str) -> bool:
+        return (
+            self.store.get_by_email(normalize_email(email)) is not None
+            or self.store.get_by_username(username) is not None
+        )
+
+    def list_all(self) -> list[StoredUser]:
+        return [_to_stored(r) for r in self.store.all()]
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list[StoredUser]:
+        return rank_users(self.list_all(), query, limit, offset)
+
+    def stats(self, since: date) -> UserStats:
+        by_role: Counter[str] = Counter()
+        signups: Counter[date] = Counter()
+        first_day = since.isoformat()  # ISO dates compare like the dates they denote
+        for record in self.store.all():
+            by_role[_ensure_literal_role(record.get("role"))] += 1
+            created_at = record.get("created_at")
+            if created_at is not None and created_at >= first_day:
+                signups[date.fromisoformat(created_at)] += 1
+        return UserStats(by_role=dict(by_role), signups=dict(signups))
+
+    def create(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        email: str,
+        username: str,
+        password_hash: str,
+        role: Role = "user",
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> StoredUser:
+        record: UserRecordOptional = {
+            "id": f"u_{uuid.uuid4().hex[:8]}",
+            "email": normalize_email(email),
+            "username": username,
+            "password": password_hash,
+            "role": role,
+            "created_at": utc_today().isoformat(),
+        }
+        if first_name is not None:
+            record["first_name"] = first_name
+        if last_name is not None:
+            record["last_name"] = last_name
+        if not self.store.put(record, unique=True):
+            raise DuplicateUserError("email or username already exists")
+        return _to_stored(record)
+
+    def update(self, user_id: str, changes: UserChanges) -> StoredUser | None:
+        fields: dict[str, Any] = dict(changes)
+        if "email" in fields:
+            fields["email"] = normalize_email(fields["email"])
+        if "password_hash" in fields:
+            fields["password"] = fields.pop("password_hash")
+        try:
+            record = self.store.update(user_id, fields, unique=True)
+        except ValueError as exc:
+            raise DuplicateUserError(str(exc)) from exc
+        return _to_stored(record) if record is not None else None
+
+    def delete(self, user_id: str) -> bool:
+        return self.store.delete(user_id)
+
+    def set_roles(self, user_ids: Sequence[str], role: Role) -> dict[str, Role]:
+        previous = self.store.update_many(user_ids, {"role": role})
+        return {user_id: _ensure_literal_role(r.get("role")) for user_id, r in previous.items()}
+
+    def delete_many(self, user_ids: Sequence[str]) -> set[str]:
+        return self.store.delete_many(user_ids)
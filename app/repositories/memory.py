@@ -0,0 +1,149 @@
+"""
+In-memory user repository, used by tests and as the fastest reference backend.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import replace
+from datetime import date
+
+from app.repositories.base import (
+    DuplicateUserError,
+    Role,
+    StoredUser,
+    UserChanges,
+    UserStats,
+    lookup_key,
+    normalize_email,
+    rank_users,
+    utc_today,
+)
+
+
+class InMemoryUserRepository:  # pylint: disable=too-many-instance-attributes
+    """Dictionary-backed repository with case-insensitive email/username indexes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._users: dict[str, StoredUser] = {}
+        self._by_email: dict[str, str] = {}
+        self._by_username: dict[str, str] = {}
+        self._by_role: Counter[str] = Counter()
+        self._signups: Counter[date] = Counter()
+        self._signup_day: dict[str, date] = {}
+        self._next_id = 1
+
+    def get(self, user_id: str) -> StoredUser | None:
+        return self._users.get(user_id)
+
+    def get_by_email(self, email: str) -> StoredUser | None:
+        user_id = self._by_email.get(normalize_email(email))
+        return self._users.get(user_id) if user_id is not None else None
+
+    def get_by_username(self, username: str) -> StoredUser | None:
+        user_id = self._by_username.get(lookup_key(username))
+        return self._users.get(user_id) if user_id is not None else None
+
+    def exists(self, email: str, username: str) -> bool:
+        return normalize_email(email) in self._by_email or lookup_key(username) in self._by_username
+
+    def list_all(self) -> list[StoredUser]:
+        return list(self._users.values())
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list[StoredUser]:
+        return rank_users(self.list_all(), query, limit, offset)
+
+    def stats(self, since: date) -> UserStats:
+        with self._lock:
+            return UserStats(
+                by_role=dict(self._by_role),
+                signups={day: n for day, n in self._signups.items() if n and day >= since},
+            )
+
+    def create(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        email: str,
+        username: str,
+        password_hash: str,
+        role: Role = "user",
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> StoredUser:
+        email = normalize_email(email)
+        with self._lock:
+            if self.exists(email, username):
+                raise DuplicateUserError("email or username already exists")
+            user = StoredUser(
+                id=str(self._next_id),
+                email=email,
+                username=username,
+                password_hash=password_hash,
+                role=role,
+                first_name=first_name,
+                last_name=last_name,
+            )
+            self._next_id += 1
+            self._store(user)
+            day = self._signup_day[user.id] = utc_today()
+            self._signups[day] += 1
+            return user
+
+    def update(self, user_id: str, changes: UserChanges) -> StoredUser | None:
+        with self._lock:
+            current = self._users.get(user_id)
+            if current is None:
+                return None
+            user = replace(current, **changes)
+            if "email" in changes:
+                user = replace(user, email=normalize_email(user.email))
+            taken_email = self._by_email.get(user.email, user_id)
+            taken_username = self._by_username.get(lookup_key(user.username), user_id)
+            if taken_email != user_id or taken_username != user_id:
+                raise DuplicateUserError("email or username already exists")
+            self._unindex(current)
+            self._store(user)
+            return user
+
+    def delete(self, user_id: str) -> bool:
+        with self._lock:
+            return self._delete(user_id)
+
+    def set_roles(self, user_ids: Sequence[str], role: Role) -> dict[str, Role]:
+        with self._lock:
+            previous: dict[str, Role] = {}
+            for user_id in user_ids:
+                current = self._users.get(user_id)
+                if current is None or user_id in previous:
+                    continue
+                previous[user_id] = current.role
+                if current.role != role:
+                    self._unindex(current)
+                    self._store(replace(current, role=role))
+            return previous
+
+    def delete_many(self, user_ids: Sequence[str]) -> set[str]:
+        with self._lock:
+            return {user_id for user_id in user_ids if self._delete(user_id)}
+
+    def _delete(self, user_id: str) -> bool:
+        user = self._users.pop(user_id, None)
+        if user is None:
+            return False
+        self._unindex(user)
+        self._signups[self._signup_day.pop(user_id)] -= 1
+        return True
+
+    def _store(self, user: StoredUser) -> None:
+        self._users[user.id] = user
+        self._by_email[user.email] = user.id
+        self._by_username[lookup_key(user.username)] = user.id
+        self._by_role[user.role] += 1
+
+    def _unindex(self, user: StoredUser) -> None:
+        self._by_email.pop(user.email, None)
+        self._by_username.pop(lookup_key(user.username), None)
+        self._by_role[user.role] -= 1
@@ -0,0 +1,734 @@
+"""
+SQLAlchemy-backed user repositories (sync ``Session`` and ``AsyncSession``).
+
+Both flavours share the statements below so query tuning only has to
+happen once. Reads select the StoredUser columns with one LEFT JOIN to
+profiles and run on the session's connection: rows map straight to
+StoredUser without building ORM entities or touching the identity map.
+Writes go through the ORM unit of work.
+
+User counts per role and signups per day (accounts by creation day) live
+in ``user_counters``, equal to a recount of users at all times; an
+``after_flush`` hook applies the deltas of every flushed User insert,
+delete or role change on the flush connection, so the counters commit or
+roll back with the write and stats() reads a handful of rows.
+
+Deletion is soft: delete() is one UPDATE setting ``deleted_at`` (its
+RETURNING row feeds the counter deltas), every statement below only sees
+live rows, and purge_deleted_users() hard-deletes soft-deleted rows in
+small batches from a background worker (app/services/purge_worker.py).
+
+Lookup statements are built once at import with bound parameters. Reusing
+the same statement object hits the engine's compiled cache and also skips
+rebuilding the select, its cache key and the result-column matching. That
+per-call work is several times the cost of the SQLite query itself (see
+benchmarks/test_lookup_benchmark.py).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Sequence
+from datetime import UTC, date, datetime
+from typing import TYPE_CHECKING, Any, cast
+
+from sqlalchemy import (
+    Connection,
+    Executable,
+    Insert,
+    Table,
+    and_,
+    bindparam,
+    case,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+    union,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, UOWTransaction, joinedload
+
+from app.models.user import Profile, User, UserRole
+from app.models.user_counter import ROLE, SIGNUPS, UserCounter
+from app.repositories.base import (
+    RANK_CONTAINS,
+    RANK_EXACT,
+    RANK_PREFIX,
+    DuplicateUserError,
+    Role,
+    StoredUser,
+    UserChanges,
+    UserStats,
+    lookup_key,
+    normalize_email,
+    utc_today,
+)
+
+if TYPE_CHECKING:  # the asyncio extension needs greenlet, only the async flavour uses it
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+_PROFILE_FIELDS = ("first_name", "last_name")
+
+_users = cast(Table, User.__table__)
+_profiles = cast(Table, Profile.__table__)
+
+
+# ---------------------------- Statements -------------------------------------
+
+
+def _parse_id(user_id: str) -> int | None:
+    """SQL ids are integers; anything else cannot match a row."""
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+# Soft-deleted rows are filtered out of every read; the predicate also lets
+# the planner use the partial ux_users_*_lower indexes
+_LIVE = User.deleted_at.is_(None)
+
+
+def _parse_ids(user_ids: Sequence[str]) -> list[int]:
+    """Distinct integer ids, in order; ids that cannot match a row are dropped."""
+    return list(dict.fromkeys(pk for pk in map(_parse_id, user_ids) if pk is not None))
+
+
+# Column projection of StoredUser: users LEFT JOIN profiles, no ORM entities
+_USER_ROWS = (
+    select(
+        User.id,
+        User.email,
+        User.username,
+        User.password,
+        User.role,
+        Profile.first_name,
+        Profile.last_name,
+    )
+    .outerjoin(Profile, Profile.user_id == User.id)
+    .where(_LIVE)
+)
+
+
+# Email/username predicates compare lower(column) to an already lowered value,
+# matching the ux_users_*_lower expression indexes
+_EMAIL_MATCHES = func.lower(User.email) == bindparam("email")
+_USERNAME_MATCHES = func.lower(User.username) == bindparam("username")
+
+# Prebuilt statements: execute with {"pk": ...}, {"email": ...}, {"username": ...}
+_ENTITY_BY_ID = (
+    select(User).options(joinedload(User.profile)).where(_LIVE, User.id == bindparam("pk"))
+)
+_ALL_ROWS = _USER_ROWS
+_ROW_BY_ID = _USER_ROWS.where(User.id == bindparam("pk"))
+_ROW_BY_EMAIL = _USER_ROWS.where(_EMAIL_MATCHES)
+_ROW_BY_USERNAME = _USER_ROWS.where(_USERNAME_MATCHES)
+_EXISTS = select(User.id).where(or_(_EMAIL_MATCHES, _USERNAME_MATCHES), _LIVE).limit(1)
+
+
+def _lookup(email: str | None = None, username: str | None = None) -> dict[str, str]:
+    """Bound parameters for the email/username predicates."""
+    params: dict[str, str] = {}
+    if email is not None:
+        params["email"] = normalize_email(email)
+    if username is not None:
+        params["username"] = lookup_key(username)
+    return params
+
+
+# ---------------------------- Search -----------------------------------------
+
+_LIKE_ESCAPE = "\\"
+
+
+def _search_statement(fuzzy: bool) -> Executable:
+    """
+    Ranked, paginated search over email, username and profile names.
+
+    Candidate ids are the UNION of an email, a username and a profiles
+    branch, so each is served by its own indexes instead of an OR across a
+    join (SQLite will not combine an OR over the partial users indexes).
+    With ``fuzzy`` (PostgreSQL + pg_trgm) a field matches when it contains
+    the query or is trigram-similar to it (``%``), both backed by the GIN
+    indexes, and the best similarity refines the rank. Other databases
+    match prefixes only, as ranges over the lower() B-tree indexes.
+    """
+    query: Any = bindparam("q")
+    email, username = func.lower(User.email), func.lower(User.username)
+    first_name, last_name = func.lower(Profile.first_name), func.lower(Profile.last_name)
+    fields = (email, username, first_name, last_name)
+
+    def matches(field: Any) -> Any:
+        if fuzzy:
+            return or_(field.like(bindparam("contains"), escape=_LIKE_ESCAPE), field.op("%")(query))
+        return and_(field >= query, field < bindparam("upper"))
+
+    candidates = union(
+        select(User.id.label("id")).where(matches(email), _LIVE),
+        select(User.id.label("id")).where(matches(username), _LIVE),
+        select(Profile.user_id.label("id")).where(or_(matches(first_name), matches(last_name))),
+    ).subquery()
+
+    rank: Any = case(
+        (or_(*(field == query for field in fields)), RANK_EXACT),
+        (
+            or_(*(field.like(bindparam("prefix"), escape=_LIKE_ESCAPE) for field in fields)),
+            RANK_PREFIX,
+        ),
+        else_=RANK_CONTAINS,
+    )
+    if fuzzy:
+        rank = rank + func.greatest(*(func.similarity(field, query) for field in fields))
+
+    return (
+        _USER_ROWS.where(User.id.in_(select(candidates.c.id)))
+        .order_by(rank.desc(), username, User.id)
+        .limit(bindparam("limit"))
+        .offset(bindparam("offset"))
+    )
+
+
+_SEARCH = {True: _search_statement(fuzzy=True), False: _search_statement(fuzzy=False)}
+
+
+def _search_params(query: str, limit: int, offset: int, fuzzy: bool) -> dict[str, Any]:
+    value = query.strip().lower()
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    params: dict[str, Any] = {"q": value, "prefix": f"{escaped}%", "limit": limit, "offset": offset}
+    if fuzzy:
+        params["contains"] = f"%{escaped}%"
+    else:
+        params["upper"] = value + "\U0010ffff"  # sorts after every string starting with value
+    return params
+
+
+# ---------------------------- Counters ---------------------------------------
+
+_counters = cast(Table, UserCounter.__table__)
+
+
+def _upsert(dialect_insert: Any) -> Insert:
+    stmt = dialect_insert(_counters)
+    return stmt.on_conflict_do_update(  # type: ignore[no-any-return]
+        index_elements=[_counters.c.kind, _counters.c.bucket],
+        set_={"count": _counters.c.count + stmt.excluded["count"]},
+    )
+
+
+# Atomic "add delta, create the row if missing" per dialect
+_COUNTER_UPSERT = {"postgresql": _upsert(postgresql.insert), "sqlite": _upsert(sqlite.insert)}
+_COUNTER_ADD = (
+    update(_counters)
+    .where(_counters.c.kind == bindparam("k"), _counters.c.bucket == bindparam("b"))
+    .values(count=_counters.c.count + bindparam("n"))
+)
+_COUNTER_INSERT = insert(_counters).values(
+    kind=bindparam("k"), bucket=bindparam("b"), count=bindparam("n")
+)
+_COUNTERS_SINCE = select(_counters.c.kind, _counters.c.bucket, _counters.c.count).where(
+    or_(
+        _counters.c.kind == ROLE,
+        and_(_counters.c.kind == SIGNUPS, _counters.c.bucket >= bindparam("since")),
+    )
+)
+
+
+def _signup_day(created_at: datetime | None) -> date:
+    """UTC day of a created_at value (None: created in this session, not loaded yet)."""
+    if created_at is None:
+        return utc_today()
+    if created_at.tzinfo is None:  # SQLite returns naive UTC timestamps
+        return created_at.date()
+    return created_at.astimezone(UTC).date()
+
+
+def _counter_deltas(session: Session) -> Counter[tuple[str, str]]:
+    """Counter changes implied by the pending User inserts, deletes and role updates."""
+    deltas: Counter[tuple[str, str]] = Counter()
+    for user in session.new:
+        if isinstance(user, User):
+            deltas[ROLE, UserRole(user.role).value] += 1
+            deltas[SIGNUPS, utc_today().isoformat()] += 1
+    for user in session.deleted:
+        if isinstance(user, User):
+            deltas[ROLE, UserRole(user.role).value] -= 1
+            created_at = inspect(user).dict.get("created_at")  # no load
+            deltas[SIGNUPS, _signup_day(created_at).isoformat()] -= 1
+    for user in session.dirty:
+        if isinstance(user, User):
+            history = inspect(user).attrs.role.history
+            for role in history.deleted or ():
+                deltas[ROLE, UserRole(role).value] -= 1
+            for role in history.added or ():
+                deltas[ROLE, UserRole(role).value] += 1
+    return deltas
+
+
+def apply_counter_deltas(conn: Connection, deltas: Counter[tuple[str, str]]) -> None:
+    """Add ``deltas`` to the counters (also used by bulk loads, e.g. scripts/seed_users.py)."""
+    # Sorted keys: concurrent writers lock counter rows in the same order (no deadlock)
+    rows = [{"k": k, "b": b, "n": n} for (k, b), n in sorted(deltas.items()) if n]
+    if not rows:
+        return
+    upsert = _COUNTER_UPSERT.get(conn.dialect.name)
+    if upsert is not None:
+        conn.execute(upsert, [{"kind": r["k"], "bucket": r["b"], "count": r["n"]} for r in rows])
+        return
+    for row in rows:
+        if conn.execute(_COUNTER_ADD, row).rowcount == 0:
+            conn.execute(_COUNTER_INSERT, row)
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_user_counters(session: Session, _flush_context: UOWTransaction) -> None:
+    """Apply counter deltas in the flushing transaction (session lists are still pre-flush)."""
+    deltas = _counter_deltas(session)
+    if deltas:
+        apply_counter_deltas(session.connection(), deltas)
+
+
+def _removal_deltas(role: UserRole, created_at: datetime | None) -> Counter[tuple[str, str]]:
+    """Counter changes of a soft delete (Core UPDATE: the flush hook does not see it)."""
+    return Counter(
+        {(ROLE, UserRole(role).value): -1, (SIGNUPS, _signup_day(created_at).isoformat()): -1}
+    )
+
+
+def _to_stats(rows: Any) -> UserStats:
+    by_role: dict[str, int] = {}
+    signups: dict[date, int] = {}
+    for kind, bucket, count in rows:
+        if kind == ROLE:
+            by_role[bucket] = count
+        elif count:
+            signups[date.fromisoformat(bucket)] = count
+    return UserStats(by_role=by_role, signups=signups)
+
+
+# ---------------------------- Soft delete and purge --------------------------
+
+# One statement per account deletion; RETURNING gives what the counters need
+_SOFT_DELETE = (
+    update(_users)
+    .where(_users.c.id == bindparam("pk"), _users.c.deleted_at.is_(None))
+    .values(deleted_at=func.now(), version=_users.c.version + 1)  # pylint: disable=not-callable
+    .returning(_users.c.role, _users.c.created_at)
+)
+# Purge batch: oldest ids first, served by the partial ix_users_deleted_at index.
+# Every worker process runs a purger: on PostgreSQL each one locks its batch
+# and skips rows another purger holds, so concurrent passes never pick the
+# same users nor deadlock on the deletes (SQLite ignores FOR UPDATE; its
+# writers are serialized anyway)
+_PURGEABLE_IDS = (
+    select(_users.c.id)
+    .where(_users.c.deleted_at.is_not(None), _users.c.deleted_at <= bindparam("cutoff"))
+    .order_by(_users.c.deleted_at, _users.c.id)
+    .limit(bindparam("limit"))
+    .with_for_update(skip_locked=True)
+)
+_PURGE_PROFILES = delete(_profiles).where(_profiles.c.user_id.in_(bindparam("ids", expanding=True)))
+_PURGE_USERS = delete(_users).where(
+    _users.c.id.in_(bindparam("ids", expanding=True)), _users.c.deleted_at.is_not(None)
+)
+
+
+def purge_deleted_users(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """
+    Hard-delete one batch of users soft-deleted at or before ``cutoff``.
+
+    The batch is locked (rows held by a concurrent purger are skipped), then
+    profiles go first (foreign key), then the users, by primary key. The
+    caller commits; keeping batches small keeps each transaction's locks
+    short. Counters are untouched: soft deletion already removed the user
+    from them. Returns the number of users purged.
+    """
+    conn = db.connection()
+    ids: list[int] = list(
+        conn.execute(_PURGEABLE_IDS, {"cutoff": cutoff, "limit": batch_size}).scalars()
+    )
+    if not ids:
+        return 0
+    conn.execute(_PURGE_PROFILES, {"ids": ids})
+    return conn.execute(_PURGE_USERS, {"ids": ids}).rowcount
+
+
+# ---------------------------- Batch operations -------------------------------
+
+# Set-based admin operations: a couple of statements for the whole id list,
+# executed with {"ids": [...]} (expanding IN), in one transaction
+_ROLES_BY_IDS = (
+    select(_users.c.id, _users.c.role)
+    .where(_users.c.id.in_(bindparam("ids", expanding=True)), _users.c.deleted_at.is_(None))
+    .with_for_update()
+)
+_SET_ROLE = (
+    update(_users)
+    .where(_users.c.id.in_(bindparam("ids", expanding=True)))
+    .values(role=bindparam("new_role"), version=_users.c.version + 1)
+)
+_SOFT_DELETE_MANY = (
+    update(_users)
+    .where(_users.c.id.in_(bindparam("ids", expanding=True)), _users.c.deleted_at.is_(None))
+    .values(deleted_at=func.now(), version=_users.c.version + 1)  # pylint: disable=not-callable
+    .returning(_users.c.id, _users.c.role, _users.c.created_at)
+)
+
+
+def _role_changes(rows: Any, role: Role) -> tuple[dict[str, Role], list[int]]:
+    """Previous role per found id, and the ids whose role actually changes."""
+    previous: dict[str, Role] = {}
+    changed: list[int] = []
+    for pk, current in rows:
+        previous[str(pk)] = UserRole(current).value
+        if previous[str(pk)] != role:
+            changed.append(pk)
+    return previous, changed
+
+
+def _role_change_deltas(previous: dict[str, Role], role: Role) -> Counter[tuple[str, str]]:
+    deltas: Counter[tuple[str, str]] = Counter()
+    for old in previous.values():
+        if old != role:
+            deltas[ROLE, old] -= 1
+            deltas[ROLE, role] += 1
+    return deltas
+
+
+def _deleted_many(rows: Any) -> tuple[set[str], Counter[tuple[str, str]]]:
+    """Ids soft-deleted by _SOFT_DELETE_MANY and the counter deltas they imply."""
+    deleted: set[str] = set()
+    deltas: Counter[tuple[str, str]] = Counter()
+    for pk, role, created_at in rows:
+        deleted.add(str(pk))
+        deltas.update(_removal_deltas(role, created_at))
+    return deleted, deltas
+
+
+# ---------------------------- Mapping helpers --------------------------------
+
+
+def to_stored(user: User) -> StoredUser:
+    """Map an ORM user (profile eagerly loaded) to a StoredUser."""
+    profile = user.profile
+    return StoredUser(
+        id=str(user.id),
+        email=user.email,
+        username=user.username,
+        password_hash=user.password,
+        role=user.role.value,
+        first_name=profile.first_name if profile else None,
+        last_name=profile.last_name if profile else None,
+    )
+
+
+def _row_to_stored(row: Sequence[Any]) -> StoredUser:
+    """Map a _USER_ROWS row to a StoredUser (positional: cheaper than by name)."""
+    user_id, email, username, password_hash, role, first_name, last_name = row
+    return StoredUser(
+        str(user_id), email, username, password_hash, role.value, first_name, last_name
+    )
+
+
+def _new_user(  # pylint: disable=too-many-arguments
+    *,
+    email: str,
+    username: str,
+    password_hash: str,
+    role: Role,
+    first_name: str | None,
+    last_name: str | None,
+) -> User:
+    user = User(
+        email=normalize_email(email),
+        username=username,
+        password=password_hash,
+        role=UserRole(role),
+    )
+    # Assign the relationship either way so reading it never triggers a lazy load
+    user.profile = (
+        Profile(first_name=first_name, last_name=last_name) if first_name or last_name else None
+    )
+    return user
+
+
+def _apply_changes(user: User, changes: UserChanges) -> None:
+    if "email" in changes:
+        user.email = normalize_email(changes["email"])
+    if "username" in changes:
+        user.username = changes["username"]
+    if "password_hash" in changes:
+        user.password = changes["password_hash"]
+    if "role" in changes:
+        user.role = UserRole(changes["role"])
+
+    profile_data = {k: v for k, v in changes.items() if k in _PROFILE_FIELDS}
+    if profile_data:
+        if user.profile is None:
+            user.profile = Profile()
+        for field, value in profile_data.items():
+            setattr(user.profile, field, value)
+
+    # Increment version for optimistic locking
+    user.version = (user.version or 1) + 1
+
+
+# ---------------------------- Repositories -----------------------------------
+
+
+def warm_up_statements(db: Session) -> int:
+    """
+    Run the hot lookups once with keys matching no row, so their compiled
+    form and result mapping are cached on the engine before real traffic.
+    """
+    repo = SqlUserRepository(db)
+    repo.get("0")  # by id: token resolution, GET /users/{id}
+    repo.get_by_email("warm-up@invalid")  # login
+    repo.get_by_username("warm-up")
+    repo.exists("warm-up@invalid", "warm-up")  # register
+    db.execute(_ENTITY_BY_ID, {"pk": 0}).first()  # ORM load behind updates
+    return 5
+
+
+class SqlUserRepository:
+    """User repository over a synchronous SQLAlchemy session."""
+
+    def __init__(self, db: Session) -> None:
+        self.db = db
+
+    def _one(self, stmt: Executable, params: dict[str, Any]) -> StoredUser | None:
+        row = self.db.connection().execute(stmt, params).first()
+        return _row_to_stored(row) if row else None
+
+    def _load(self, user_id: str) -> User | None:
+        """ORM entity (profile joined) for writes."""
+        pk = _parse_id(user_id)
+        if pk is None:
+            return None
+        return self.db.execute(_ENTITY_BY_ID, {"pk": pk}).scalar_one_or_none()
+
+    def _commit(self, user: User) -> StoredUser:
+        """Flush, snapshot the row (avoids a post-commit refresh) and commit."""
+        try:
+            self.db.flush()
+            stored = to_stored(user)
+            self.db.commit()
+        except IntegrityError as exc:
+            self.db.rollback()
+            raise DuplicateUserError(str(exc.orig)) from exc
+        return stored
+
+    def get(self, user_id: str) -> StoredUser | None:
+        pk = _parse_id(user_id)
+        return self._one(_ROW_BY_ID, {"pk": pk}) if pk is not None else None
+
+    def get_by_email(self, email: str) -> StoredUser | None:
+        return self._one(_ROW_BY_EMAIL, _lookup(email=email))
+
+    def get_by_username(self, username: str) -> StoredUser | None:
+        return self._one(_ROW_BY_USERNAME, _lookup(username=username))
+
+    def exists(self, email: str, username: str) -> bool:
+        return self.db.execute(_EXISTS, _lookup(email, username)).first() is not None
+
+    def list_all(self) -> list[StoredUser]:
+        return [_row_to_stored(row) for row in self.db.connection().execute(_ALL_ROWS)]
+
+    def stats(self, since: date) -> UserStats:
+        rows = self.db.connection().execute(_COUNTERS_SINCE, {"since": since.isoformat()})
+        return _to_stats(rows)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> list[StoredUser]:
+        conn = self.db.connection()
+        fuzzy = conn.dialect.name == "postgresql"
+        rows = conn.execute(_SEARCH[fuzzy], _search_params(query, limit, offset, fuzzy))
+        return [_row_to_stored(row) for row in rows]
+
+    def create(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        email: str,
+        username: str,
+        password_hash: str,
+        role: Role = "user",
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> StoredUser:
+        user = _new_user(
+            email=email,
+            username=username,
+            password_hash=password_hash,
+            role=role,
+            first_name=first_name,
+            last_name=last_name,
+        )
+        self.db.add(user)
+        return self._commit(user)
+
+    def update(self, user_id: str, changes: UserChanges) -> StoredUser | None:
+        user = self._load(user_id)
+        if user is None:
+            return None
+        _apply_changes(user, changes)
+        return self._commit(user)
+
+    def delete(self, user_id: str) -> bool:
+        pk = _parse_id(user_id)
+        if pk is None:
+            return False
+        conn = self.db.connection()
+        row = conn.execute(_SOFT_DELETE, {"pk": pk}).mappings().first()
+        if row is None:
+            return False
+        apply_counter_deltas(conn, _removal_deltas(row["role"], row["created_at"]))
+        self.db.commit()
+        return True
+
+    def set_roles(self, user_ids: Sequence[str], role: Role) -> dict[str, Role]:
+        ids = _parse_ids(user_ids)
+        if not ids:
+            return {}
+        conn = self.db.connection()
+        previous, changed = _role_changes(conn.execute(_ROLES_BY_IDS, {"ids": ids}), role)
+        if changed:
+            conn.execute(_SET_ROLE, {"ids": changed, "new_role": UserRole(role)})
+            apply_counter_deltas(conn, _role_change_deltas(previous, role))
+        self.db.commit()
+        return previous
+
+    def delete_many(self, user_ids: Sequence[str]) -> set[str]:
+        ids = _parse_ids(user_ids)
+        if not ids:
+            return set()
+        conn = self.db.connection()
+        deleted, deltas = _deleted_many(conn.execute(_SOFT_DELETE_MANY, {"ids": ids}))
+        apply_counter_deltas(conn, deltas)
+        self.db.commit()
+        return deleted
+
+
+class AsyncSqlUserRepository:
+    """User repository over an asynchronous SQLAlchemy session."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def _one(self, stmt: Executable, params: dict[str, Any]) -> StoredUser | None:
+        conn = await self.db.connection()
+        row = (await conn.execute(stmt, params)).first()
+        return _row_to_stored(row) if row else None
+
+    async def _load(self, user_id: str) -> User | None:
+        """ORM entity (profile joined) for writes."""
+        pk = _parse_id(user_id)
+        if pk is None:
+            return None
+        return (await self.db.execute(_ENTITY_BY_ID, {"pk": pk})).scalar_one_or_none()
+
+    async def _commit(self, user: User) -> StoredUser:
+        """Flush, snapshot the row (avoids a post-commit refresh) and commit."""
+        try:
+            await self.db.flush()
+            stored = to_stored(user)
+            await self.db.commit()
+        except IntegrityError as exc:
+            await self.db.rollback()
+            raise DuplicateUserError(str(exc.orig)) from exc
+        return stored
+
+    async def get(self, user_id: str) -> StoredUser | None:
+        pk = _parse_id(user_id)
+        return await self._one(_ROW_BY_ID, {"pk": pk}) if pk is not None else None
+
+    async def get_by_email(self, email: str) -> StoredUser | None:
+        return await self._one(_ROW_BY_EMAIL, _lookup(email=email))
+
+    async def get_by_username(self, username: str) -> StoredUser | None:
+        return await self._one(_ROW_BY_USERNAME, _lookup(username=username))
+
+    async def exists(self, email: str, username: str) -> bool:
+        result = await self.db.execute(_EXISTS, _lookup(email, username))
+        return result.first() is not None
+
+    async def list_all(self) -> list[StoredUser]:
+        conn = await self.db.connection()
+        return [_row_to_stored(row) for row in await conn.execute(_ALL_ROWS)]
+
+    async def stats(self, since: date) -> UserStats:
+        conn = await self.db.connection()
+        return _to_stats(await conn.execute(_COUNTERS_SINCE, {"since": since.isoformat()}))
+
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> list[StoredUser]:
+        conn = await self.db.connection()
+        fuzzy = conn.dialect.name == "postgresql"
+        rows = await conn.execute(_SEARCH[fuzzy], _search_params(query, limit, offset, fuzzy))
+        return [_row_to_stored(row) for row in rows]
+
+    async def create(  # pylint: disable=too-many-arguments
+        self,
+        *,
+        email: str,
+        username: str,
+        password_hash: str,
+        role: Role = "user",
+        first_name: str | None = None,
+        last_name: str | None = None,
+    ) -> StoredUser:
+        user = _new_user(
+            email=email,
+            username=username,
+            password_hash=password_hash,
+            role=role,
+            first_name=first_name,
+            last_name=last_name,
+        )
+        self.db.add(user)
+        return await self._commit(user)
+
+    async def update(self, user_id: str, changes: UserChanges) -> StoredUser | None:
+        user = await self._load(user_id)
+        if user is None:
+            return None
+        _apply_changes(user, changes)
+        return await self._commit(user)
+
+    async def delete(self, user_id: str) -> bool:
+        pk = _parse_id(user_id)
+        if pk is None:
+            return False
+        conn = await self.db.connection()
+        row = (await conn.execute(_SOFT_DELETE, {"pk": pk})).mappings().first()
+        if row is None:
+            return False
+        deltas = _removal_deltas(row["role"], row["created_at"])
+        await conn.run_sync(apply_counter_deltas, deltas)
+        await self.db.commit()
+        return True
+
+    async def set_roles(self, user_ids: Sequence[str], role: Role) -> dict[str, Role]:
+        ids = _parse_ids(user_ids)
+        if not ids:
+            return {}
+        conn = await self.db.connection()
+        rows = await conn.execute(_ROLES_BY_IDS, {"ids": ids})
+        previous, changed = _role_changes(rows, role)
+        if changed:
+            await conn.execute(_SET_ROLE, {"ids": changed, "new_role": UserRole(role)})
+            await conn.run_sync(apply_counter_deltas, _role_change_deltas(previous, role))
+        await self.db.commit()
+        return previous
+
+    async def delete_many(self, user_ids: Sequence[str]) -> set[str]:
+        ids = _parse_ids(user_ids)
+        if not ids:
+            return set()
+        conn = await self.db.connection()
+        deleted, deltas = _deleted_many(await conn.execute(_SOFT_DELETE_MANY, {"ids": ids}))
+        await conn.run_sync(apply_counter_deltas, deltas)
+        await self.db.commit()
+        return deleted
@@ -0,0 +1,69 @@
+"""
+Pydantic schemas for the admin batch endpoints (users:batchUpdate / users:batchDelete).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Annotated, Literal
+
+from pydantic import AfterValidator, BaseModel, Field, TypeAdapter
+
+from app.repositories import normalize_user_id
+from app.schemas.user import UserRole
+
+# Ids accepted per batch request; every batch runs as one transaction
+MAX_BATCH_IDS = 10_000
+
+
+def _distinct(ids: list[str]) -> list[str]:
+    return list(dict.fromkeys(ids))
+
+
+# Ids in canonical form ("007" and " 7" are user "7"), duplicates dropped: the
+# request and its outcomes are keyed like the repositories key their results
+BatchIds = Annotated[
+    list[Annotated[str, AfterValidator(normalize_user_id)]],
+    Field(min_length=1, max_length=MAX_BATCH_IDS),
+    AfterValidator(_distinct),
+]
+BatchStatus = Literal["updated", "unchanged", "deleted", "not_found"]
+
+
+class UserBatchUpdate(BaseModel):
+    """Role change applied to every listed user."""
+
+    ids: BatchIds
+    role: UserRole
+
+
+class UserBatchDelete(BaseModel):
+    """Users to delete."""
+
+    ids: BatchIds
+
+
+class BatchOutcome(BaseModel):
+    """What happened to one requested id."""
+
+    id: str
+    status: BatchStatus
+
+
+class BatchResultOut(BaseModel):
+    """Per-id outcomes, in request order (canonical ids, duplicates reported once), and totals."""
+
+    results: list[BatchOutcome]
+    counts: dict[str, int]
+
+    @classmethod
+    def from_statuses(cls, statuses: dict[str, BatchStatus]) -> BatchResultOut:
+        """Build the response from the status of each distinct id."""
+        return cls.model_construct(
+            results=[BatchOutcome.model_construct(id=i, status=s) for i, s in statuses.items()],
+            counts=dict(Counter(statuses.values())),
+        )
+
+
+# Pre-built JSON encoder (thousands of outcomes: skip FastAPI's response_model pass)
+batch_result_json = TypeAdapter(BatchResultOut).dump_json
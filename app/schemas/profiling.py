@@ -0,0 +1,47 @@
+"""
+Pydantic schemas for request profiles served by the debug endpoints.
+"""
+
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class SqlStatementOut(BaseModel):
+    """A SQL statement executed during the profiled request."""
+
+    statement: str
+    duration_ms: float
+    rows: int
+
+
+class CallNode(BaseModel):
+    """A function in the call tree (or hotspot list, without children)."""
+
+    function: str
+    calls: int
+    total_ms: float
+    self_ms: float
+    children: list[CallNode] = []
+
+
+class ProfileSummary(BaseModel):
+    """Headline numbers of a profiled request."""
+
+    id: str
+    method: str
+    path: str
+    trigger: str
+    status_code: int
+    started_at: float
+    duration_ms: float
+    sql_count: int
+    sql_ms: float
+
+
+class ProfileOut(ProfileSummary):
+    """Full profile: call tree, hotspots and SQL statements."""
+
+    call_tree: list[CallNode]
+    hotspots: list[CallNode]
+    sql: list[SqlStatementOut]
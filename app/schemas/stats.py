@@ -0,0 +1,40 @@
+"""
+Pydantic schemas for the admin user statistics endpoint.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from pydantic import BaseModel
+
+from app.repositories import UserStats
+
+ROLES = ("admin", "user")
+
+
+class DailySignups(BaseModel):
+    """Number of accounts created on one UTC day."""
+
+    date: date
+    count: int
+
+
+class UserStatsOut(BaseModel):
+    """User totals per role and signups per day over the requested window."""
+
+    total: int
+    by_role: dict[str, int]
+    signups_per_day: list[DailySignups]
+
+    @classmethod
+    def from_stats(cls, stats: UserStats, since: date, days: int) -> UserStatsOut:
+        """Every day of the window is listed, days without signups with 0."""
+        window = (since + timedelta(days=n) for n in range(days))
+        return cls(
+            total=stats.total,
+            by_role={role: stats.by_role.get(role, 0) for role in ROLES},
+            signups_per_day=[
+                DailySignups(date=day, count=stats.signups.get(day, 0)) for day in window
+            ],
+        )
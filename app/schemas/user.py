@@ -2,16 +2,20 @@
 Pydantic schemas for the User entity.
 All required fields are truly required for creation.
 Role defaults to 'user' if omitted.
+
+Output models built from stored rows (from_model / from_stored) skip
+validation with model_construct: the data was validated on the way in.
 """
 
 from __future__ import annotations
 
 from typing import TYPE_CHECKING, Annotated, Literal
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 
 if TYPE_CHECKING:
     from app.models.user import User
+    from app.repositories.base import StoredUser
 
 # Allowed roles for users
 UserRole = Literal["admin", "user"]
@@ -63,7 +67,7 @@ class UserOut(BaseModel):
     @classmethod
     def from_model(cls, user: User) -> UserOut:
         """Build a UserOut from a SQLAlchemy User model."""
-        return cls(
+        return cls.model_construct(
             id=str(user.id),
             email=user.email,
             username=user.username,
@@ -72,6 +76,18 @@ class UserOut(BaseModel):
             last_name=user.profile.last_name if user.profile else None,
         )
 
+    @classmethod
+    def from_stored(cls, user: StoredUser) -> UserOut:
+        """Build a UserOut from a repository StoredUser."""
+        return cls.model_construct(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            role=user.role,
+            first_name=user.first_name,
+            last_name=user.last_name,
+        )
+
 
 class RegisterOut(BaseModel):
     """Response model for registration (no role exposed)."""
@@ -85,10 +101,26 @@ class RegisterOut(BaseModel):
     @classmethod
     def from_model(cls, user: User) -> RegisterOut:
         """Build a RegisterOut from a SQLAlchemy User model."""
-        return cls(
+        return cls.model_construct(
             id=str(user.id),
             email=user.email,
             username=user.username,
             first_name=user.profile.first_name if user.profile else None,
             last_name=user.profile.last_name if user.profile else None,
         )
+
+    @classmethod
+    def from_stored(cls, user: StoredUser) -> RegisterOut:
+        """Build a RegisterOut from a repository StoredUser."""
+        return cls.model_construct(
+            id=user.id,
+            email=user.email,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+        )
+
+
+# Pre-built JSON encoders for responses that bypass FastAPI's response_model pass
+user_out_json = TypeAdapter(UserOut).dump_json
+user_list_json = TypeAdapter(list[UserOut]).dump_json
@@ -0,0 +1,325 @@
+"""
+Idempotency-Key store and its expiry worker.
+
+A key is claimed before its first request runs (a reservation row), then
+completed with the response, which every retry carrying the same key gets
+back without running the handler again (no bcrypt, no 409). Completed
+responses are also kept in an in-process LRU, so a retry storm hitting one
+worker is served from memory; the table makes replays work across workers
+and restarts. Without a session factory (json/memory backends) the
+in-process store is the only one.
+
+Reservations expire after ``lock_seconds`` (a worker died mid-request),
+responses after ``ttl`` seconds; the worker deletes expired rows in
+batches, off the request path. Each claim carries the claimant's token:
+once a late request's reservation has been taken over, its complete() or
+release() matches no row and leaves the new claimant's key alone.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import Table, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+_keys: Table = IdempotencyKey.__table__  # type: ignore[assignment]
+
+
+class KeyReuseError(Exception):
+    """Raised when a key comes back with a different request body."""
+
+
+class KeyInProgressError(Exception):
+    """Raised when the first request of a key is still running in another worker."""
+
+
+@dataclass(frozen=True, slots=True)
+class RecordedResponse:
+    """What a retry receives instead of running the handler."""
+
+    status_code: int
+    content_type: str | None
+    body: bytes
+    headers: tuple[tuple[str, str], ...] = ()  # other headers the endpoint set
+
+
+@dataclass(slots=True)
+class _Entry:
+    fingerprint: str
+    expires: float  # time.time()
+    response: RecordedResponse | None = None  # None while reserved
+    token: str | None = None  # claimant's token while reserved
+
+
+class IdempotencyStore:  # pylint: disable=too-many-instance-attributes
+    """Claims, completes and replays keys: in-process LRU in front of the table."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None,
+        *,
+        ttl: float = 86_400.0,
+        lock_seconds: float = 30.0,
+        cache_size: int = 10_000,
+    ) -> None:
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.cache_size = cache_size
+        self.stats = {
+            "claimed": 0,
+            "replayed": 0,
+            "in_progress": 0,
+            "mismatched": 0,
+            "superseded": 0,
+        }
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cached(self, key_hash: str, fingerprint: str) -> RecordedResponse | None:
+        """Completed response from memory, or None (no I/O: safe on the event loop)."""
+        with self._lock:
+            entry = self._cache.get(key_hash)
+            if entry is None or entry.response is None:
+                return None
+            if entry.expires <= time.time():
+                del self._cache[key_hash]
+                return None
+            self._cache.move_to_end(key_hash)
+            return self._replay(entry, fingerprint)
+
+    def claim(self, key_hash: str, fingerprint: str, token: str) -> RecordedResponse | None:
+        """
+        None if the caller now owns the key under ``token`` (unique per request)
+        and must run the request, else the recorded response. Raises
+        KeyReuseError / KeyInProgressError.
+        """
+        recorded = self.cached(key_hash, fingerprint)
+        if recorded is not None:
+            return recorded
+        if self.session_factory is None:
+            return self._claim_in_memory(key_hash, fingerprint, token)
+
+        now = datetime.now(UTC)
+        reserved = {
+            "fingerprint": fingerprint,
+            "claim_token": token,
+            "expires_at": now + self._lock_delta,
+        }
+        with self.session_factory() as db:
+            try:
+                db.execute(insert(_keys).values(key_hash=key_hash, **reserved))
+                db.commit()
+                self._count("claimed")
+                return None
+            except IntegrityError:
+                db.rollback()
+            # Expired response or abandoned reservation: take it over
+            taken = db.connection().execute(
+                update(_keys)
+                .where(_keys.c.key_hash == key_hash, _keys.c.expires_at <= now)
+                .values(status_code=None, content_type=None, body=None, headers=None, **reserved)
+            )
+            db.commit()
+            if taken.rowcount:
+                self._count("claimed")
+                return None
+            row = db.execute(select(_keys).where(_keys.c.key_hash == key_hash)).one_or_none()
+        if row is None or row.status_code is None:  # reserved (or expired meanwhile)
+            self._count("in_progress")
+            raise KeyInProgressError(key_hash)
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:  # SQLite returns naive UTC timestamps
+            expires_at = expires_at.replace(tzinfo=UTC)
+        entry = _Entry(
+            row.fingerprint,
+            expires_at.timestamp(),
+            RecordedResponse(
+                row.status_code,
+                row.content_type,
+                row.body,
+                tuple((name, value) for name, value in row.headers or ()),
+            ),
+        )
+        with self._lock:
+            self._remember(key_hash, entry)
+            return self._replay(entry, fingerprint)
+
+    def complete(
+        self, key_hash: str, fingerprint: str, response: RecordedResponse, token: str
+    ) -> bool:
+        """
+        Record the response of a key claimed under ``token`` for the retries to
+        come. False if the reservation was taken over meanwhile: nothing recorded.
+        """
+        expires = datetime.now(UTC) + timedelta(seconds=self.ttl)
+        if self.session_factory is None:
+            with self._lock:
+                entry = self._cache.get(key_hash)
+                if entry is None or entry.response is not None or entry.token != token:
+                    self.stats["superseded"] += 1
+                    return False
+                self._remember(key_hash, _Entry(fingerprint, expires.timestamp(), response))
+                return True
+
+        with self.session_factory() as db:
+            completed = db.connection().execute(
+                update(_keys)
+                .where(
+                    _keys.c.key_hash == key_hash,
+                    _keys.c.claim_token == token,
+                    _keys.c.status_code.is_(None),
+                )
+                .values(
+                    status_code=response.status_code,
+                    content_type=response.content_type,
+                    body=response.body,
+                    headers=[list(header) for header in response.headers] or None,
+                    claim_token=None,
+                    expires_at=expires,
+                )
+            )
+            db.commit()
+        if not completed.rowcount:
+            self._count("superseded")
+            return False
+        with self._lock:
+            self._remember(key_hash, _Entry(fingerprint, expires.timestamp(), response))
+        return True
+
+    def release(self, key_hash: str, token: str) -> None:
+        """Drop the reservation of a request that failed: a retry runs it again."""
+        with self._lock:
+            entry = self._cache.get(key_hash)
+            if entry is not None and entry.response is None and entry.token == token:
+                del self._cache[key_hash]
+        if self.session_factory is not None:
+            with self.session_factory() as db:
+                db.execute(
+                    delete(_keys).where(
+                        _keys.c.key_hash == key_hash,
+                        _keys.c.claim_token == token,
+                        _keys.c.status_code.is_(None),
+                    )
+                )
+                db.commit()
+
+    def purge_expired(self, batch_size: int = 1_000) -> int:
+        """Delete expired keys, one committed batch at a time; returns the row count."""
+        now = time.time()
+        with self._lock:
+            stale = [key_hash for key_hash, entry in self._cache.items() if entry.expires <= now]
+            for key_hash in stale:
+                del self._cache[key_hash]
+        if self.session_factory is None:
+            return len(stale)
+        cutoff = datetime.fromtimestamp(now, UTC)
+        expired = (
+            select(_keys.c.key_hash)
+            .where(_keys.c.expires_at <= cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        batch = delete(_keys).where(_keys.c.key_hash.in_(expired))
+        total = 0
+        while True:
+            with self.session_factory() as db:
+                deleted = db.connection().execute(batch).rowcount
+                db.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    @property
+    def _lock_delta(self) -> timedelta:
+        return timedelta(seconds=self.lock_seconds)
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def _claim_in_memory(
+        self, key_hash: str, fingerprint: str, token: str
+    ) -> RecordedResponse | None:
+        with self._lock:
+            entry = self._cache.get(key_hash)
+            if entry is not None and entry.expires > time.time():
+                if entry.response is None:
+                    self.stats["in_progress"] += 1
+                    raise KeyInProgressError(key_hash)
+                return self._replay(entry, fingerprint)
+            self._remember(
+                key_hash, _Entry(fingerprint, time.time() + self.lock_seconds, token=token)
+            )
+            self.stats["claimed"] += 1
+            return None
+
+    def _remember(self, key_hash: str, entry: _Entry) -> None:
+        """Insert or refresh an entry, evicting the least recently used (lock held)."""
+        self._cache[key_hash] = entry
+        self._cache.move_to_end(key_hash)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _replay(self, entry: _Entry, fingerprint: str) -> RecordedResponse:
+        """The recorded response if the body matches (lock held)."""
+        if entry.fingerprint != fingerprint:
+            self.stats["mismatched"] += 1
+            raise KeyReuseError(fingerprint)
+        assert entry.response is not None
+        self.stats["replayed"] += 1
+        return entry.response
+
+
+class IdempotencyExpiryWorker:
+    """Deletes expired idempotency keys every ``interval`` seconds from a daemon thread."""
+
+    def __init__(
+        self, store: IdempotencyStore, *, interval: float = 300.0, batch_size: int = 1_000
+    ) -> None:
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self.expired = 0
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="idempotency-expiry", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the worker to stop after its current run and wait for it."""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def run_once(self) -> int:
+        expired = self.store.purge_expired(self.batch_size)
+        if expired:
+            self.expired += expired
+            logger.info("Deleted %d expired idempotency keys", expired)
+        return expired
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except SQLAlchemyError:
+                logger.exception("Idempotency key expiry failed, retrying in %.0fs", self.interval)
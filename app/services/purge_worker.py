@@ -0,0 +1,81 @@
+"""
+Background purge of soft-deleted users.
+
+Account deletion only sets ``deleted_at`` (one UPDATE in the request); the
+rows are hard-deleted here, off the request path, in small batches that
+each commit on their own, with a pause in between so a large cleanup
+never holds long locks or starves the request traffic.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.repositories.sql import purge_deleted_users
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeWorker:  # pylint: disable=too-many-instance-attributes
+    """Hard-deletes soft-deleted users every ``interval`` seconds from a daemon thread."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        interval: float = 60.0,
+        batch_size: int = 500,
+        grace: float = 0.0,
+        pause: float = 0.1,
+    ) -> None:
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.grace = grace  # Seconds a deleted row is kept before being purged
+        self.pause = pause  # Between two batches of the same run
+        self.purged = 0
+        self._stop = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, name="user-purge", daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ask the worker to stop after its current batch and wait for it."""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def run_once(self) -> int:
+        """Purge every eligible row, one committed batch at a time; returns the count."""
+        cutoff = datetime.now(UTC) - timedelta(seconds=self.grace)
+        total = 0
+        while True:
+            with self.session_factory() as db:
+                purged = purge_deleted_users(db, cutoff, self.batch_size)
+                db.commit()
+            total += purged
+            if purged < self.batch_size or self._stop.wait(self.pause):
+                break
+        if total:
+            self.purged += total
+            logger.info("Purged %d deleted users", total)
+        return total
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except SQLAlchemyError:
+                logger.exception("User purge failed, retrying in %.0fs", self.interval)
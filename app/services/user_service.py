@@ -1,15 +1,33 @@
 """
-User service handling CRUD operations on a JSON file (mock repository).
+User service handling CRUD operations on a local JSON store (mock repository).
 All read operations return Pydantic models (UserOut).
+
+Storage layout (offline/dev backend):
+- ``users.json``: compacted snapshot, a JSON array of records.
+- ``users.log``: append-only write log, one JSON operation per line.
+- ``users.lock``: advisory lock file shared by every worker process.
+
+Records are loaded once into in-memory id/email/username indexes and only
+re-read when the snapshot or log changes on disk (mtime/size signature).
+Writes append a single line to the log; the log is folded back into the
+snapshot once it grows past ``COMPACT_THRESHOLD`` operations.
 """
 
 from __future__ import annotations
 
+import contextlib
 import json
+import threading
 import uuid
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, TypedDict, cast
 
+try:  # POSIX advisory locks; other platforms fall back to in-process locking only
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
 if TYPE_CHECKING:
     # Only for typing; avoid top-level import cycles at runtime
     from app.schemas.user import UserCreate, UserOut, UserRole, UserUpdate
@@ -31,39 +49,316 @@ class UserRecordOptional(UserRecord, total=False):
 
     first_name: str
     last_name: str
+    created_at: str  # ISO date (UTC) of the signup, missing on older records
 
 
 # Path to the JSON data file (app/data/users.json)
 DATA_PATH: Path = Path(__file__).resolve().parents[1] / "data" / "users.json"
 
+# Number of logged operations after which the log is folded into the snapshot
+COMPACT_THRESHOLD: int = 1000
+
+# File signature used to detect changes made by other processes: (mtime_ns, size)
+_Signature = tuple[int, int]
+
+
+def _signature(path: Path) -> _Signature:
+    """Return the (mtime_ns, size) signature of a file, (0, 0) if missing."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
 
-# ---------------------------- IO helpers -------------------------------------
+# ---------------------------- Store ------------------------------------------
 
 
-def _load_data() -> list[UserRecordOptional]:
+class JsonUserStore:  # pylint: disable=too-many-instance-attributes
     """
-    Load user data from the JSON file.
+    Indexed, append-only JSON store (email/username indexes ignore case).
 
-    Returns:
-        A list of UserRecord objects (empty list if file missing/empty).
+    Thread-safe within a process (RLock) and across worker processes
+    (``flock`` on a sidecar lock file). Reads are served from memory and
+    only touch the filesystem to ``stat`` the snapshot and log.
     """
-    if not DATA_PATH.exists():
-        return []
-    text = DATA_PATH.read_text(encoding="utf-8").strip()
-    if not text:
-        return []
-    data: Any = json.loads(text)
-    if not isinstance(data, list):
-        raise RuntimeError(f"{DATA_PATH} must contain a JSON array")
-    return cast(list[UserRecordOptional], data)
 
+    def __init__(self, path: Path, compact_threshold: int = COMPACT_THRESHOLD) -> None:
+        self.path = path
+        self.log_path = path.with_suffix(".log")
+        self.lock_path = path.with_suffix(".lock")
+        self.compact_threshold = compact_threshold
+
+        self._mutex = threading.RLock()
+        self._by_id: dict[str, UserRecordOptional] = {}
+        self._by_email: dict[str, dict[str, None]] = {}
+        self._by_username: dict[str, dict[str, None]] = {}
+
+        self._snapshot_sig: _Signature | None = None
+        self._log_sig: _Signature | None = None
+        self._log_offset = 0
+        self._log_ops = 0
+
+    # ---- locking ----
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Hold the in-process mutex and the cross-process file lock."""
+        with self._mutex:
+            if fcntl is None:
+                yield
+                return
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, "a+b") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    # ---- index maintenance ----
+
+    def _index_add(self, record: UserRecordOptional) -> None:
+        self._by_id[record["id"]] = record
+        self._by_email.setdefault(record["email"].lower(), {})[record["id"]] = None
+        self._by_username.setdefault(record["username"].lower(), {})[record["id"]] = None
+
+    def _index_remove(self, user_id: str) -> UserRecordOptional | None:
+        record = self._by_id.pop(user_id, None)
+        if record is None:
+            return None
+        for index, key in (
+            (self._by_email, record["email"].lower()),
+            (self._by_username, record["username"].lower()),
+        ):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(user_id, None)
+                if not ids:
+                    del index[key]
+        return record
+
+    def _apply(self, op: dict[str, Any]) -> None:
+        """Apply one log operation to the in-memory indexes."""
+        if op.get("op") == "put":
+            record = cast(UserRecordOptional, op["record"])
+            old = self._by_id.get(record["id"])
+            if old is not None and (
+                old["email"] != record["email"] or old["username"] != record["username"]
+            ):
+                self._index_remove(record["id"])
+            self._index_add(record)
+        elif op.get("op") == "del":
+            self._index_remove(str(op["id"]))
+        self._log_ops += 1
+
+    # ---- loading ----
+
+    def _read_snapshot(self) -> list[UserRecordOptional]:
+        if not self.path.exists():
+            return []
+        text = self.path.read_text(encoding="utf-8").strip()
+        if not text:
+            return []
+        data: Any = json.loads(text)
+        if not isinstance(data, list):
+            raise RuntimeError(f"{self.path} must contain a JSON array")
+        return cast(list[UserRecordOptional], data)
+
+    def _replay_log(self) -> None:
+        """Apply log operations written since the last known offset."""
+        if not self.log_path.exists():
+            self._log_offset = 0
+            return
+        with open(self.log_path, "rb") as fh:
+            fh.seek(self._log_offset)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # partial line from a concurrent writer; pick it up next time
+                self._log_offset += len(line)
+                if line.strip():
+                    self._apply(json.loads(line))
+
+    def _full_reload(self) -> None:
+        self._by_id.clear()
+        self._by_email.clear()
+        self._by_username.clear()
+        for record in self._read_snapshot():
+            self._index_add(record)
+        self._log_offset = 0
+        self._log_ops = 0
+        self._replay_log()
+
+    def _refresh(self) -> None:
+        """Reload from disk if the snapshot or log changed since last seen."""
+        snapshot_sig = _signature(self.path)
+        log_sig = _signature(self.log_path)
+        if snapshot_sig == self._snapshot_sig and log_sig == self._log_sig:
+            return
+        if snapshot_sig == self._snapshot_sig and log_sig[1] >= self._log_offset:
+            # Only the log grew: replay the tail instead of re-parsing everything
+            self._replay_log()
+        else:
+            self._full_reload()
+        self._snapshot_sig = snapshot_sig
+        self._log_sig = _signature(self.log_path)
+
+    def _ensure_fresh(self) -> None:
+        if self._snapshot_sig == _signature(self.path) and self._log_sig == _signature(
+            self.log_path
+        ):
+            return
+        with self._locked(exclusive=False):
+            self._refresh()
+
+    # ---- writing ----
+
+    def _append(self, *ops: dict[str, Any]) -> None:
+        """Append operations to the log in one write and apply them (exclusive lock held)."""
+        if not ops:
+            return
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        data = b"".join((json.dumps(op, ensure_ascii=False) + "\n").encode("utf-8") for op in ops)
+        with open(self.log_path, "ab") as fh:
+            fh.write(data)
+        for op in ops:
+            self._apply(op)
+        self._log_offset += len(data)
+        self._log_sig = _signature(self.log_path)
+        if self._log_ops >= self.compact_threshold:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Fold the log into a fresh snapshot (exclusive lock held)."""
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(
+            json.dumps(list(self._by_id.values()), indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        tmp.replace(self.path)
+        self.log_path.unlink(missing_ok=True)
+        self._log_offset = 0
+        self._log_ops = 0
+        self._snapshot_sig = _signature(self.path)
+        self._log_sig = _signature(self.log_path)
+
+    def compact(self) -> None:
+        """Force a compaction of the write log into the snapshot."""
+        with self._locked(exclusive=True):
+            self._refresh()
+            self._compact()
+
+    # ---- public operations ----
+
+    def all(self) -> list[UserRecordOptional]:
+        self._ensure_fresh()
+        with self._mutex:
+            return list(self._by_id.values())
+
+    def get(self, user_id: str) -> UserRecordOptional | None:
+        self._ensure_fresh()
+        return self._by_id.get(user_id)
+
+    def _get_by(self, index: dict[str, dict[str, None]], key: str) -> UserRecordOptional | None:
+        self._ensure_fresh()
+        with self._mutex:
+            ids = index.get(key.lower())
+            return self._by_id[next(iter(ids))] if ids else None
+
+    def get_by_email(self, email: str) -> UserRecordOptional | None:
+        return self._get_by(self._by_email, email)
+
+    def get_by_username(self, username: str) -> UserRecordOptional | None:
+        return self._get_by(self._by_username, username)
+
+    def _conflicts(self, record: UserRecordOptional) -> bool:
+        """True if another record already holds this email or username."""
+        for index, key in (
+            (self._by_email, record["email"].lower()),
+            (self._by_username, record["username"].lower()),
+        ):
+            if any(other != record["id"] for other in index.get(key, ())):
+                return True
+        return False
 
-def _save_data(data: list[UserRecordOptional]) -> None:
-    """Persist the full users array atomically."""
-    DATA_PATH.parent.mkdir(parents=True, exist_ok=True)
-    tmp = DATA_PATH.with_suffix(".json.tmp")
-    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
-    tmp.replace(DATA_PATH)
+    def put(self, record: UserRecordOptional, unique: bool = False) -> bool:
+        """Insert or replace a record; with ``unique``, refuse email/username clashes."""
+        with self._locked(exclusive=True):
+            self._refresh()
+            if unique and self._conflicts(record):
+                return False
+            self._append({"op": "put", "record": record})
+            return True
+
+    def update(
+        self, user_id: str, changes: dict[str, Any], unique: bool = False
+    ) -> UserRecordOptional | None:
+        """
+        Merge ``changes`` into an existing record; None if the id is unknown.
+        With ``unique``, raises ValueError if the result clashes with another record.
+        """
+        with self._locked(exclusive=True):
+            self._refresh()
+            current = self._by_id.get(user_id)
+            if current is None:
+                return None
+            record = cast(UserRecordOptional, {**current, **changes})
+            if unique and self._conflicts(record):
+                raise ValueError("email or username already exists")
+            self._append({"op": "put", "record": record})
+            return record
+
+    def delete(self, user_id: str) -> bool:
+        with self._locked(exclusive=True):
+            self._refresh()
+            if user_id not in self._by_id:
+                return False
+            self._append({"op": "del", "id": user_id})
+            return True
+
+    def update_many(
+        self, user_ids: Iterable[str], changes: dict[str, Any]
+    ) -> dict[str, UserRecordOptional]:
+        """
+        Merge the same ``changes`` into every known record, in one log write.
+        Returns the previous record of each id found. No uniqueness checks:
+        meant for fields outside the email/username indexes.
+        """
+        with self._locked(exclusive=True):
+            self._refresh()
+            previous: dict[str, UserRecordOptional] = {}
+            for user_id in user_ids:
+                current = self._by_id.get(user_id)
+                if current is not None:
+                    previous.setdefault(user_id, current)
+            ops: list[dict[str, Any]] = []
+            for current in previous.values():
+                record = {**current, **changes}
+                if record != current:
+                    ops.append({"op": "put", "record": record})
+            self._append(*ops)
+            return previous
+
+    def delete_many(self, user_ids: Iterable[str]) -> set[str]:
+        """Delete every known id in one log write; returns the ids deleted."""
+        with self._locked(exclusive=True):
+            self._refresh()
+            deleted = {user_id for user_id in user_ids if user_id in self._by_id}
+            self._append(*({"op": "del", "id": user_id} for user_id in sorted(deleted)))
+            return deleted
+
+
+_stores: dict[Path, JsonUserStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store() -> JsonUserStore:
+    """Return the process-wide store bound to the current ``DATA_PATH``."""
+    path = DATA_PATH
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, JsonUserStore(path))
+    return store
 
 
 # ---------------------------- Mapping helpers --------------------------------
@@ -103,15 +398,25 @@ def _to_user_out(u: UserRecordOptional) -> UserOut:
 
 def list_users() -> list[UserOut]:
     """Return all users as Pydantic models."""
-    return [_to_user_out(u) for u in _load_data()]
+    return [_to_user_out(u) for u in get_store().all()]
 
 
 def get_user(user_id: str) -> UserOut | None:
     """Return a user by id or None if not found."""
-    for u in _load_data():
-        if u.get("id") == user_id:
-            return _to_user_out(u)
-    return None
+    u = get_store().get(user_id)
+    return _to_user_out(u) if u is not None else None
+
+
+def get_user_by_email(email: str) -> UserOut | None:
+    """Return a user by email or None if not found."""
+    u = get_store().get_by_email(email)
+    return _to_user_out(u) if u is not None else None
+
+
+def get_user_by_username(username: str) -> UserOut | None:
+    """Return a user by username or None if not found."""
+    u = get_store().get_by_username(username)
+    return _to_user_out(u) if u is not None else None
 
 
 # ---------------------------- Write ops --------------------------------------
@@ -119,10 +424,9 @@ def get_user(user_id: str) -> UserOut | None:
 
 def create_user(dto: UserCreate) -> UserOut:
     """
-    Create and persist a new user in the JSON file.
+    Create and persist a new user in the JSON store.
     Note: password is kept as-is for mock purposes only.
     """
-    items = _load_data()
     record: UserRecordOptional = {
         "id": f"u_{uuid.uuid4().hex[:8]}",
         "email": dto.email,
@@ -137,42 +441,18 @@ def create_user(dto: UserCreate) -> UserOut:
     if dto.last_name is not None:
         record["last_name"] = dto.last_name
 
-    items.append(record)
-    _save_data(items)
+    get_store().put(record)
     return _to_user_out(record)
 
 
 def update_user(user_id: str, dto: UserUpdate) -> UserOut | None:
     """Update an existing user, returns updated model or None if not found."""
-    items = _load_data()
-    for u in items:
-        if u.get("id") == user_id:
-            # Only update provided fields
-            if dto.email is not None:
-                u["email"] = dto.email
-            if dto.username is not None:
-                u["username"] = dto.username
-            if dto.password is not None:
-                u["password"] = dto.password
-            if dto.role is not None:
-                u["role"] = dto.role
-            if dto.first_name is not None:
-                u["first_name"] = dto.first_name
-            if dto.last_name is not None:
-                u["last_name"] = dto.last_name
-
-            # u["updated_at"] = _now_iso()
-            # u["version"] = int(u.get("version", 1)) + 1
-            _save_data(items)
-            return _to_user_out(u)
-    return None
+    # Only update provided fields
+    changes = {field: value for field, value in dto.model_dump().items() if value is not None}
+    u = get_store().update(user_id, changes)
+    return _to_user_out(u) if u is not None else None
 
 
 def delete_user(user_id: str) -> bool:
     """Delete a user by id. Returns True if something was deleted."""
-    items = _load_data()
-    remaining = [u for u in items if u.get("id") != user_id]
-    if len(remaining) == len(items):
-        return False
-    _save_data(remaining)
-    return True
+    return get_store().delete(user_id)
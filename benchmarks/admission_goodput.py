@@ -0,0 +1,139 @@
+"""
+Goodput benchmark for admission control (app/middleware/admission.py).
+
+An endpoint holds one of --connections slots (a DB pool) for --service-ms.
+Open-loop load arrives in 10 ms ticks at 1x and --overload times that
+capacity, with and without AdmissionMiddleware in front. Goodput counts the
+requests answered 200 within --slo-ms. With admission, goodput past
+saturation stays near its at-capacity level; without it, the backlog grows
+until almost every answer is too late.
+
+Timings come from the event loop, so results vary with machine load: this
+is a measurement, not a test (the behavior is covered by
+tests/test_admission.py).
+
+Usage:
+    python benchmarks/admission_goodput.py --overload 4 --duration 2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.middleware.admission import (  # noqa: E402
+    ADMIN,
+    AUTH,
+    DEFAULT,
+    AdmissionController,
+    AdmissionMiddleware,
+    ClassLimit,
+)
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+TICK = 0.01
+
+
+def _pool_app(connections: int, service_time: float) -> Any:
+    """Endpoint holding one of ``connections`` slots for ``service_time``."""
+    pool = asyncio.Semaphore(connections)
+
+    async def app(_scope: Any, _receive: Any, send: Any) -> None:
+        async with pool:
+            await asyncio.sleep(service_time)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+async def _goodput(app: Any, rate: float, duration: float, slo: float) -> dict[str, int]:
+    """Open-loop load: requests sent, answered 200 in time, and shed."""
+    counts = {"sent": 0, "good": 0, "shed": 0}
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/users/me", "headers": []}
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b""}
+
+    async def one() -> None:
+        started = time.perf_counter()
+        status = []
+
+        async def send(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await app(scope, receive, send)
+        if status == [200] and time.perf_counter() - started <= slo:
+            counts["good"] += 1
+        elif status == [503]:
+            counts["shed"] += 1
+
+    tasks = []
+    for _ in range(round(duration / TICK)):
+        batch = [asyncio.create_task(one()) for _ in range(round(rate * TICK))]
+        counts["sent"] += len(batch)
+        tasks += batch
+        await asyncio.sleep(TICK)
+    await asyncio.gather(*tasks)
+    return counts
+
+
+def _admitted(app: Any, concurrency: int, queue: int, max_wait: float) -> Any:
+    limit = ClassLimit(concurrency, queue)
+    controller = AdmissionController({AUTH: limit, ADMIN: limit, DEFAULT: limit}, max_wait)
+    return AdmissionMiddleware(app, controller)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=4, help="slots of the endpoint")
+    parser.add_argument("--service-ms", type=float, default=10.0, help="time holding a slot")
+    parser.add_argument("--slo-ms", type=float, default=100.0, help="answers later are not good")
+    parser.add_argument("--overload", type=float, default=4.0, help="load as a capacity multiple")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds of load per run")
+    parser.add_argument("--queue", type=int, default=8, help="admission queue length")
+    parser.add_argument("--max-wait-ms", type=float, default=50.0, help="admission max wait")
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    service, slo = args.service_ms / 1000, args.slo_ms / 1000
+    capacity = args.connections / service
+    runs = {
+        "at_capacity": (True, capacity),
+        "overloaded": (True, args.overload * capacity),
+        "unprotected": (False, args.overload * capacity),
+    }
+
+    results = {}
+    for name, (admission, rate) in runs.items():
+        app = _pool_app(args.connections, service)
+        if admission:
+            app = _admitted(app, args.connections, args.queue, args.max_wait_ms / 1000)
+        r = results[name] = asyncio.run(_goodput(app, rate, args.duration, slo))
+        logger.info(
+            "%-11s %6.0f req/s  sent %6d  good %6d (%5.1f/s)  shed %6d",
+            name,
+            rate,
+            r["sent"],
+            r["good"],
+            r["good"] / args.duration,
+            r["shed"],
+        )
+    report = {"meta": vars(args) | {"output": None, "capacity": capacity}, "results": results}
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark the JSON user store against the legacy whole-file implementation.
+
+Usage:
+    python benchmarks/bench_user_service.py --sizes 10000 100000
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas.user import UserCreate, UserOut, UserUpdate  # noqa: E402
+from app.services import user_service  # noqa: E402
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+
+# ---------------------------- Legacy implementation --------------------------
+# Verbatim behaviour of the pre-store user_service: every call re-reads the
+# whole file, scans linearly and rewrites the full array on each write.
+
+
+def _legacy_load(path: Path) -> list[dict[str, Any]]:
+    data: list[dict[str, Any]] = json.loads(path.read_text(encoding="utf-8"))
+    return data
+
+
+def _legacy_save(path: Path, data: list[dict[str, Any]]) -> None:
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+class LegacyStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def get(self, user_id: str) -> UserOut | None:
+        for u in _legacy_load(self.path):
+            if u.get("id") == user_id:
+                return user_service._to_user_out(u)  # type: ignore[arg-type]
+        return None
+
+    def list(self) -> list[UserOut]:
+        return [user_service._to_user_out(u) for u in _legacy_load(self.path)]  # type: ignore[arg-type]
+
+    def create(self, record: dict[str, Any]) -> None:
+        items = _legacy_load(self.path)
+        items.append(record)
+        _legacy_save(self.path, items)
+
+    def update(self, user_id: str, username: str) -> None:
+        items = _legacy_load(self.path)
+        for u in items:
+            if u.get("id") == user_id:
+                u["username"] = username
+                break
+        _legacy_save(self.path, items)
+
+    def delete(self, user_id: str) -> None:
+        items = _legacy_load(self.path)
+        _legacy_save(self.path, [u for u in items if u.get("id") != user_id])
+
+
+# ---------------------------- Harness ----------------------------------------
+
+
+def _make_records(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": str(i),
+            "email": f"user{i}@bench.example.com",
+            "username": f"user{i}",
+            "password": "x",
+            "role": "user",
+            "first_name": "Bench",
+            "last_name": f"User{i}",
+        }
+        for i in range(n)
+    ]
+
+
+def _ops_per_second(fn: Callable[[int], object], budget: float, max_ops: int) -> float:
+    """Call fn(i) until the time budget or max_ops is exhausted; return ops/s."""
+    done = 0
+    start = time.perf_counter()
+    while done < max_ops and time.perf_counter() - start < budget:
+        fn(done)
+        done += 1
+    return done / (time.perf_counter() - start)
+
+
+def run(size: int, budget: float) -> dict[str, dict[str, float]]:
+    rng = random.Random(42)
+    records = _make_records(size)
+    ids = [r["id"] for r in records]
+    results: dict[str, dict[str, float]] = {"legacy": {}, "store": {}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.json"
+        legacy_path.write_text(json.dumps(records), encoding="utf-8")
+        legacy = LegacyStore(legacy_path)
+        results["legacy"] = {
+            "get_user": _ops_per_second(lambda _: legacy.get(rng.choice(ids)), budget, 10**6),
+            "list_users": _ops_per_second(lambda _: legacy.list(), budget, 10**6),
+            "create_user": _ops_per_second(
+                lambda i: legacy.create({**records[0], "id": f"n{i}"}), budget, 10**6
+            ),
+            "update_user": _ops_per_second(
+                lambda i: legacy.update(rng.choice(ids), f"renamed{i}"), budget, 10**6
+            ),
+            "delete_user": _ops_per_second(lambda i: legacy.delete(ids[i]), budget, size),
+        }
+
+        store_path = Path(tmp) / "users.json"
+        store_path.write_text(json.dumps(records), encoding="utf-8")
+        user_service.DATA_PATH = store_path
+        user_service.get_store().all()  # initial load, outside the measured loop
+        dto = UserCreate(email="new@bench.example.com", username="newuser", password="secret1")
+        results["store"] = {
+            "get_user": _ops_per_second(
+                lambda _: user_service.get_user(rng.choice(ids)), budget, 10**6
+            ),
+            "list_users": _ops_per_second(lambda _: user_service.list_users(), budget, 10**6),
+            "create_user": _ops_per_second(lambda _: user_service.create_user(dto), budget, 10**6),
+            "update_user": _ops_per_second(
+                lambda i: user_service.update_user(
+                    rng.choice(ids), UserUpdate(username=f"renamed{i}")
+                ),
+                budget,
+                10**6,
+            ),
+            "delete_user": _ops_per_second(
+                lambda i: user_service.delete_user(ids[i]), budget, size
+            ),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per operation")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        results = run(size, args.budget)
+        logger.info("records=%d", size)
+        logger.info("  %-12s %14s %14s %9s", "operation", "legacy ops/s", "store ops/s", "speedup")
+        for op, legacy_rate in results["legacy"].items():
+            store_rate = results["store"][op]
+            speedup = store_rate / legacy_rate
+            logger.info("  %-12s %14.1f %14.1f %8.1fx", op, legacy_rate, store_rate, speedup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare a load benchmark result against a committed baseline.
+
+A scenario regresses when its throughput drops, or its p95/p99 latency
+grows, by more than --threshold (relative). Exits 1 if any scenario
+regresses, so it can gate CI.
+
+Usage:
+    python benchmarks/compare.py benchmarks/baselines/1k.json benchmarks/results/1k.json
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+# metric -> +1 if higher is better, -1 if lower is better
+METRICS = {"throughput_rps": +1, "p95_ms": -1, "p99_ms": -1}
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float
+) -> list[tuple[str, str, float, float, float]]:
+    """Return (scenario, metric, baseline, current, relative change) for each regression."""
+    regressions = []
+    for scenario, base in baseline["results"].items():
+        cur = current["results"].get(scenario)
+        if cur is None:
+            logger.info("%-12s missing from current results (skipped)", scenario)
+            continue
+        for metric, direction in METRICS.items():
+            before, after = float(base[metric]), float(cur[metric])
+            if before == 0:
+                continue
+            change = (after - before) / before
+            flag = "REGRESSION" if change * direction < -threshold else ""
+            logger.info(
+                "%-12s %-15s %10.2f -> %10.2f  %+7.1f%%  %s",
+                scenario,
+                metric,
+                before,
+                after,
+                change * 100,
+                flag,
+            )
+            if flag:
+                regressions.append((scenario, metric, before, after, change))
+        if cur.get("errors"):
+            logger.info("%-12s %d error responses", scenario, cur["errors"])
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="tolerated relative change (0.15 = 15%%)"
+    )
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    if baseline["meta"].get("dataset") != current["meta"].get("dataset"):
+        logger.warning(
+            "dataset mismatch: %s vs %s",
+            baseline["meta"].get("dataset"),
+            current["meta"].get("dataset"),
+        )
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        logger.error("%d regression(s) above %.0f%%", len(regressions), args.threshold * 100)
+        sys.exit(1)
+    logger.info("no regression above %.0f%%", args.threshold * 100)
+
+
+if __name__ == "__main__":
+    main()
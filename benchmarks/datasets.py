@@ -0,0 +1,102 @@
+"""
+Deterministic seeded user datasets for benchmarks.
+
+Datasets are SQLite files cached under benchmarks/.data/ (git-ignored) so
+the 100k/1M variants are only built once. Every user shares the password
+BENCH_PASSWORD and a single precomputed bcrypt hash.
+"""
+
+import logging
+import time
+from pathlib import Path
+
+import bcrypt
+from sqlalchemy import Engine, create_engine, insert
+
+from app.models.base import SCHEMA_NAME, Base
+from app.models.user import Profile, User
+from app.models.user_counter import ROLE, SIGNUPS, UserCounter
+from app.repositories import utc_today
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = Path(__file__).resolve().parent / ".data"
+BENCH_PASSWORD = "benchpass"
+BATCH_SIZE = 20_000
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+# Latest alembic revision reflected by the models: cached datasets built for an
+# older schema (missing indexes) are rebuilt instead of silently reused
+SCHEMA_REVISION = "0008"
+
+# User id 1 is always the admin used to call admin-only endpoints
+ADMIN_ID = 1
+
+
+def sqlite_engine(path: Path) -> Engine:
+    return create_engine(
+        f"sqlite:///{path}",
+        execution_options={"schema_translate_map": {SCHEMA_NAME: None}},
+    )
+
+
+def _seed(engine: Engine, n: int, rounds: int) -> None:
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    users = User.__table__
+    profiles = Profile.__table__
+    with engine.begin() as conn:
+        for start in range(1, n + 1, BATCH_SIZE):
+            ids = range(start, min(start + BATCH_SIZE, n + 1))
+            conn.execute(
+                insert(users),
+                [
+                    {
+                        "id": i,
+                        "email": f"user{i}@bench.example.com",
+                        "username": f"user{i}",
+                        "password": password_hash,
+                        "role": "ADMIN" if i == ADMIN_ID else "USER",
+                        "version": 1,
+                    }
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                insert(profiles),
+                [
+                    {"id": i, "user_id": i, "first_name": "Bench", "last_name": f"User{i}"}
+                    for i in ids
+                ],
+            )
+        # Core inserts bypass the ORM hook maintaining the stats counters
+        conn.execute(
+            insert(UserCounter.__table__),
+            [
+                {"kind": ROLE, "bucket": "admin", "count": 1},
+                {"kind": ROLE, "bucket": "user", "count": n - 1},
+                {"kind": SIGNUPS, "bucket": utc_today().isoformat(), "count": n},
+            ],
+        )
+
+
+def ensure_dataset(name: str, rounds: int = 4) -> Path:
+    """Return the path of the seeded SQLite dataset, building it on first use."""
+    n = SIZES[name]
+    path = DATA_DIR / f"users-{name}-r{rounds}-s{SCHEMA_REVISION}.sqlite"
+    if path.exists():
+        return path
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    engine = sqlite_engine(tmp)
+    Base.metadata.create_all(engine)
+    start = time.perf_counter()
+    _seed(engine, n, rounds)
+    engine.dispose()
+    tmp.replace(path)
+    logger.info("seeded %s (%d users) in %.1fs", path.name, n, time.perf_counter() - start)
+    return path
+
+
+def user_email(user_id: int) -> str:
+    return f"user{user_id}@bench.example.com"
@@ -0,0 +1,107 @@
+"""
+First-request latency of a fresh worker, with and without the startup warm-up.
+
+Each sample is a new Python process: import the app, run its lifespan,
+then time the first two GET /api/v1/users/me calls (token resolution and
+user lookup) and GET /api/v1/auth/.well-known/jwks.json. Only a new
+process pays for connects, mapper configuration and statement
+compilation, so nothing is shared between samples. The report gives the
+median per variant.
+
+Usage:
+    python benchmarks/first_request.py --samples 7
+    python benchmarks/first_request.py --database-url postgresql+psycopg://...
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.datasets import ADMIN_ID, ensure_dataset  # noqa: E402
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+VARIANTS = {"cold": "false", "warmed": "true"}
+
+
+def _child() -> None:
+    """One fresh worker: startup, then the first requests (environment set by the parent)."""
+    # pylint: disable=import-outside-toplevel
+    from fastapi.testclient import TestClient
+
+    from app.core.security import create_access_token
+    from app.main import app
+
+    token = create_access_token({"sub": str(ADMIN_ID)})  # signing is not what we measure
+    headers = {"Authorization": f"Bearer {token}"}
+    timings = {}
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        timings["startup_ms"] = (time.perf_counter() - started) * 1000
+        for name, path, extra in (
+            ("first_me_ms", "/api/v1/users/me", headers),
+            ("second_me_ms", "/api/v1/users/me", headers),
+            ("first_jwks_ms", "/api/v1/auth/.well-known/jwks.json", {}),
+        ):
+            started = time.perf_counter()
+            response = client.get(path, headers=extra)
+            timings[name] = (time.perf_counter() - started) * 1000
+            assert response.status_code == 200, response.text
+    print(json.dumps(timings))
+
+
+def _sample(database_url: str, warmup: str) -> dict[str, float]:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "USER_BACKEND": "sql",
+        "WARMUP_ENABLED": warmup,
+        "ACCESS_LOG_ENABLED": "false",
+        "HEALTH_CHECK_INTERVAL_SECONDS": "0",
+        "PURGE_INTERVAL_SECONDS": "0",
+    }
+    env.setdefault("ENV", "dev")
+    output = subprocess.run(
+        [sys.executable, __file__, "--child"], env=env, check=True, capture_output=True, text=True
+    ).stdout
+    result: dict[str, float] = json.loads(output.strip().splitlines()[-1])
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=5, help="fresh processes per variant")
+    parser.add_argument("--database-url", help="seeded database (default: 1k SQLite dataset)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child()
+        return
+
+    database_url = args.database_url or f"sqlite:///{ensure_dataset('1k')}"
+    report = {}
+    for variant, warmup in VARIANTS.items():
+        samples = [_sample(database_url, warmup) for _ in range(args.samples)]
+        report[variant] = {
+            name: round(statistics.median(s[name] for s in samples), 3) for name in samples[0]
+        }
+        logger.info(
+            "%-7s startup %8.2fms  first /me %7.2fms  second /me %6.2fms  first jwks %6.2fms",
+            variant,
+            *report[variant].values(),
+        )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
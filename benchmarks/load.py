@@ -0,0 +1,235 @@
+"""
+Endpoint load benchmark: asyncio + httpx driver against the in-process ASGI app.
+
+Each scenario runs for --duration seconds with --concurrency workers and
+reports throughput and p50/p95/p99 latencies as JSON.
+
+Usage:
+    python benchmarks/load.py --dataset 1k --output benchmarks/results/1k.json
+    python benchmarks/compare.py benchmarks/baselines/1k.json benchmarks/results/1k.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from benchmarks.datasets import (  # noqa: E402
+    ADMIN_ID,
+    BENCH_PASSWORD,
+    SIZES,
+    ensure_dataset,
+    user_email,
+)
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+# Largest dataset each scenario runs on by default (users_list is unpaginated)
+MAX_USERS = {"users_list": 1_000}
+
+
+def _load_app(database_url: str, rounds: int) -> Any:
+    """Configure the environment, then import the app (settings are read at import)."""
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["BCRYPT_ROUNDS"] = str(rounds)
+    os.environ["USER_BACKEND"] = "sql"
+    os.environ.setdefault("ENV", "dev")
+    # One JSON line per request would flood the terminal; opt in to measure its cost
+    os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    # pylint: disable=import-outside-toplevel
+    from app.core.security import create_access_token
+    from app.main import app
+
+    return app, create_access_token
+
+
+def build_scenarios(n_users: int, token_for: Callable[[int], str]) -> dict[str, Request]:
+    rng = random.Random(1234)
+    admin = {"Authorization": f"Bearer {token_for(ADMIN_ID)}"}
+    # Pre-mint a pool of user tokens so JWT signing is not part of the read scenarios
+    user_tokens = [
+        {"Authorization": f"Bearer {token_for(rng.randint(1, n_users))}"} for _ in range(256)
+    ]
+    run_id = int(time.time())
+    register_counter = itertools.count()
+
+    async def login(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        email = user_email(rng.randint(1, n_users))
+        return await client.post(
+            "/api/v1/auth/login", json={"email": email, "password": BENCH_PASSWORD}
+        )
+
+    async def register(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        n = next(register_counter)
+        return await client.post(
+            "/api/v1/auth/register",
+            json={
+                "email": f"new{run_id}-{n}@bench.example.com",
+                "username": f"new{run_id}-{n}",
+                "password": BENCH_PASSWORD,
+            },
+        )
+
+    async def users_me(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        return await client.get("/api/v1/users/me", headers=user_tokens[i % len(user_tokens)])
+
+    async def users_by_id(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.get(f"/api/v1/users/{rng.randint(1, n_users)}", headers=admin)
+
+    async def users_list(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.get("/api/v1/users", headers=admin)
+
+    async def users_search(client: httpx.AsyncClient, i: int) -> httpx.Response:
+        # Alternate username prefixes (user123 -> user123, user1230..) and exact emails
+        user_id = rng.randint(1, n_users)
+        query = f"user{user_id}" if i % 2 else user_email(user_id)
+        return await client.get("/api/v1/users/search", params={"q": query}, headers=admin)
+
+    async def jwks(client: httpx.AsyncClient, _: int) -> httpx.Response:
+        return await client.get("/api/v1/auth/.well-known/jwks.json")
+
+    return {
+        "login": login,
+        "register": register,
+        "users_me": users_me,
+        "users_by_id": users_by_id,
+        "users_list": users_list,
+        "users_search": users_search,
+        "jwks": jwks,
+    }
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+    app: Any, request: Request, duration: float, concurrency: int
+) -> dict[str, float]:
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm-up request (connection pool, first-query compilation) is not measured
+        await request(client, 0)
+
+        async def worker() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                i = next(counter)
+                start = time.perf_counter()
+                response = await request(client, i)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(ms), 3) if ms else 0.0,
+        "p50_ms": round(_percentile(ms, 50), 3),
+        "p95_ms": round(_percentile(ms, 95), 3),
+        "p99_ms": round(_percentile(ms, 99), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dataset", choices=sorted(SIZES), default="1k")
+    parser.add_argument("--scenarios", nargs="+", help="subset of scenarios to run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--bcrypt-rounds", type=int, default=4, help="cost of the seeded and new hashes"
+    )
+    parser.add_argument(
+        "--database-url",
+        help="target an existing seeded database instead of the cached SQLite dataset",
+    )
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    n_users = SIZES[args.dataset]
+    database_url = args.database_url
+    if not database_url:
+        # Work on a copy so write scenarios never alter the cached dataset
+        work_copy = Path(tempfile.mkdtemp()) / "users.sqlite"
+        shutil.copyfile(ensure_dataset(args.dataset, args.bcrypt_rounds), work_copy)
+        database_url = f"sqlite:///{work_copy}"
+    app, create_access_token = _load_app(database_url, args.bcrypt_rounds)
+    scenarios = build_scenarios(n_users, lambda uid: create_access_token({"sub": str(uid)}))
+
+    selected = args.scenarios or [
+        name for name in scenarios if n_users <= MAX_USERS.get(name, n_users)
+    ]
+    results: dict[str, Any] = {}
+    for name in selected:
+        results[name] = asyncio.run(
+            run_scenario(app, scenarios[name], args.duration, args.concurrency)
+        )
+        r = results[name]
+        logger.info(
+            "%-12s %9.1f req/s  p50 %8.2fms  p95 %8.2fms  p99 %8.2fms  errors %d",
+            name,
+            r["throughput_rps"],
+            r["p50_ms"],
+            r["p95_ms"],
+            r["p99_ms"],
+            r["errors"],
+        )
+
+    report = {
+        "meta": {
+            "dataset": args.dataset,
+            "users": n_users,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "database": "sqlite" if not args.database_url else args.database_url.split(":")[0],
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        logger.info("wrote %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
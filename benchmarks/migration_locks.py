@@ -0,0 +1,211 @@
+"""
+Migration lock checker: run each Alembic revision against a large users table
+while a probe keeps writing to it, and report how long writes were blocked.
+
+The database is migrated to the first revision, seeded with --rows users
+(and profiles), then upgraded one revision at a time. During each upgrade
+a background connection updates a random user every --probe-interval
+seconds; the slowest probe write is the longest time traffic would have
+waited on the migration's locks. A revision whose max write wait is
+close to its duration locks the table for its whole run: make it online
+with app/core/migrations.py.
+
+SQLite (default, a temporary file in WAL mode) serializes writers, so it
+shows which revisions hold the write lock and for how long; use
+--database-url to measure on Postgres, where CONCURRENTLY builds and
+batched backfills keep probe writes fast.
+
+Usage:
+    python benchmarks/migration_locks.py --rows 200000
+    python benchmarks/migration_locks.py --database-url postgresql+psycopg://... --output locks.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # settings are read at import (env.py)
+
+from alembic.config import Config  # noqa: E402
+from alembic.script import ScriptDirectory  # noqa: E402
+from sqlalchemy import Connection, Engine, create_engine, event, text  # noqa: E402
+
+from alembic import command  # noqa: E402
+from app.models.base import SCHEMA_NAME  # noqa: E402
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+ROOT = Path(__file__).resolve().parent.parent
+SEED_BATCH = 10_000
+BLOCKED_MS = 50.0  # A probe write slower than this counts as blocked
+
+
+def sqlite_engine(directory: Path) -> Engine:
+    """File database with the service schema attached under its name (as on Postgres)."""
+    engine = create_engine(f"sqlite:///{directory}/main.db", connect_args={"timeout": 120})
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_connection: Any, _record: Any) -> None:
+        dbapi_connection.execute(f"ATTACH DATABASE '{directory}/schema.db' AS {SCHEMA_NAME}")
+        dbapi_connection.execute(f"PRAGMA {SCHEMA_NAME}.journal_mode = WAL")
+
+    return engine
+
+
+def alembic_config(connection: Connection) -> Config:
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.attributes["connection"] = connection
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def revisions(config: Config) -> list[str]:
+    """Revision ids from base to head."""
+    script = ScriptDirectory.from_config(config)
+    return [rev.revision for rev in reversed(list(script.walk_revisions()))]
+
+
+def seed(connection: Connection, rows: int) -> None:
+    """Users and profiles in the shape of the first revision."""
+    users = text(
+        f"INSERT INTO {SCHEMA_NAME}.users (id, email, username, password, role, version) "
+        "VALUES (:id, :email, :username, :password, :role, 1)"
+    )
+    profiles = text(
+        f"INSERT INTO {SCHEMA_NAME}.profiles (user_id, first_name, last_name, version) "
+        "VALUES (:id, :first_name, :last_name, 1)"
+    )
+    for start in range(1, rows + 1, SEED_BATCH):
+        ids = range(start, min(start + SEED_BATCH, rows + 1))
+        connection.execute(
+            users,
+            [
+                {
+                    "id": n,
+                    "email": f"User{n}@Example.com",
+                    "username": f"user{n}",
+                    "password": "x" * 60,
+                    "role": "ADMIN" if n == 1 else "USER",
+                }
+                for n in ids
+            ],
+        )
+        connection.execute(
+            profiles,
+            [{"id": n, "first_name": f"First{n % 997}", "last_name": f"Last{n}"} for n in ids],
+        )
+        connection.commit()
+
+
+class WriteProbe:
+    """Background writer timing a one-row UPDATE every ``interval`` seconds."""
+
+    def __init__(self, engine: Engine, rows: int, interval: float) -> None:
+        self.engine = engine
+        self.rows = rows
+        self.interval = interval
+        self.latencies: list[float] = []
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="write-probe", daemon=True)
+
+    def __enter__(self) -> "WriteProbe":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        update = text(f"UPDATE {SCHEMA_NAME}.users SET version = version WHERE id = :id")
+        rng = random.Random(42)
+        with self.engine.connect() as conn:
+            while not self._stop.wait(self.interval):
+                started = time.perf_counter()
+                try:
+                    conn.execute(update, {"id": rng.randint(1, self.rows)})
+                    conn.commit()
+                except Exception:  # pylint: disable=broad-exception-caught
+                    conn.rollback()
+                    self.errors += 1  # e.g. lock_timeout on the probe side
+                self.latencies.append((time.perf_counter() - started) * 1000)
+
+
+def check(engine: Engine, rows: int, interval: float) -> dict[str, Any]:
+    """Migrate revision by revision under the probe; lock report per revision."""
+    report: dict[str, Any] = {}
+    with engine.connect() as connection:
+        config = alembic_config(connection)
+        first, *rest = revisions(config)
+        command.upgrade(config, first)
+        started = time.perf_counter()
+        seed(connection, rows)
+        logger.info("seeded %d users in %.1fs", rows, time.perf_counter() - started)
+
+        for revision in rest:
+            with WriteProbe(engine, rows, interval) as probe:
+                started = time.perf_counter()
+                command.upgrade(config, revision)
+                duration_ms = (time.perf_counter() - started) * 1000
+            waits = probe.latencies or [0.0]
+            report[revision] = {
+                "duration_ms": round(duration_ms, 1),
+                "max_write_wait_ms": round(max(waits), 1),
+                "median_write_ms": round(statistics.median(waits), 3),
+                "probes": len(probe.latencies),
+                "blocked_probes": sum(ms > BLOCKED_MS for ms in waits),
+                "probe_errors": probe.errors,
+            }
+            r = report[revision]
+            logger.info(
+                "%-6s %9.1fms  max write wait %9.1fms  blocked %4d/%-5d errors %d",
+                revision,
+                r["duration_ms"],
+                r["max_write_wait_ms"],
+                r["blocked_probes"],
+                r["probes"],
+                r["probe_errors"],
+            )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000, help="users seeded before 0002")
+    parser.add_argument("--probe-interval", type=float, default=0.005, help="seconds")
+    parser.add_argument(
+        "--database-url", help="empty Postgres database to migrate (default: temporary SQLite)"
+    )
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        engine = sqlite_engine(Path(tempfile.mkdtemp()))
+    report = {
+        "meta": {"rows": args.rows, "database": engine.dialect.name},
+        "revisions": check(engine, args.rows, args.probe_interval),
+    }
+    engine.dispose()
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Retry-storm benchmark: clients re-sending POST /api/v1/auth/register, with
+and without an Idempotency-Key.
+
+Each storm registers one new account: --concurrency identical requests at
+once (retries fired while the first attempt is still running), then
+--retries more one after the other (retries after a timeout). Without a
+key, every attempt runs the handler and all but the first end in 409 (an
+attempt that passes the existence check before the first one commits also
+pays for bcrypt). With a key, the first attempt runs and every other one
+replays its 201. The report gives, per variant,
+the outcome of the attempts, how many bcrypt hashes they cost (from the
+Server-Timing ``bcrypt`` span) and their latency.
+
+Usage:
+    python benchmarks/retry_storm.py --storms 20 --concurrency 16 --bcrypt-rounds 10
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+
+from benchmarks.datasets import ensure_dataset  # noqa: E402
+from benchmarks.load import _load_app, _percentile  # noqa: E402
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+VARIANTS = ("no_key", "key")
+
+
+async def _attempt(
+    client: httpx.AsyncClient, payload: dict[str, str], headers: dict[str, str]
+) -> tuple[float, httpx.Response]:
+    started = time.perf_counter()
+    response = await client.post("/api/v1/auth/register", json=payload, headers=headers)
+    return (time.perf_counter() - started) * 1000, response
+
+
+async def run_variant(
+    app: Any, variant: str, storms: int, concurrency: int, retries: int
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    hashes = replayed = 0
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(storms):
+            name = f"storm-{uuid.uuid4().hex[:12]}"
+            payload = {"email": f"{name}@bench.example.com", "username": name, "password": "x" * 12}
+            headers = {"Idempotency-Key": str(uuid.uuid4())} if variant == "key" else {}
+            attempts = await asyncio.gather(
+                *(_attempt(client, payload, headers) for _ in range(concurrency))
+            )
+            for _ in range(retries):
+                attempts.append(await _attempt(client, payload, headers))
+            for ms, response in attempts:
+                latencies.append(ms)
+                statuses[response.status_code] += 1
+                hashes += "bcrypt" in response.headers.get("server-timing", "")
+                replayed += response.headers.get("idempotent-replayed") == "true"
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "bcrypt_hashes": hashes,
+        "replayed": replayed,
+        "seconds": round(elapsed, 3),
+        "p50_ms": round(_percentile(latencies, 50), 3),
+        "p99_ms": round(_percentile(latencies, 99), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--storms", type=int, default=20, help="accounts registered per variant")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous attempts")
+    parser.add_argument("--retries", type=int, default=4, help="sequential attempts afterwards")
+    parser.add_argument("--bcrypt-rounds", type=int, default=10, help="cost of the new hashes")
+    parser.add_argument("--output", type=Path, help="write JSON results to this file")
+    args = parser.parse_args()
+
+    # Work on a copy: registrations never alter the cached dataset
+    work_copy = Path(tempfile.mkdtemp()) / "users.sqlite"
+    shutil.copyfile(ensure_dataset("1k"), work_copy)
+    app, _ = _load_app(f"sqlite:///{work_copy}", args.bcrypt_rounds)
+
+    results = {}
+    for variant in VARIANTS:
+        results[variant] = asyncio.run(
+            run_variant(app, variant, args.storms, args.concurrency, args.retries)
+        )
+        r = results[variant]
+        logger.info(
+            "%-7s %5d requests in %6.2fs  bcrypt %4d  replayed %4d  p50 %7.2fms  p99 %7.2fms  %s",
+            variant,
+            r["requests"],
+            r["seconds"],
+            r["bcrypt_hashes"],
+            r["replayed"],
+            r["p50_ms"],
+            r["p99_ms"],
+            r["statuses"],
+        )
+    meta = {
+        "storms": args.storms,
+        "concurrency": args.concurrency,
+        "retries": args.retries,
+        "bcrypt_rounds": args.bcrypt_rounds,
+    }
+    report = {"meta": meta, "results": results}
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+10k role changes: one repository update per user vs one set_roles() batch.
+
+- individual: what PUT /api/v1/users/{id} costs per user (load the user
+  and its profile, flush, commit), 10k times
+- batched: PATCH /api/v1/users:batchUpdate, a locking SELECT plus one
+  UPDATE ... WHERE id IN (...) and the counter upserts, in one transaction
+
+Each round flips every role (user <-> admin), so every row really changes.
+
+Usage:
+    pytest benchmarks/test_batch_benchmark.py --benchmark-only --no-cov
+"""
+
+import itertools
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.user import User
+from app.repositories import SqlUserRepository, utc_today
+from tests.backends import SQLITE_OPTIONS
+
+ROWS = 10_000
+IDS = [str(n) for n in range(1, ROWS + 1)]
+
+engine = create_engine("sqlite://", **SQLITE_OPTIONS)
+Base.metadata.create_all(engine)
+with engine.begin() as setup:
+    setup.execute(
+        insert(User.__table__),
+        [
+            {
+                "id": n,
+                "email": f"user{n}@bench.example.com",
+                "username": f"user{n}",
+                "password": "x" * 60,
+                "role": "USER",
+                "version": 1,
+            }
+            for n in range(1, ROWS + 1)
+        ],
+    )
+SessionLocal = sessionmaker(bind=engine, autoflush=False)
+
+
+def _individual(role):
+    with SessionLocal() as db:
+        repo = SqlUserRepository(db)
+        for user_id in IDS:
+            repo.update(user_id, {"role": role})
+
+
+def _batched(role):
+    with SessionLocal() as db:
+        SqlUserRepository(db).set_roles(IDS, role)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [pytest.param(_individual, id="individual"), pytest.param(_batched, id="batched")],
+)
+def test_role_change_10k(benchmark, change):
+    benchmark.group = "role-change-10k"
+    roles = itertools.cycle(["admin", "user"])
+    benchmark.pedantic(lambda: change(next(roles)), rounds=4, iterations=1)
+
+    with SessionLocal() as db:
+        stats = SqlUserRepository(db).stats(utc_today())
+    # Even number of flips: back to the seeded roles (counters start at zero)
+    assert stats.by_role.get("admin", 0) == 0
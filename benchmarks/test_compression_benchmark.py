@@ -0,0 +1,54 @@
+"""
+Bytes on the wire and compression CPU for GET /users bodies, per size and encoding.
+
+Bodies are the real list rendering (user_list_json) of 10, 100, 1k and
+10k users; each round compresses one body in one shot, as the middleware
+does for a complete response. ``extra_info`` records the raw and encoded
+sizes, so the trade-off (CPU per response vs bytes saved) reads off the
+saved JSON. br and zstd run only when their packages are installed.
+
+Usage:
+    pytest benchmarks/test_compression_benchmark.py --benchmark-only --no-cov
+"""
+
+import pytest
+
+from app.middleware.compression import compressors
+from app.repositories import StoredUser
+from app.schemas.user import UserOut, user_list_json
+
+SIZES = (10, 100, 1_000, 10_000)
+FACTORIES = compressors()
+
+
+def _body(count: int) -> bytes:
+    users = [
+        StoredUser(
+            id=str(n),
+            email=f"user{n}@bench.example.com",
+            username=f"user{n}",
+            password_hash="x",
+            role="admin" if n == 1 else "user",
+            first_name="Bench",
+            last_name=f"User{n}",
+        )
+        for n in range(1, count + 1)
+    ]
+    return user_list_json([UserOut.from_stored(user) for user in users])
+
+
+BODIES = {count: _body(count) for count in SIZES}
+
+
+@pytest.mark.parametrize("encoding", sorted(FACTORIES))
+@pytest.mark.parametrize("count", SIZES)
+def test_compress_user_list(benchmark, count, encoding):
+    benchmark.group = f"compress-{count}-users"
+    body = BODIES[count]
+    factory = FACTORIES[encoding]
+
+    encoded = benchmark(lambda: factory().finish(body))
+    benchmark.extra_info.update(
+        raw_bytes=len(body), encoded_bytes=len(encoded), ratio=round(len(body) / len(encoded), 2)
+    )
+    assert len(encoded) < len(body)
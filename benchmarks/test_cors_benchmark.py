@@ -0,0 +1,105 @@
+"""
+Preflight throughput: Starlette CORS innermost (before) vs cached CORS outermost.
+
+Both run the application's full middleware stack as create_app() builds it;
+"starlette-innermost" swaps the CORS entry back for the stock middleware at
+its former place (allow all methods and headers, checked last), so every
+preflight first crosses Server-Timing, admission and compression. The SPA
+mix cycles a few origins, methods and header sets, as a browser does.
+``extra_info`` reports preflights per second.
+
+Usage:
+    pytest benchmarks/test_cors_benchmark.py --benchmark-only --no-cov
+"""
+
+import asyncio
+import itertools
+import os
+import time
+
+import pytest
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+
+# Settings are read at import; preflights never touch the database
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("CORS_ORIGINS", '["http://localhost:3000","http://localhost:8080"]')
+os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+
+# pylint: disable=wrong-import-position
+from app.main import _compute_cors_origins, create_app  # noqa: E402
+from app.middleware.cors import CachedCORSMiddleware, normalize_origin  # noqa: E402
+
+BATCH = 1_000
+REQUESTS = [
+    [
+        (b"origin", origin),
+        (b"access-control-request-method", method),
+        (b"access-control-request-headers", b"authorization, content-type"),
+    ]
+    for origin, method in itertools.product(
+        (b"http://localhost:3000", b"http://localhost:8080"), (b"GET", b"POST", b"PATCH", b"DELETE")
+    )
+]
+
+
+def _starlette_innermost():
+    application = create_app()
+    stack = [m for m in application.user_middleware if m.cls is not CachedCORSMiddleware]
+    stack.append(
+        Middleware(
+            CORSMiddleware,
+            allow_origins=[normalize_origin(o) for o in _compute_cors_origins()],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    )
+    application.user_middleware = stack
+    return application
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(_message):
+    pass
+
+
+async def _preflights(application):
+    for i in range(BATCH):
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "OPTIONS",
+            "scheme": "http",
+            "path": "/api/v1/users/me",
+            "raw_path": b"/api/v1/users/me",
+            "query_string": b"",
+            "root_path": "",
+            "headers": REQUESTS[i % len(REQUESTS)],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        await application(scope, _receive, _send)
+
+
+@pytest.mark.parametrize(
+    "variant, build",
+    [("starlette-innermost", _starlette_innermost), ("cached-outermost", create_app)],
+)
+def test_preflight_throughput(benchmark, variant, build):
+    benchmark.group = "cors-preflight"
+    benchmark.name = variant
+    application = build()
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(_preflights(application))  # build the stack, warm caches
+        started = time.perf_counter()
+        benchmark(lambda: loop.run_until_complete(_preflights(application)))
+        rounds = benchmark.stats.stats.rounds
+    finally:
+        loop.close()
+    elapsed = time.perf_counter() - started
+    benchmark.extra_info["preflights_per_second"] = round(BATCH * rounds / elapsed)
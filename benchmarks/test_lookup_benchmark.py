@@ -0,0 +1,102 @@
+"""
+Per-lookup Python overhead of the hot single-user reads.
+
+- rebuilt: a new select() per call (the repository before prebuilt
+  statements); the compiled cache still hits, but the statement, its cache
+  key and the result-column mapping are rebuilt every time
+- prebuilt: the repository's module-level statements with bound parameters
+- lambda: lambda_stmt() closing over the value, for comparison
+
+All variants run on one open connection against an in-memory SQLite table,
+so the timings are dominated by SQLAlchemy, not by the database.
+
+Usage:
+    pytest benchmarks/test_lookup_benchmark.py --benchmark-only --no-cov
+"""
+
+import pytest
+from sqlalchemy import create_engine, func, insert, lambda_stmt
+
+from app.models.base import Base
+from app.models.user import User
+from app.repositories.sql import _ROW_BY_EMAIL, _ROW_BY_ID, _user_rows
+from tests.backends import SQLITE_OPTIONS
+
+ROWS = 1_000
+PK = 500
+EMAIL = f"user{PK}@bench.example.com"
+
+engine = create_engine("sqlite://", **SQLITE_OPTIONS)
+Base.metadata.create_all(engine)
+with engine.begin() as setup:
+    setup.execute(
+        insert(User.__table__),
+        [
+            {
+                "id": n,
+                "email": f"user{n}@bench.example.com",
+                "username": f"user{n}",
+                "password": "x" * 60,
+                "role": "USER",
+                "version": 1,
+            }
+            for n in range(1, ROWS + 1)
+        ],
+    )
+conn = engine.connect()
+
+
+def _rebuilt_by_id():
+    return conn.execute(_user_rows().where(User.id == PK)).first()
+
+
+def _prebuilt_by_id():
+    return conn.execute(_ROW_BY_ID, {"pk": PK}).first()
+
+
+def _lambda_by_id():
+    pk = PK
+    return conn.execute(lambda_stmt(lambda: _user_rows().where(User.id == pk))).first()
+
+
+def _rebuilt_by_email():
+    return conn.execute(_user_rows().where(func.lower(User.email) == EMAIL)).first()
+
+
+def _prebuilt_by_email():
+    return conn.execute(_ROW_BY_EMAIL, {"email": EMAIL}).first()
+
+
+def _lambda_by_email():
+    email = EMAIL
+    return conn.execute(
+        lambda_stmt(lambda: _user_rows().where(func.lower(User.email) == email))
+    ).first()
+
+
+@pytest.mark.parametrize(
+    "lookup",
+    [
+        pytest.param(_rebuilt_by_id, id="rebuilt"),
+        pytest.param(_prebuilt_by_id, id="prebuilt"),
+        pytest.param(_lambda_by_id, id="lambda"),
+    ],
+)
+def test_lookup_by_id(benchmark, lookup):
+    benchmark.group = "lookup-by-id"
+    row = benchmark(lookup)
+    assert row is not None and row[0] == PK
+
+
+@pytest.mark.parametrize(
+    "lookup",
+    [
+        pytest.param(_rebuilt_by_email, id="rebuilt"),
+        pytest.param(_prebuilt_by_email, id="prebuilt"),
+        pytest.param(_lambda_by_email, id="lambda"),
+    ],
+)
+def test_lookup_by_email(benchmark, lookup):
+    benchmark.group = "lookup-by-email"
+    row = benchmark(lookup)
+    assert row is not None and row[1] == EMAIL
@@ -0,0 +1,53 @@
+"""
+Overhead of the profiling middleware on a trivial ASGI app.
+
+"bare" is the app alone, "idle" adds the middleware with sampling off and no
+debug header (the production default once enabled), "profiled" profiles
+every request.
+
+Usage:
+    pytest benchmarks/test_profiling_benchmark.py --benchmark-only --no-cov
+"""
+
+import asyncio
+
+import pytest
+
+from app.middleware.profiling import ProfileStore, ProfilingMiddleware
+
+HEADERS = [(b"host", b"bench"), (b"authorization", b"Bearer x"), (b"accept", b"*/*")]
+
+
+async def _endpoint(_scope, _receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(_message):
+    pass
+
+
+def _scope():
+    return {"type": "http", "method": "GET", "path": "/bench", "headers": HEADERS}
+
+
+@pytest.mark.parametrize(
+    "app",
+    [
+        pytest.param(_endpoint, id="bare"),
+        pytest.param(ProfilingMiddleware(_endpoint, ProfileStore(50)), id="idle"),
+        pytest.param(ProfilingMiddleware(_endpoint, ProfileStore(50), 0.01), id="sampled-1pct"),
+        pytest.param(ProfilingMiddleware(_endpoint, ProfileStore(50), 1.0), id="profiled"),
+    ],
+)
+def test_middleware_overhead(benchmark, app):
+    loop = asyncio.new_event_loop()
+    benchmark.group = "profiling-middleware"
+    try:
+        benchmark(lambda: loop.run_until_complete(app(_scope(), _receive, _send)))
+    finally:
+        loop.close()
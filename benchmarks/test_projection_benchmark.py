@@ -0,0 +1,81 @@
+"""
+Row hydration for user reads: ORM entities vs column projection.
+
+- orm: select(User) + joinedload(profile) through the Session, then
+  to_stored (the read path before projections)
+- projection-session: same columns as the repository, through
+  Session.execute (ORM compile, no entities)
+- projection-core: the repository's read path, on the session connection
+
+Each round uses a fresh Session so the identity map starts empty.
+
+Usage:
+    pytest benchmarks/test_projection_benchmark.py --benchmark-only --no-cov
+"""
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.base import Base
+from app.models.user import Profile, User
+from app.repositories.sql import _row_to_stored, _user_rows, to_stored
+from tests.backends import SQLITE_OPTIONS
+
+ROWS = 10_000
+
+engine = create_engine("sqlite://", **SQLITE_OPTIONS)
+Base.metadata.create_all(engine)
+with engine.begin() as conn:
+    conn.execute(
+        insert(User.__table__),
+        [
+            {
+                "id": n,
+                "email": f"user{n}@bench.example.com",
+                "username": f"user{n}",
+                "password": "x" * 60,
+                "role": "USER",
+                "version": 1,
+            }
+            for n in range(1, ROWS + 1)
+        ],
+    )
+    conn.execute(
+        insert(Profile.__table__),
+        [
+            {"id": n, "user_id": n, "first_name": "Bench", "last_name": f"User{n}"}
+            for n in range(1, ROWS + 1, 2)  # half the users have a profile
+        ],
+    )
+
+
+def _orm():
+    with Session(engine) as session:
+        users = session.execute(select(User).options(joinedload(User.profile))).scalars()
+        return [to_stored(user) for user in users]
+
+
+def _projection_session():
+    with Session(engine) as session:
+        return [_row_to_stored(row) for row in session.execute(_user_rows())]
+
+
+def _projection_core():
+    with Session(engine) as session:
+        return [_row_to_stored(row) for row in session.connection().execute(_user_rows())]
+
+
+@pytest.mark.parametrize(
+    "load",
+    [
+        pytest.param(_orm, id="orm"),
+        pytest.param(_projection_session, id="projection-session"),
+        pytest.param(_projection_core, id="projection-core"),
+    ],
+)
+def test_hydrate_users(benchmark, load):
+    benchmark.group = f"hydrate-{ROWS}-users"
+    users = benchmark(load)
+    assert len(users) == ROWS
+    benchmark.extra_info["rows_per_s"] = round(ROWS / benchmark.stats.stats.median)
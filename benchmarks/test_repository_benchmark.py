@@ -0,0 +1,74 @@
+"""
+Same create/get/list/update/delete workload against every UserRepository backend.
+
+Usage:
+    pytest benchmarks/test_repository_benchmark.py --benchmark-only --no-cov \
+        --benchmark-group-by=func
+"""
+
+import itertools
+
+import pytest
+
+from tests.backends import BACKENDS, HAS_AIOSQLITE, make_repository
+
+SEED_USERS = 1_000
+
+
+@pytest.fixture(name="repo", params=BACKENDS)
+def fixture_repo(request, tmp_path):
+    """Repository pre-seeded with SEED_USERS users."""
+    if request.param == "async-sql" and not HAS_AIOSQLITE:
+        pytest.skip("aiosqlite or greenlet not installed")
+    with make_repository(request.param, tmp_path) as repo:
+        for n in range(SEED_USERS):
+            repo.create(
+                email=f"seed{n}@example.com",
+                username=f"seed{n}",
+                password_hash="x",
+                first_name="Seed",
+                last_name=str(n),
+            )
+        yield repo
+
+
+def test_create(benchmark, repo):
+    counter = itertools.count()
+
+    def create():
+        n = next(counter)
+        return repo.create(email=f"new{n}@example.com", username=f"new{n}", password_hash="x")
+
+    benchmark(create)
+
+
+def test_get(benchmark, repo):
+    ids = itertools.cycle([u.id for u in repo.list_all()])
+    benchmark(lambda: repo.get(next(ids)))
+
+
+def test_get_by_email(benchmark, repo):
+    emails = itertools.cycle([f"seed{n}@example.com" for n in range(SEED_USERS)])
+    benchmark(lambda: repo.get_by_email(next(emails)))
+
+
+def test_list(benchmark, repo):
+    result = benchmark(repo.list_all)
+    assert len(result) == SEED_USERS
+
+
+def test_update(benchmark, repo):
+    ids = itertools.cycle([u.id for u in repo.list_all()])
+    counter = itertools.count()
+    benchmark(lambda: repo.update(next(ids), {"last_name": f"upd{next(counter)}"}))
+
+
+def test_delete(benchmark, repo):
+    counter = itertools.count()
+
+    def setup():
+        n = next(counter)
+        user = repo.create(email=f"del{n}@example.com", username=f"del{n}", password_hash="x")
+        return (user.id,), {}
+
+    benchmark.pedantic(repo.delete, setup=setup, rounds=200)
@@ -0,0 +1,73 @@
+"""
+GET /users serialization cost for 10k users, from StoredUser rows to bytes.
+
+- fastapi-stdlib: validated UserOut, FastAPI's response_model pass
+  (validate in the threadpool, serialize to Python), stdlib json (before)
+- fastapi-orjson: same pass, orjson rendering (default response class)
+- prebuilt: model_construct + pre-built pydantic encoder (users router)
+
+Usage:
+    pytest benchmarks/test_serialization_benchmark.py --benchmark-only --no-cov
+"""
+
+import asyncio
+
+import pytest
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.repositories import StoredUser
+from app.schemas.user import UserOut, user_list_json
+
+USERS = [
+    StoredUser(
+        id=str(n),
+        email=f"user{n}@bench.example.com",
+        username=f"user{n}",
+        password_hash="x",
+        role="admin" if n == 1 else "user",
+        first_name="Bench",
+        last_name=f"User{n}",
+    )
+    for n in range(1, 10_001)
+]
+FIELD = create_model_field(name="Response_list_users", type_=list[UserOut], mode="serialization")
+
+
+def _validated(user: StoredUser) -> UserOut:
+    """UserOut.from_stored before model_construct: full validation per row."""
+    return UserOut(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        role=user.role,
+        first_name=user.first_name,
+        last_name=user.last_name,
+    )
+
+
+def _fastapi_path(response_class: type[JSONResponse]) -> bytes:
+    content = [_validated(user) for user in USERS]
+    payload = asyncio.run(
+        serialize_response(field=FIELD, response_content=content, is_coroutine=False)
+    )
+    return bytes(response_class(payload).body)
+
+
+def _prebuilt() -> bytes:
+    return user_list_json([UserOut.from_stored(user) for user in USERS])
+
+
+@pytest.mark.parametrize(
+    "render",
+    [
+        pytest.param(lambda: _fastapi_path(JSONResponse), id="fastapi-stdlib"),
+        pytest.param(lambda: _fastapi_path(ORJSONResponse), id="fastapi-orjson"),
+        pytest.param(_prebuilt, id="prebuilt"),
+    ],
+)
+def test_list_users_serialization(benchmark, render):
+    benchmark.group = "serialize-10k-users"
+    body = benchmark(render)
+    assert body.startswith(b"[{")
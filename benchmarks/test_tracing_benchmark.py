@@ -0,0 +1,76 @@
+"""
+Tracing overhead at 0%, 1% and 100% sampling.
+
+The endpoint runs one SQL statement on an instrumented SQLite engine and
+one traced block, roughly the shape of a cached read. "off" has no
+tracing middleware at all; exported spans are discarded.
+
+Usage:
+    pytest benchmarks/test_tracing_benchmark.py --benchmark-only --no-cov
+"""
+
+import asyncio
+from collections.abc import Sequence
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.middleware.tracing import (
+    BatchSpanProcessor,
+    Span,
+    Tracer,
+    TracingMiddleware,
+    install_sql_tracing,
+    traced,
+)
+
+engine = create_engine("sqlite://")
+install_sql_tracing(engine)
+connection = engine.connect()
+
+
+class _NullExporter:
+    def export(self, spans: Sequence[Span]) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+async def _endpoint(_scope, _receive, send):
+    connection.execute(text("SELECT 1")).scalar()
+    with traced("serialize"):
+        body = b'{"ok":true}'
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(_message):
+    pass
+
+
+def _traced(rate: float) -> TracingMiddleware:
+    return TracingMiddleware(_endpoint, Tracer(BatchSpanProcessor(_NullExporter()), rate))
+
+
+@pytest.mark.parametrize(
+    "app",
+    [
+        pytest.param(_endpoint, id="off"),
+        pytest.param(_traced(0.0), id="sampled-0pct"),
+        pytest.param(_traced(0.01), id="sampled-1pct"),
+        pytest.param(_traced(1.0), id="sampled-100pct"),
+    ],
+)
+def test_tracing_overhead(benchmark, app):
+    scope = {"type": "http", "method": "GET", "path": "/bench", "headers": [(b"host", b"b")]}
+    loop = asyncio.new_event_loop()
+    benchmark.group = "tracing"
+    try:
+        benchmark(lambda: loop.run_until_complete(app(scope, _receive, _send)))
+    finally:
+        loop.close()
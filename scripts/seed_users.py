@@ -0,0 +1,309 @@
+"""
+Seed a large deterministic dataset of users and profiles (load tests, staging).
+
+scripts/seed.py creates the admin account through the ORM, one row at a
+time; this tool builds volumes (1M users in well under a minute):
+
+- deterministic: every value derives from --seed and the user id, so the
+  same command writes the same rows whatever --workers and --batch-size
+- passwords: user N signs in as ``user{N}@<--email-domain>`` with
+  ``Seedpass{N % pool}``; only --password-pool bcrypt hashes are computed
+  (with salts derived from --seed), every user reuses one of them
+- writes: COPY on PostgreSQL (psycopg2 or psycopg 3), executemany
+  elsewhere; batches of --batch-size users run in --workers processes,
+  one transaction per batch
+- user_counters (GET /api/v1/users/stats) are updated once at the end
+
+Ids continue after the highest existing one. PostgreSQL needs the schema
+at head (``alembic upgrade head``); a SQLite file is created if missing.
+
+Usage:
+    python scripts/seed_users.py --users 1000000 --database-url sqlite:///users.db
+    python scripts/seed_users.py --users 1000000 --workers 8  # DATABASE_URL
+"""
+
+import argparse
+import io
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import cache
+from itertools import repeat
+from pathlib import Path
+from typing import Any
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+DEFAULT_URL = os.environ.get("DATABASE_URL")
+os.environ.setdefault("DATABASE_URL", "sqlite://")  # settings are read at import
+
+import bcrypt  # noqa: E402
+from sqlalchemy import Connection, Engine, Table, create_engine, func, select, text  # noqa: E402
+
+from app.core.settings import settings  # noqa: E402
+from app.models.base import SCHEMA_NAME, Base  # noqa: E402
+from app.models.user import Profile, User  # noqa: E402
+from app.models.user_counter import ROLE, SIGNUPS  # noqa: E402
+from app.repositories import utc_today  # noqa: E402
+from app.repositories.sql import apply_counter_deltas  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_PREFIX = "Seedpass"
+BLOCK = 1_000  # ids drawn from one random stream: the unit of determinism
+ADMIN_EVERY = 1_000  # about one admin per thousand users
+
+FIRST_NAMES = (
+    "Alice", "Bruno", "Camille", "David", "Emma", "Farid", "Gabriel", "Hugo", "Inès", "Jade",
+    "Karim", "Léa", "Louis", "Manon", "Nathan", "Océane", "Paul", "Quentin", "Rose", "Sarah",
+    "Thomas", "Ugo", "Victor", "Wassim", "Yasmine", "Zoé", "Chloé", "Lucas", "Nina", "Théo",
+)  # fmt: skip
+LAST_NAMES = (
+    "Martin", "Bernard", "Dubois", "Thomas", "Robert", "Richard", "Petit", "Durand", "Leroy",
+    "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David", "Bertrand", "Roux",
+    "Vincent", "Fournier", "Morel", "Girard", "Andre", "Mercier", "Dupont", "Lambert", "Bonnet",
+)  # fmt: skip
+BIOS = (None, None, None, "Lecteur assidu", "Fan de science-fiction", "Club de lecture")
+MINUTES = tuple(f"{m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60))
+
+USER_COLUMNS = ("id", "email", "username", "password", "role", "created_at", "version")
+PROFILE_COLUMNS = ("id", "user_id", "first_name", "last_name", "bio", "created_at", "version")
+_BCRYPT_B64 = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+Row = tuple[Any, ...]
+Deltas = Counter[tuple[str, str]]
+
+
+@dataclass(frozen=True)
+class Plan:
+    """What every batch needs to generate its rows (pickled to the workers)."""
+
+    seed: int
+    hashes: tuple[str, ...]
+    domain: str = "seed.example.com"
+    days: int = 365  # signups spread over the days up to ``until``
+    until: date = date(2026, 1, 1)
+    utc_suffix: str = ""  # "+00" for timestamptz columns (PostgreSQL)
+
+
+def password_for(user_id: int, pool_size: int) -> str:
+    return f"{PASSWORD_PREFIX}{user_id % pool_size}"
+
+
+def password_pool(size: int, rounds: int, seed: int) -> tuple[str, ...]:
+    """``size`` bcrypt hashes of Seedpass0..; salts derived from ``seed``."""
+    rng = random.Random(seed)
+    salts = [
+        f"$2b${rounds:02d}${''.join(rng.choices(_BCRYPT_B64, k=21))}{rng.choice('.Oeu')}"
+        for _ in range(size)
+    ]
+    with ThreadPoolExecutor() as pool:  # bcrypt releases the GIL
+        return tuple(
+            pool.map(
+                lambda k: bcrypt.hashpw(password_for(k, size).encode(), salts[k].encode()).decode(),
+                range(size),
+            )
+        )
+
+
+def generate(plan: Plan, start: int, stop: int) -> tuple[list[Row], list[Row], Deltas]:
+    """User and profile rows for ids [start, stop), and their counter deltas."""
+    users: list[Row] = []
+    profiles: list[Row] = []
+    signups = [0] * plan.days
+    admins = 0
+    days = [(plan.until - timedelta(days=d)).isoformat() for d in range(plan.days)]
+    for block in range(start // BLOCK, (stop - 1) // BLOCK + 1):
+        rng = random.Random(plan.seed * 1_000_003 + block)
+        draw = rng.random
+        for user_id in range(block * BLOCK, (block + 1) * BLOCK):
+            # Same draws for every id, used or not: a value only depends on its id
+            first = FIRST_NAMES[int(draw() * len(FIRST_NAMES))]
+            last = LAST_NAMES[int(draw() * len(LAST_NAMES))]
+            day = int(draw() * plan.days)
+            minute = MINUTES[int(draw() * len(MINUTES))]
+            admin = draw() * ADMIN_EVERY < 1
+            bio = BIOS[int(draw() * len(BIOS))]
+            if not start <= user_id < stop:
+                continue
+            created_at = f"{days[day]} {minute}{plan.utc_suffix}"
+            users.append(
+                (
+                    user_id,
+                    f"user{user_id}@{plan.domain}",
+                    f"{first}.{last}{user_id}".lower(),
+                    plan.hashes[user_id % len(plan.hashes)],
+                    "ADMIN" if admin else "USER",
+                    created_at,
+                    1,
+                )
+            )
+            profiles.append((user_id, user_id, first, last, bio, created_at, 1))
+            signups[day] += 1
+            admins += admin
+    deltas: Deltas = Counter({(SIGNUPS, days[d]): n for d, n in enumerate(signups) if n})
+    deltas[ROLE, "admin"] = admins
+    deltas[ROLE, "user"] = len(users) - admins
+    return users, profiles, deltas
+
+
+@cache
+def engine_for(url: str) -> Engine:
+    """One engine per process (workers build their own)."""
+    if url.startswith("sqlite"):
+        return create_engine(
+            url,
+            # SQLite has no schemas: map core_user_service.* onto the main database
+            execution_options={"schema_translate_map": {SCHEMA_NAME: None}},
+            connect_args={"timeout": 120},  # workers take turns on the write lock
+        )
+    return create_engine(url)
+
+
+def _copy_rows(conn: Connection, table: Table, columns: tuple[str, ...], rows: list[Row]) -> None:
+    """COPY FROM STDIN in text format (the generated values hold no tab or backslash)."""
+    sql = f"COPY {table.fullname} ({', '.join(columns)}) FROM STDIN"
+    data = "".join(
+        "\t".join(r"\N" if value is None else str(value) for value in row) + "\n" for row in rows
+    )
+    cursor: Any = conn.connection.cursor()
+    if hasattr(cursor, "copy_expert"):  # psycopg2
+        cursor.copy_expert(sql, io.StringIO(data))
+    else:  # psycopg 3
+        with cursor.copy(sql) as copy:
+            copy.write(data)
+
+
+def _insert_rows(conn: Connection, table: Table, columns: tuple[str, ...], rows: list[Row]) -> None:
+    """One executemany of a prepared INSERT (batched by the driver)."""
+    name = table.name if conn.dialect.name == "sqlite" else table.fullname
+    mark = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    conn.exec_driver_sql(
+        f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join([mark] * len(columns))})",
+        rows,
+    )
+
+
+def write_batch(url: str, plan: Plan, start: int, stop: int) -> Deltas:
+    """Generate and write one batch in its own transaction; returns its counter deltas."""
+    users, profiles, deltas = generate(plan, start, stop)
+    with engine_for(url).begin() as conn:
+        write = _copy_rows if conn.dialect.name == "postgresql" else _insert_rows
+        write(conn, User.__table__, USER_COLUMNS, users)  # type: ignore[arg-type]
+        write(conn, Profile.__table__, PROFILE_COLUMNS, profiles)  # type: ignore[arg-type]
+    return deltas
+
+
+def seed_users(  # pylint: disable=too-many-arguments
+    url: str,
+    count: int,
+    plan: Plan,
+    *,
+    batch_size: int = 20_000,
+    workers: int = 1,
+    start_id: int | None = None,
+) -> dict[str, Any]:
+    """Write ``count`` users and profiles, then their counters; returns the timings."""
+    engine = engine_for(url)
+    postgresql = engine.dialect.name == "postgresql"
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    if start_id is None:
+        with engine.connect() as conn:
+            start_id = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+    stop = start_id + count
+    starts = list(range(start_id, stop, batch_size))
+    stops = [min(start + batch_size, stop) for start in starts]
+
+    started = time.perf_counter()
+    deltas: Deltas = Counter()
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            for batch in pool.map(write_batch, repeat(url), repeat(plan), starts, stops):
+                deltas.update(batch)
+    else:
+        for start, end in zip(starts, stops, strict=True):
+            deltas.update(write_batch(url, plan, start, end))
+    with engine.begin() as conn:
+        apply_counter_deltas(conn, deltas)
+        if postgresql:  # explicit ids: move the sequences past them
+            for table in (User.__table__, Profile.__table__):
+                conn.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table.fullname}', 'id'), "
+                        f"(SELECT max(id) FROM {table.fullname}))"
+                    )
+                )
+    seconds = time.perf_counter() - started
+    return {
+        "users": count,
+        "first_id": start_id,
+        "seconds": round(seconds, 2),
+        "users_per_second": round(count / seconds),
+        "rows_per_second": round(2 * count / seconds),  # users + profiles
+    }
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument(
+        "--database-url", default=DEFAULT_URL, required=DEFAULT_URL is None, help="$DATABASE_URL"
+    )
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--batch-size", type=int, default=20_000, help="users per transaction")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password-pool", type=int, default=16, help="distinct bcrypt hashes")
+    parser.add_argument("--rounds", type=int, default=settings.bcrypt_rounds, help="bcrypt cost")
+    parser.add_argument("--email-domain", default="seed.example.com")
+    parser.add_argument("--days", type=int, default=365, help="signups spread over N days")
+    parser.add_argument("--until", type=date.fromisoformat, default=utc_today(), help="last day")
+    parser.add_argument("--start-id", type=int, help="first id (default: after the highest)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    hashes = password_pool(args.password_pool, args.rounds, args.seed)
+    logger.info("%d password hashes in %.1fs", len(hashes), time.perf_counter() - started)
+    plan = Plan(
+        seed=args.seed,
+        hashes=hashes,
+        domain=args.email_domain,
+        days=args.days,
+        until=args.until,
+        utc_suffix="+00" if args.database_url.startswith("postgresql") else "",
+    )
+    report = seed_users(
+        args.database_url,
+        args.users,
+        plan,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        start_id=args.start_id,
+    )
+    logger.info(
+        "seeded %d users from id %d in %.1fs: %d users/s, %d rows/s",
+        report["users"],
+        report["first_id"],
+        report["seconds"],
+        report["users_per_second"],
+        report["rows_per_second"],
+    )
+    logger.info(
+        "sign in as user<id>@%s with %s<id %% %d>",
+        args.email_domain,
+        PASSWORD_PREFIX,
+        args.password_pool,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Factories building every UserRepository backend on throwaway storage.
+
+Shared by the conformance tests (tests/test_repositories.py) and the
+repository benchmarks (benchmarks/test_repository_benchmark.py) so both
+exercise exactly the same backends.
+"""
+
+import asyncio
+import contextlib
+import importlib.util
+from collections.abc import Awaitable, Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.base import SCHEMA_NAME, Base
+from app.repositories import (
+    AsyncSqlUserRepository,
+    InMemoryUserRepository,
+    JsonFileUserRepository,
+    SqlUserRepository,
+    UserRepository,
+)
+from app.services.user_service import JsonUserStore
+
+# SQLite has no schemas: map core_user_service.* onto the main database
+SQLITE_OPTIONS: dict[str, Any] = {
+    "poolclass": StaticPool,
+    "connect_args": {"check_same_thread": False},
+    "execution_options": {"schema_translate_map": {SCHEMA_NAME: None}},
+}
+
+BACKENDS = ["memory", "json", "sql", "async-sql"]
+# The async backend also needs greenlet (sqlalchemy[asyncio]), not installed with SQLAlchemy 2.1
+HAS_AIOSQLITE = all(importlib.util.find_spec(name) for name in ("aiosqlite", "greenlet"))
+
+
+class SyncAdapter:
+    """Expose an AsyncUserRepository through the synchronous interface."""
+
+    def __init__(self, repo: Any, loop: asyncio.AbstractEventLoop) -> None:
+        self._repo = repo
+        self._loop = loop
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method: Callable[..., Awaitable[Any]] = getattr(self._repo, name)
+        return lambda *args, **kwargs: self._loop.run_until_complete(method(*args, **kwargs))
+
+
+@contextlib.contextmanager
+def _sql() -> Iterator[UserRepository]:
+    engine = create_engine("sqlite://", **SQLITE_OPTIONS)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield SqlUserRepository(session)
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@contextlib.contextmanager
+def _async_sql() -> Iterator[UserRepository]:
+    # pylint: disable-next=import-outside-toplevel
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    loop = asyncio.new_event_loop()
+    engine = create_async_engine("sqlite+aiosqlite://", **SQLITE_OPTIONS)
+
+    async def _setup() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    loop.run_until_complete(_setup())
+    session = async_sessionmaker(bind=engine, expire_on_commit=False)()
+    try:
+        yield SyncAdapter(AsyncSqlUserRepository(session), loop)
+    finally:
+        loop.run_until_complete(session.close())
+        loop.run_until_complete(engine.dispose())
+        loop.close()
+
+
+@contextlib.contextmanager
+def make_repository(backend: str, tmp_path: Path) -> Iterator[UserRepository]:
+    """Build an empty repository for ``backend`` and tear it down afterwards."""
+    if backend == "memory":
+        yield InMemoryUserRepository()
+    elif backend == "json":
+        yield JsonFileUserRepository(JsonUserStore(tmp_path / "users.json"))
+    elif backend == "sql":
+        with _sql() as repo:
+            yield repo
+    elif backend == "async-sql":
+        with _async_sql() as repo:
+            yield repo
+    else:
+        raise ValueError(f"unknown backend {backend!r}")
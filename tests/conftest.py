@@ -0,0 +1,170 @@
+"""
+Shared pytest fixtures: isolated database, seeding factory and auth helpers.
+
+Every test runs inside a transaction that is rolled back afterwards; code
+under test that calls ``commit()`` only releases a SAVEPOINT. By default
+the database is SQLite in memory with the ``core_user_service`` schema
+mapped onto it; set ``TEST_DATABASE_URL`` to run against a Postgres
+instance instead. Each pytest-xdist worker gets its own database.
+"""
+
+import os
+import tempfile
+from collections.abc import Callable, Iterator
+from functools import cache
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def _cached_test_key() -> str:
+    """Return a PEM RSA key generated once per machine and shared by all workers."""
+    path = Path(tempfile.gettempdir()) / "core-user-service-test-rsa.pem"
+    if not path.exists():
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pem)
+        tmp.replace(path)
+    return path.read_text(encoding="ascii")
+
+
+# Settings are read at import time: configure the environment before importing app
+os.environ.setdefault("DATABASE_URL", os.environ.get("TEST_DATABASE_URL", "sqlite://"))
+os.environ.setdefault("RSA_PRIVATE_KEY", _cached_test_key())
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ["USER_BACKEND"] = "sql"
+os.environ.setdefault("PURGE_INTERVAL_SECONDS", "0")  # tests run the purge explicitly
+os.environ.setdefault("IDEMPOTENCY_EXPIRY_INTERVAL_SECONDS", "0")  # tests expire keys explicitly
+os.environ.setdefault("WARMUP_ENABLED", "false")  # tests run the warm-up explicitly
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import Engine, create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.database import get_db  # noqa: E402
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.main import app  # noqa: E402
+from app.middleware.timing import install_sql_timing  # noqa: E402
+from app.models.base import SCHEMA_NAME, Base  # noqa: E402
+from app.repositories import Role, SqlUserRepository, StoredUser  # noqa: E402
+
+TEST_PASSWORD = "password123"
+
+
+def _make_engine(url: str) -> Engine:
+    if not url.startswith("sqlite"):
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))  # search indexes
+        return engine
+
+    engine = create_engine(
+        url,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+        execution_options={"schema_translate_map": {SCHEMA_NAME: None}},
+    )
+
+    # pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN
+    @event.listens_for(engine, "connect")
+    def _disable_pysqlite_transactions(dbapi_connection, _record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+@pytest.fixture(scope="session", name="engine")
+def fixture_engine() -> Iterator[Engine]:
+    """Engine with the schema created once per test session (per xdist worker)."""
+    engine = _make_engine(os.environ["DATABASE_URL"])
+    install_sql_timing(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="db_session")
+def fixture_db_session(engine: Engine) -> Iterator[Session]:
+    """Session bound to an outer transaction that is rolled back after the test."""
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, autoflush=False, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(name="client")
+def fixture_client(db_session: Session) -> Iterator[TestClient]:
+    """Test client whose get_db dependency yields the per-test session."""
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.pop(get_db, None)
+
+
+@cache
+def password_hash(password: str) -> str:
+    """Hash each distinct test password only once per worker."""
+    return get_password_hash(password)
+
+
+@pytest.fixture(name="make_user")
+def fixture_make_user(db_session: Session) -> Callable[..., StoredUser]:
+    """Factory inserting users directly through the repository."""
+    repo = SqlUserRepository(db_session)
+    counter = iter(range(1, 1_000_000))
+
+    def make_user(
+        role: Role = "user",
+        password: str = TEST_PASSWORD,
+        email: str | None = None,
+        username: str | None = None,
+        **profile: str,
+    ) -> StoredUser:
+        n = next(counter)
+        return repo.create(
+            email=email or f"{role}{n}@visiobook.com",
+            username=username or f"{role}{n}",
+            password_hash=password_hash(password),
+            role=role,
+            **profile,
+        )
+
+    return make_user
+
+
+@pytest.fixture(name="admin_user")
+def fixture_admin_user(make_user: Callable[..., StoredUser]) -> StoredUser:
+    return make_user(role="admin", first_name="Alice", last_name="Admin")
+
+
+@pytest.fixture(name="regular_user")
+def fixture_regular_user(make_user: Callable[..., StoredUser]) -> StoredUser:
+    return make_user(role="user", first_name="Bob", last_name="User")
+
+
+@pytest.fixture(name="auth_headers")
+def fixture_auth_headers() -> Callable[[StoredUser], dict[str, str]]:
+    """Build bearer headers for a user without going through /login (no bcrypt)."""
+
+    def auth_headers(user: StoredUser) -> dict[str, str]:
+        return {"Authorization": f"Bearer {create_access_token({'sub': user.id})}"}
+
+    return auth_headers
@@ -0,0 +1,148 @@
+"""
+Tests for admission control and load shedding (app/middleware/admission.py).
+"""
+
+import asyncio
+
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.main import app
+from app.middleware.admission import (
+    ADMIN,
+    AUTH,
+    DEFAULT,
+    AdmissionController,
+    AdmissionGate,
+    AdmissionMiddleware,
+    ClassLimit,
+    route_class,
+)
+
+
+async def _call(app, path="/api/v1/users/me", method="GET"):
+    """Run one request through an ASGI app; returns (status, headers)."""
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message["headers"])
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"]
+
+
+def _admitted(app, concurrency: int, queue: int, max_wait: float):
+    limit = ClassLimit(concurrency, queue)
+    controller = AdmissionController({AUTH: limit, ADMIN: limit, DEFAULT: limit}, max_wait)
+    return AdmissionMiddleware(app, controller), controller
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        ("GET", "/health", None),
+        ("GET", "/ready", None),
+        ("POST", "/api/v1/auth/login", AUTH),
+        ("POST", "/api/v1/auth/register", AUTH),
+        ("GET", "/api/v1/auth/.well-known/jwks.json", DEFAULT),
+        ("GET", "/api/v1/users", ADMIN),
+        ("GET", "/metrics", None),
+        ("POST", "/api/v1/users", AUTH),
+        ("PUT", "/api/v1/users/42", AUTH),
+        ("PUT", "/api/v1/users/me", AUTH),
+        ("DELETE", "/api/v1/users/42", DEFAULT),
+        ("GET", "/api/v1/users/search", ADMIN),
+        ("PATCH", "/api/v1/users:batchUpdate", ADMIN),
+        ("GET", "/api/v1/users/42", DEFAULT),
+    ],
+)
+def test_route_classes(method, path, expected):
+    assert route_class(method, path) == expected
+
+
+def test_gate_queues_hands_over_and_sheds():
+    """FIFO hand-over on release; full queue and expired waits are shed."""
+
+    async def scenario():
+        gate = AdmissionGate(ClassLimit(concurrency=1, queue=1))
+        assert await gate.acquire(1.0)
+        queued = asyncio.create_task(gate.acquire(1.0))
+        await asyncio.sleep(0)
+        assert gate.waiting == 1
+        assert not await gate.acquire(1.0)  # queue full
+        gate.release(0.01)
+        assert await queued
+        assert gate.in_flight == 1
+
+        assert not await gate.acquire(0.01)  # nobody releases in time
+        gate.release(0.01)
+        assert gate.in_flight == 0
+        return gate.snapshot()
+
+    snapshot = asyncio.run(scenario())
+    assert (snapshot["admitted"], snapshot["rejected"], snapshot["timed_out"]) == (2, 1, 1)
+
+
+def test_overloaded_requests_get_503_but_probes_pass():
+    """Shed requests get Retry-After; health probes bypass a saturated service."""
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def blocked(scope, _receive, send):
+            if scope["path"] != "/health":
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        app, _controller = _admitted(blocked, concurrency=1, queue=0, max_wait=1.0)
+        running = asyncio.create_task(_call(app))
+        await asyncio.sleep(0)
+        shed_status, shed_headers = await _call(app)
+        probe_status, _ = await _call(app, "/health")
+        release.set()
+        return shed_status, shed_headers, probe_status, (await running)[0]
+
+    shed_status, shed_headers, probe_status, running_status = asyncio.run(scenario())
+    assert shed_status == 503
+    assert int(shed_headers[b"retry-after"]) >= 1
+    assert probe_status == 200
+    assert running_status == 200
+
+
+def test_admission_metrics_endpoint(client, admin_user, regular_user, auth_headers):
+    """Admins read the per-class counters; this request itself was admitted as admin."""
+    response = client.get("/api/v1/debug/admission", headers=auth_headers(admin_user))
+    assert response.status_code == 200
+    metrics = response.json()
+    assert set(metrics) == {AUTH, ADMIN, DEFAULT}
+    assert metrics[ADMIN]["in_flight"] == 1
+    forbidden = client.get("/api/v1/debug/admission", headers=auth_headers(regular_user))
+    assert forbidden.status_code == 403
+
+
+def test_admission_metrics_are_exported_to_prometheus(client):
+    """Queue depth and shed counts per route class, as Prometheus metrics."""
+    controller = app.state.admission
+    controller.gates[AUTH].rejected += 2
+    try:
+        response = client.get("/metrics")
+    finally:
+        controller.gates[AUTH].rejected -= 2
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    families = {family.name: family for family in text_string_to_metric_families(response.text)}
+    assert {"admission_queue_depth", "admission_rejected", "admission_timed_out"} <= set(families)
+    rejected = {
+        sample.labels["route_class"]: sample.value
+        for sample in families["admission_rejected"].samples
+        if sample.name == "admission_rejected_total"
+    }
+    assert rejected[AUTH] >= 2
+    assert set(rejected) == {AUTH, ADMIN, DEFAULT}
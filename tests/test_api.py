@@ -4,12 +4,14 @@ Basic test for the FastAPI application.
 
 from fastapi.testclient import TestClient
 
+from app.core.dependencies import get_read_user_repository, get_user_repository
 from app.main import app
+from app.middleware.read_your_writes import HEADER_NAME, ReadYourWritesMiddleware
+from app.repositories import JsonFileUserRepository
+from app.services.user_service import JsonUserStore
 
-client = TestClient(app)
 
-
-def test_health_endpoint():
+def test_health_endpoint(client):
     """Test the health check endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
@@ -20,22 +22,152 @@ def test_health_endpoint():
     assert "version" in data
 
 
-def test_ready_endpoint():
+def test_ready_endpoint(client):
     """Test the readiness check endpoint."""
     response = client.get("/ready")
     assert response.status_code == 200
     assert response.json() == {"status": "READY"}
 
 
-def test_users_endpoint():
+def test_users_endpoint(client, admin_user, regular_user, auth_headers):
     """Test the users list endpoint."""
-    response = client.get("/api/v1/users/")
+    response = client.get("/api/v1/users", headers=auth_headers(admin_user))
     assert response.status_code == 200
-    # Should return a list (even if empty with mock data)
+    # Should return a list with every seeded user
     assert isinstance(response.json(), list)
+    assert {u["id"] for u in response.json()} == {admin_user.id, regular_user.id}
+
+
+def test_users_search_endpoint(client, admin_user, regular_user, auth_headers):
+    """Admins search users by email, username or name; results are paginated."""
+    response = client.get(
+        "/api/v1/users/search", params={"q": "bob"}, headers=auth_headers(admin_user)
+    )
+    assert response.status_code == 200
+    assert [u["id"] for u in response.json()] == [regular_user.id]
+
+    page = client.get(
+        "/api/v1/users/search",
+        params={"q": "user", "limit": 1, "offset": 0},
+        headers=auth_headers(admin_user),
+    )
+    assert [u["id"] for u in page.json()] == [regular_user.id]
+
+    assert (
+        client.get(
+            "/api/v1/users/search", params={"q": "bob"}, headers=auth_headers(regular_user)
+        ).status_code
+        == 403
+    )
+    assert client.get("/api/v1/users/search", headers=auth_headers(admin_user)).status_code == 422
+
+
+def test_users_stats_endpoint(client, admin_user, regular_user, auth_headers):
+    """Admins get role totals and a zero-filled signups series for the window."""
+    response = client.get(
+        "/api/v1/users/stats", params={"days": 7}, headers=auth_headers(admin_user)
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 2
+    assert data["by_role"] == {"admin": 1, "user": 1}
+    assert len(data["signups_per_day"]) == 7
+    assert data["signups_per_day"][-1]["count"] == 2
+    assert sum(day["count"] for day in data["signups_per_day"]) == 2
+
+    forbidden = client.get("/api/v1/users/stats", headers=auth_headers(regular_user))
+    assert forbidden.status_code == 403
+
+
+def test_users_batch_endpoints(client, admin_user, regular_user, make_user, auth_headers):
+    """Batch role change and delete return one outcome per distinct id."""
+    headers = auth_headers(admin_user)
+    other = make_user()
+    ids = [regular_user.id, other.id, "999999", regular_user.id]
+    response = client.patch(
+        "/api/v1/users:batchUpdate", json={"ids": ids, "role": "admin"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"id": regular_user.id, "status": "updated"},
+        {"id": other.id, "status": "updated"},
+        {"id": "999999", "status": "not_found"},
+    ]
+    response = client.patch(
+        "/api/v1/users:batchUpdate", json={"ids": [other.id], "role": "admin"}, headers=headers
+    )
+    assert response.json()["counts"] == {"unchanged": 1}
+
+    response = client.post(
+        "/api/v1/users:batchDelete", json={"ids": [other.id, "999999"]}, headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["counts"] == {"deleted": 1, "not_found": 1}
+    assert client.get(f"/api/v1/users/{other.id}", headers=headers).status_code == 404
+
+    forbidden = client.post(
+        "/api/v1/users:batchDelete", json={"ids": [admin_user.id]}, headers=auth_headers(other)
+    )
+    assert forbidden.status_code in (401, 403)
+    assert (
+        client.post("/api/v1/users:batchDelete", json={"ids": []}, headers=headers).status_code
+        == 422
+    )
+
+
+def test_users_batch_endpoints_normalize_ids(client, admin_user, make_user, auth_headers):
+    """Padded or blank-surrounded ids report what actually happened to the row."""
+    headers = auth_headers(admin_user)
+    first, second = make_user(), make_user()
+    response = client.patch(
+        "/api/v1/users:batchUpdate",
+        json={"ids": [f"00{first.id}", f" {first.id} ", first.id], "role": "admin"},
+        headers=headers,
+    )
+    assert response.json()["results"] == [{"id": first.id, "status": "updated"}]
+
+    with TestClient(ReadYourWritesMiddleware(app, window=5.0)) as sticky:
+        response = sticky.post(
+            "/api/v1/users:batchDelete", json={"ids": [f"0{second.id}"]}, headers=headers
+        )
+    assert response.json()["results"] == [{"id": second.id, "status": "deleted"}]
+    assert HEADER_NAME in response.headers  # same read-your-writes refresh as single writes
+    assert client.get(f"/api/v1/users/{second.id}", headers=headers).status_code == 404
+
+
+def test_user_endpoints_address_json_backend_ids(client, tmp_path, auth_headers):
+    """JSON records have "u_..." ids: /users/{id} must not require an integer."""
+    repo = JsonFileUserRepository(JsonUserStore(tmp_path / "users.json"))
+    admin = repo.create(
+        email="admin@visiobook.com", username="admin", password_hash="x", role="admin"
+    )
+    user = repo.create(email="user@visiobook.com", username="user", password_hash="x")
+    assert user.id.startswith("u_")
+    app.dependency_overrides[get_user_repository] = lambda: repo
+    app.dependency_overrides[get_read_user_repository] = lambda: repo
+    try:
+        headers = auth_headers(admin)
+        url = f"/api/v1/users/{user.id}"
+        assert client.get(url, headers=headers).json()["id"] == user.id
+        updated = client.put(url, json={"first_name": "Jane"}, headers=headers)
+        assert updated.status_code == 200
+        assert updated.json()["first_name"] == "Jane"
+        assert client.delete(url, headers=headers).status_code == 204
+        assert client.get(url, headers=headers).status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_user_repository, None)
+        app.dependency_overrides.pop(get_read_user_repository, None)
+
+
+def test_user_ids_are_normalized(client, admin_user, regular_user, auth_headers):
+    """Padded integer ids address the same user, and still count as one's own id."""
+    response = client.get(f"/api/v1/users/00{regular_user.id}", headers=auth_headers(regular_user))
+    assert response.status_code == 200
+    assert response.json()["id"] == regular_user.id
+    assert client.get("/api/v1/users/abc", headers=auth_headers(admin_user)).status_code == 404
 
 
-def test_docs_endpoint():
+def test_docs_endpoint(client):
     """Test that API docs are accessible."""
     response = client.get("/api/docs")
     assert response.status_code == 200
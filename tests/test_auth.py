@@ -3,44 +3,39 @@ Tests for authentication endpoints and role-based access control (RBAC).
 """
 
 import jwt
-from fastapi.testclient import TestClient
 
-from app.main import app
-
-client = TestClient(app)
+from tests.conftest import TEST_PASSWORD
 
 
 class TestAuthEndpoints:
     """Test authentication endpoints."""
 
-    def test_login_success_admin(self):
+    def test_login_success_admin(self, client, admin_user):
         """Test successful login with admin credentials."""
         response = client.post(
-            "/api/v1/auth/login", json={"email": "admin@visiobook.com", "password": "admin123"}
+            "/api/v1/auth/login", json={"email": admin_user.email, "password": TEST_PASSWORD}
         )
         assert response.status_code == 200
         data = response.json()
 
         # Check response structure
         assert "access_token" in data
-        assert data["token_type"] == "bearer"
-        assert data["user_id"] == "1"  # Now using integer IDs as strings
-        assert data["role"] == "admin"
-        assert data["expires_in"] == 24 * 3600  # 24 hours
+        payload = jwt.decode(data["access_token"], options={"verify_signature": False})
+        assert payload["sub"] == admin_user.id
 
-    def test_login_success_user(self):
+    def test_login_success_user(self, client, regular_user):
         """Test successful login with user credentials."""
         response = client.post(
-            "/api/v1/auth/login", json={"email": "user@visiobook.com", "password": "user123"}
+            "/api/v1/auth/login", json={"email": regular_user.email, "password": TEST_PASSWORD}
         )
         assert response.status_code == 200
         data = response.json()
 
         assert "access_token" in data
-        assert data["role"] == "user"
-        assert data["user_id"] == "2"  # Now using integer IDs as strings
+        payload = jwt.decode(data["access_token"], options={"verify_signature": False})
+        assert payload["sub"] == regular_user.id
 
-    def test_login_invalid_email(self):
+    def test_login_invalid_email(self, client):
         """Test login with invalid email."""
         response = client.post(
             "/api/v1/auth/login", json={"email": "nonexistent@example.com", "password": "admin123"}
@@ -48,78 +43,125 @@ class TestAuthEndpoints:
         assert response.status_code == 401
         assert "Email ou mot de passe incorrect" in response.json()["detail"]
 
-    def test_login_invalid_password(self):
+    def test_login_invalid_password(self, client, admin_user):
         """Test login with invalid password."""
         response = client.post(
-            "/api/v1/auth/login", json={"email": "admin@visiobook.com", "password": "wrongpassword"}
+            "/api/v1/auth/login", json={"email": admin_user.email, "password": "wrongpassword"}
         )
         assert response.status_code == 401
         assert "Email ou mot de passe incorrect" in response.json()["detail"]
 
-    def test_login_invalid_email_format(self):
+    def test_login_invalid_email_format(self, client):
         """Test login with invalid email format."""
         response = client.post(
             "/api/v1/auth/login", json={"email": "not-an-email", "password": "admin123"}
         )
         assert response.status_code == 422  # Validation error
 
+    def test_register_then_login(self, client):
+        """A registered user can log in; duplicates are rejected."""
+        payload = {"email": "new@visiobook.com", "username": "newbie", "password": "secret1"}
+        response = client.post("/api/v1/auth/register", json=payload)
+        assert response.status_code == 201
+        assert response.json()["email"] == "new@visiobook.com"
+        assert "role" not in response.json()
 
-class TestProtectedRoutes:
-    """Test protected routes and RBAC."""
+        assert client.post("/api/v1/auth/register", json=payload).status_code == 409
+
+        response = client.post(
+            "/api/v1/auth/login", json={"email": "new@visiobook.com", "password": "secret1"}
+        )
+        assert response.status_code == 200
 
-    def _get_token(self, user_type: str = "admin") -> str:
-        """Helper to get a valid token for testing."""
-        credentials = {
-            "admin": {"email": "admin@visiobook.com", "password": "admin123"},
-            "user": {"email": "user@visiobook.com", "password": "user123"},
-        }
+    def test_email_is_case_insensitive(self, client):
+        """Mixed-case emails are stored lowercased and match at login and registration."""
+        payload = {"email": "Mixed.Case@Visiobook.com", "username": "mixed", "password": "secret1"}
+        response = client.post("/api/v1/auth/register", json=payload)
+        assert response.status_code == 201
+        assert response.json()["email"] == "mixed.case@visiobook.com"
 
-        response = client.post("/api/v1/auth/login", json=credentials[user_type])
+        duplicate = {**payload, "email": "MIXED.CASE@visiobook.com", "username": "other"}
+        assert client.post("/api/v1/auth/register", json=duplicate).status_code == 409
+
+        response = client.post(
+            "/api/v1/auth/login", json={"email": "MIXED.case@visiobook.com", "password": "secret1"}
+        )
         assert response.status_code == 200
-        return response.json()["access_token"]
 
-    def test_get_my_profile_success(self):
-        """Test getting current user profile with valid token."""
-        token = self._get_token("admin")
 
-        response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
-        # Note: This might fail if user_service.get_user doesn't find the mock user
-        # but it should at least test the authentication flow
-        assert response.status_code in [200, 404]  # 404 if user not in service
+class TestProtectedRoutes:
+    """Test protected routes and RBAC."""
+
+    def test_get_my_profile_success(self, client, admin_user, auth_headers):
+        """Test getting current user profile with valid token."""
+        response = client.get("/api/v1/users/me", headers=auth_headers(admin_user))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == admin_user.id
+        assert data["role"] == "admin"
+        assert data["first_name"] == "Alice"
 
-    def test_get_my_profile_no_token(self):
+    def test_get_my_profile_no_token(self, client):
         """Test getting profile without authentication token."""
         response = client.get("/api/v1/users/me")
         assert response.status_code == 401
 
-    def test_get_my_profile_invalid_token(self):
+    def test_get_my_profile_invalid_token(self, client):
         """Test getting profile with invalid token."""
         response = client.get("/api/v1/users/me", headers={"Authorization": "Bearer invalid-token"})
         assert response.status_code == 401
 
-    def test_delete_user_admin_success(self):
-        """Test deleting user as admin."""
-        token = self._get_token("admin")
+    def test_update_my_profile(self, client, regular_user, auth_headers):
+        """Users can edit their profile but not their role."""
+        headers = auth_headers(regular_user)
+        response = client.put("/api/v1/users/me", json={"last_name": "Renamed"}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["last_name"] == "Renamed"
 
-        response = client.delete(
-            "/api/v1/users/999",  # Use integer ID instead of string
-            headers={"Authorization": f"Bearer {token}"},
+        response = client.put("/api/v1/users/me", json={"role": "admin"}, headers=headers)
+        assert response.status_code == 403
+
+    def test_get_other_user_forbidden(self, client, admin_user, regular_user, auth_headers):
+        """Regular users cannot read other profiles; admins can."""
+        url = f"/api/v1/users/{admin_user.id}"
+        assert client.get(url, headers=auth_headers(regular_user)).status_code == 403
+        assert client.get(url, headers=auth_headers(admin_user)).status_code == 200
+
+    def test_create_user_as_admin(self, client, admin_user, auth_headers):
+        """Admins create users, always with the 'user' role."""
+        response = client.post(
+            "/api/v1/users",
+            json={
+                "email": "created@visiobook.com",
+                "username": "created",
+                "password": "secret1",
+                "role": "admin",
+            },
+            headers=auth_headers(admin_user),
         )
-        # Note: This will return 404 since user 999 doesn't exist, but tests auth flow
-        assert response.status_code in [204, 404]
+        assert response.status_code == 201
+        assert response.json()["role"] == "user"
 
-    def test_delete_user_as_regular_user_forbidden(self):
-        """Test that regular users cannot delete users."""
-        token = self._get_token("user")
+    def test_delete_user_admin_success(self, client, admin_user, regular_user, auth_headers):
+        """Test deleting user as admin."""
+        headers = auth_headers(admin_user)
+
+        response = client.delete(f"/api/v1/users/{regular_user.id}", headers=headers)
+        assert response.status_code == 204
 
+        response = client.delete(f"/api/v1/users/{regular_user.id}", headers=headers)
+        assert response.status_code == 404
+
+    def test_delete_user_as_regular_user_forbidden(self, client, regular_user, auth_headers):
+        """Test that regular users cannot delete users."""
         response = client.delete(
             "/api/v1/users/999",  # Use integer ID instead of string
-            headers={"Authorization": f"Bearer {token}"},
+            headers=auth_headers(regular_user),
         )
         assert response.status_code == 403
         assert "Accès refusé" in response.json()["detail"]
 
-    def test_delete_user_no_token(self):
+    def test_delete_user_no_token(self, client):
         """Test deleting user without authentication."""
         response = client.delete("/api/v1/users/999")  # Use integer ID
         assert response.status_code == 401
@@ -128,24 +170,23 @@ class TestProtectedRoutes:
 class TestJWTTokens:
     """Test JWT token validation and expiration."""
 
-    def test_token_contains_user_data(self):
+    def test_token_contains_user_data(self, client, admin_user):
         """Test that JWT token contains correct user data."""
         # Get a token
         response = client.post(
-            "/api/v1/auth/login", json={"email": "admin@visiobook.com", "password": "admin123"}
+            "/api/v1/auth/login", json={"email": admin_user.email, "password": TEST_PASSWORD}
         )
         token = response.json()["access_token"]
 
         # Decode token (without verification for testing)
         payload = jwt.decode(token, options={"verify_signature": False})
 
-        assert payload["sub"] == "1"  # user_id - now using integer IDs as strings
-        assert payload["email"] == "admin@visiobook.com"
-        assert payload["role"] == "admin"
+        assert payload["sub"] == admin_user.id
         assert payload["iss"] == "core-user-service"
         assert "exp" in payload  # expiration time
+        assert jwt.get_unverified_header(token)["kid"] == "visiobook-key-1"
 
-    def test_expired_token_rejected(self):
+    def test_expired_token_rejected(self, client):
         """Test that expired tokens are rejected."""
         # This test would require generating an expired token
         # For now, we test with an obviously invalid token
@@ -161,7 +202,7 @@ class TestJWTTokens:
 class TestJWKSEndpoint:
     """Test JWKS endpoint."""
 
-    def test_jwks_endpoint(self):
+    def test_jwks_endpoint(self, client):
         """Test that JWKS endpoint returns valid key set."""
         response = client.get("/api/v1/auth/.well-known/jwks.json")
         assert response.status_code == 200
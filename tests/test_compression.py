@@ -0,0 +1,112 @@
+"""
+Tests for response compression (app/middleware/compression.py).
+"""
+
+import asyncio
+import zlib
+
+import pytest
+
+from app.middleware.compression import CompressionMiddleware, negotiate
+
+PREFERENCE = ("zstd", "br", "gzip")
+
+
+async def _call(app, accept_encoding="gzip"):
+    """Run one GET through an ASGI app; returns (start message, body chunks)."""
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0], [m.get("body", b"") for m in messages[1:]]
+
+
+def _app(chunks, content_type=b"application/json", extra_headers=()):
+    async def app(_scope, _receive, send):
+        headers = [(b"content-type", content_type), *extra_headers]
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            more = i < len(chunks) - 1
+            await send({"type": "http.response.body", "body": chunk, "more_body": more})
+
+    return app
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip, deflate", "gzip"),
+        ("br;q=0.5, gzip;q=0.8", "gzip"),
+        ("gzip;q=0, identity", None),
+        ("*", "zstd"),
+        ("*, zstd;q=0", "br"),
+        ("deflate", None),
+        ("GZIP;q=abc", None),
+    ],
+)
+def test_negotiation(accept, expected):
+    assert negotiate(accept, PREFERENCE) == expected
+
+
+def test_large_list_is_compressed(client, admin_user, make_user, auth_headers):
+    """The client advertises gzip; the user list comes back gzipped and decodes."""
+    for n in range(30):
+        make_user(email=f"bulk{n}@example.com", username=f"bulk{n}")
+    response = client.get(
+        "/api/v1/users", headers={**auth_headers(admin_user), "Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) == 31
+
+
+def test_small_and_unrequested_bodies_are_untouched():
+    body = b'{"status": "ok"}'
+    start, chunks = asyncio.run(_call(CompressionMiddleware(_app([body]), minimum_size=1024)))
+    headers = dict(start["headers"])
+    assert b"content-encoding" not in headers
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert chunks == [body]
+
+    large = b"[" + b'{"id": 1},' * 500 + b"]"
+    start, chunks = asyncio.run(_call(CompressionMiddleware(_app([large])), accept_encoding=""))
+    assert b"content-encoding" not in dict(start["headers"])
+    assert chunks == [large]
+
+
+def test_already_encoded_or_binary_is_passed_through():
+    payload = b"x" * 4096
+    for app in (
+        _app([payload], extra_headers=[(b"content-encoding", b"br")]),
+        _app([payload], content_type=b"image/png"),
+        _app([payload], extra_headers=[(b"cache-control", b"no-transform")]),
+    ):
+        start, chunks = asyncio.run(_call(CompressionMiddleware(app)))
+        assert dict(start["headers"]).get(b"content-encoding") in (None, b"br")
+        assert chunks == [payload]
+
+
+def test_streamed_chunks_are_decodable_as_they_arrive():
+    """Each compressed chunk is flushed: the client decodes it without the rest."""
+    parts = [b'{"id": %d, "email": "user%d@example.com"}\n' % (n, n) * 50 for n in range(5)]
+    start, chunks = asyncio.run(_call(CompressionMiddleware(_app(parts, b"application/x-ndjson"))))
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for part, chunk in zip(parts, chunks, strict=True):
+        assert decoder.decompress(chunk) == part
+    assert decoder.eof  # the last chunk carries the gzip trailer
+    assert sum(map(len, chunks)) < sum(map(len, parts))
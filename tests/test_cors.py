@@ -0,0 +1,109 @@
+"""
+Tests for CORS with cached preflights (app/middleware/cors.py).
+"""
+
+import asyncio
+
+from app.middleware.cors import CachedCORSMiddleware
+
+ORIGIN = "https://app.example.com"
+
+
+async def _unreachable(_scope, _receive, _send):
+    raise AssertionError("a preflight must not reach the application")
+
+
+async def _ok(_scope, _receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _cors(app=_unreachable, **options):
+    options = {
+        "allow_origins": [f"{ORIGIN}/"],  # as str(AnyHttpUrl) renders it
+        "allow_methods": ["GET", "POST"],
+        "allow_headers": ["Authorization"],
+        "allow_credentials": True,
+        "max_age": 7200,
+        **options,
+    }
+    return CachedCORSMiddleware(app, **options)
+
+
+async def _call(app, method, headers):
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/api/v1/users/me",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"], {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+
+
+def _preflight(app, origin=ORIGIN, method="GET", request_headers="authorization"):
+    headers = {"origin": origin, "access-control-request-method": method}
+    if request_headers:
+        headers["access-control-request-headers"] = request_headers
+    return asyncio.run(_call(app, "OPTIONS", headers))
+
+
+def test_preflight_is_answered_and_cached():
+    app = _cors()
+    for _ in range(3):
+        status, headers = _preflight(app)
+        assert status == 200
+        assert headers["access-control-allow-origin"] == ORIGIN
+        assert headers["access-control-max-age"] == "7200"
+        assert headers["access-control-allow-credentials"] == "true"
+    assert app.preflight_cache_info() == {"hits": 2, "misses": 1, "size": 1}
+
+
+def test_disallowed_preflights_are_rejected():
+    app = _cors()
+    assert _preflight(app, origin="https://evil.example.org")[0] == 400
+    assert _preflight(app, method="DELETE")[0] == 400
+    assert _preflight(app, request_headers="x-custom")[0] == 400
+
+
+def test_origin_regex():
+    app = _cors(allow_origin_regex=r"https://[a-z]+\.preview\.example\.com")
+    assert _preflight(app, origin="https://pr42.preview.example.com")[0] == 400
+    assert _preflight(app, origin="https://pr.preview.example.com")[0] == 200
+    assert _preflight(app, origin="https://pr.preview.example.com.evil.org")[0] == 400
+
+
+def test_simple_response_headers():
+    app = _cors(_ok, expose_headers=["Server-Timing"])
+    status, headers = asyncio.run(_call(app, "GET", {"origin": ORIGIN}))
+    assert status == 200
+    assert headers["access-control-allow-origin"] == ORIGIN
+    assert headers["access-control-expose-headers"] == "Server-Timing"
+    assert headers["vary"] == "Origin"
+
+    _, headers = asyncio.run(_call(app, "GET", {"origin": "https://evil.example.org"}))
+    assert "access-control-allow-origin" not in headers
+
+
+def test_app_preflight_skips_the_stack(client):
+    """Outermost: no Server-Timing (timing never ran), no route resolution."""
+    response = client.options(
+        "/api/v1/users/me",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "PATCH",
+            "Access-Control-Request-Headers": "authorization, content-type",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert int(response.headers["access-control-max-age"]) > 600
+    assert "server-timing" not in response.headers
@@ -0,0 +1,82 @@
+"""
+Tests for the background health monitor behind /health-db and /ready.
+"""
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from app.core import keys
+from app.core.database import engine as app_engine
+from app.core.health import HealthMonitor
+from app.main import app
+
+
+@pytest.fixture(name="use_monitor")
+def fixture_use_monitor():
+    """Swap the app's monitor for the test's, restoring the original afterwards."""
+    original = app.state.health_monitor
+
+    def use(monitor: HealthMonitor) -> HealthMonitor:
+        app.state.health_monitor = monitor
+        return monitor
+
+    yield use
+    app.state.health_monitor = original
+
+
+def test_endpoints_serve_the_cached_probe(client):
+    """Probes run in the monitor; the endpoints themselves never touch the database."""
+    statements = []
+    capture = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(app_engine, "before_cursor_execute", capture)
+    try:
+        health = client.get("/health-db")
+        ready = client.get("/ready")
+    finally:
+        event.remove(app_engine, "before_cursor_execute", capture)
+
+    assert health.status_code == 200
+    assert health.json()["database"] == "connected"
+    assert health.json()["checked_at"]
+    assert ready.json() == {"status": "READY"}
+    assert not statements
+
+
+def test_unreachable_database_flips_ready(client, use_monitor, tmp_path):
+    """A failed probe turns both endpoints into 503 with the reason."""
+    unreachable = create_engine(f"sqlite:///{tmp_path}/missing/dir/users.db")
+    use_monitor(HealthMonitor(unreachable, keys.private_key)).probe()
+
+    health = client.get("/health-db")
+    assert health.status_code == 503
+    assert health.json()["database"] == "disconnected"
+    ready = client.get("/ready")
+    assert ready.status_code == 503
+    assert ready.json() == {"status": "NOT_READY", "reasons": ["database_unreachable"]}
+
+
+def test_exhausted_pool_flips_ready_without_blocking(client, use_monitor, tmp_path):
+    """With every slot checked out the probe reports saturation instead of waiting."""
+    saturated = create_engine(
+        f"sqlite:///{tmp_path}/users.db", poolclass=QueuePool, pool_size=1, max_overflow=0
+    )
+    monitor = use_monitor(HealthMonitor(saturated, keys.private_key))
+    with saturated.connect():
+        started = time.perf_counter()
+        state = monitor.probe()
+        assert time.perf_counter() - started < 1.0
+        assert state.pool == {"size": 1, "checked_out": 1, "max_overflow": 0}
+        assert client.get("/ready").json()["reasons"] == ["pool_exhausted"]
+
+    monitor.probe()
+    assert client.get("/ready").status_code == 200
+
+
+def test_stale_probe_is_not_ready(client, use_monitor):
+    """If the monitor stops publishing, readiness fails rather than lying."""
+    use_monitor(HealthMonitor(app_engine, keys.private_key, stale_after=0.0)).probe()
+    time.sleep(0.01)
+    assert client.get("/ready").json()["reasons"] == ["stale"]
@@ -0,0 +1,311 @@
+"""
+Tests for Idempotency-Key replay (app/middleware/idempotency.py) and its
+store (app/services/idempotency.py).
+"""
+
+import asyncio
+import threading
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.api.v1 import auth
+from app.core.security import create_access_token
+from app.main import app
+from app.middleware import idempotency
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.read_your_writes import HEADER_NAME, ReadYourWritesMiddleware, note_write
+from app.services.idempotency import (
+    IdempotencyExpiryWorker,
+    IdempotencyStore,
+    KeyInProgressError,
+    KeyReuseError,
+    RecordedResponse,
+)
+
+REGISTER = "/api/v1/auth/register"
+
+
+def _payload(name: str) -> dict[str, str]:
+    return {"email": f"{name}@visiobook.com", "username": name, "password": "password123"}
+
+
+@pytest.fixture(name="store")
+def fixture_store(db_session: Session):
+    """The application's store, writing in the test transaction."""
+    store: IdempotencyStore = app.state.idempotency
+    connection = db_session.connection()
+    previous = store.session_factory
+    store.session_factory = lambda: Session(
+        bind=connection, join_transaction_mode="create_savepoint"
+    )
+    yield store
+    store.session_factory = previous
+
+
+@pytest.fixture(name="hashes")
+def fixture_hashes(monkeypatch):
+    """Passwords hashed by the register handler."""
+    calls = []
+    hash_password = auth.get_password_hash
+    monkeypatch.setattr(
+        auth,
+        "get_password_hash",
+        lambda password: calls.append(password) or hash_password(password),
+    )
+    return calls
+
+
+def test_retry_replays_the_recorded_response_without_running_the_handler(client, store, hashes):
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = client.post(REGISTER, json=_payload("retry"), headers=headers)
+    retry = client.post(REGISTER, json=_payload("retry"), headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.content == first.content
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    assert len(hashes) == 1
+    assert store.stats["replayed"] >= 1
+    # Without a key the retry runs again and conflicts
+    assert client.post(REGISTER, json=_payload("retry")).status_code == 409
+
+
+def test_key_reused_with_another_body_is_rejected(client, store):
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    assert client.post(REGISTER, json=_payload("first"), headers=headers).status_code == 201
+    response = client.post(REGISTER, json=_payload("second"), headers=headers)
+    assert response.status_code == 422
+    assert store.stats["mismatched"] >= 1
+
+
+def test_keys_are_scoped_to_the_caller(client, store, make_user, auth_headers):
+    key = {"Idempotency-Key": str(uuid.uuid4())}
+    payload = _payload("scoped")
+    alice, bob = make_user(role="admin"), make_user(role="admin")
+    first = client.post("/api/v1/users", json=payload, headers={**key, **auth_headers(alice)})
+    other = client.post("/api/v1/users", json=payload, headers={**key, **auth_headers(bob)})
+    assert first.status_code == 201
+    assert other.status_code == 409  # ran for bob: alice's response is not his
+    assert "idempotent-replayed" not in other.headers
+    assert store.stats["claimed"] >= 2
+
+
+def test_refreshed_token_of_the_same_user_replays(client, store, make_user):
+    key = {"Idempotency-Key": str(uuid.uuid4())}
+    payload = _payload("refreshed")
+    admin = make_user(role="admin")
+
+    def bearer(minutes: int) -> dict[str, str]:
+        token = create_access_token({"sub": admin.id}, timedelta(minutes=minutes))
+        return {"Authorization": f"Bearer {token}"}
+
+    first = client.post("/api/v1/users", json=payload, headers={**key, **bearer(30)})
+    retry = client.post("/api/v1/users", json=payload, headers={**key, **bearer(60)})
+    assert bearer(30) != bearer(60)
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert store.stats["replayed"] >= 1
+
+
+def test_anonymous_keys_are_scoped_to_the_client(client, store):
+    key = str(uuid.uuid4())
+    payload = _payload("anonymous")
+    first = client.post(REGISTER, json=payload, headers={"Idempotency-Key": key})
+    other = client.post(
+        REGISTER, json=payload, headers={"Idempotency-Key": key, "User-Agent": "other-app/1.0"}
+    )
+    assert first.status_code == 201
+    assert other.status_code == 409  # ran again: another client's response is not replayed
+    assert "idempotent-replayed" not in other.headers
+    assert store.stats["claimed"] >= 2
+
+
+def test_invalid_key_is_rejected(client):
+    response = client.post(REGISTER, json=_payload("long"), headers={"Idempotency-Key": "k" * 256})
+    assert response.status_code == 400
+
+
+def test_store_reservations_release_and_expire(store):
+    key, fingerprint = uuid.uuid4().hex, "f" * 64
+    assert store.claim(key, fingerprint, "a") is None
+    with pytest.raises(KeyInProgressError):
+        store.claim(key, fingerprint, "b")
+    store.release(key, "a")  # e.g. a 5xx: the retry runs again
+    assert store.claim(key, fingerprint, "c") is None
+
+    response = RecordedResponse(201, "application/json", b"{}")
+    assert store.complete(key, fingerprint, response, "c")
+    assert store.claim(key, fingerprint, "d") == response
+    with pytest.raises(KeyReuseError):
+        store.claim(key, "0" * 64, "e")
+
+    store.lock_seconds = 0  # a reservation whose worker died is taken over
+    other = uuid.uuid4().hex
+    try:
+        assert store.claim(other, fingerprint, "a") is None
+        assert store.claim(other, fingerprint, "b") is None
+    finally:
+        store.lock_seconds = 30.0
+
+
+@pytest.mark.parametrize("in_memory", [False, True], ids=["table", "memory"])
+def test_stale_claimant_cannot_complete_or_release_a_taken_over_key(store, in_memory):
+    if in_memory:
+        store = IdempotencyStore(None)
+    key, fingerprint = uuid.uuid4().hex, "f" * 64
+    store.lock_seconds = 0
+    try:
+        assert store.claim(key, fingerprint, "stale") is None  # reservation already expired
+    finally:
+        store.lock_seconds = 30.0
+    assert store.claim(key, fingerprint, "current") is None  # takes it over
+
+    late = RecordedResponse(500, None, b"late")
+    assert not store.complete(key, fingerprint, late, "stale")
+    store.release(key, "stale")
+    with pytest.raises(KeyInProgressError):  # still reserved for the current claimant
+        store.claim(key, fingerprint, "retry")
+
+    response = RecordedResponse(201, None, b"current")
+    assert store.complete(key, fingerprint, response, "current")
+    assert store.claim(key, fingerprint, "retry") == response
+    assert store.stats["superseded"] >= 1
+
+
+def test_expiry_worker_deletes_expired_keys(store):
+    store.ttl = 0
+    try:
+        key = uuid.uuid4().hex
+        assert store.claim(key, "f" * 64, "a") is None
+        assert store.complete(key, "f" * 64, RecordedResponse(201, None, b""), "a")
+    finally:
+        store.ttl = 86_400.0
+    assert IdempotencyExpiryWorker(store, batch_size=1).run_once() >= 1
+    assert store.claim(key, "f" * 64, "b") is None  # expired: claimable again
+
+
+def test_concurrent_duplicates_run_once_in_process():
+    runs = []
+
+    async def endpoint(_scope, receive, send):
+        request = await receive()
+        runs.append(request["body"])
+        await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b'{"id": "1"}'})
+
+    middleware = IdempotencyMiddleware(
+        endpoint, store=IdempotencyStore(None), routes={("POST", REGISTER)}
+    )
+
+    async def call():
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": REGISTER,
+            "headers": [(b"idempotency-key", b"storm")],
+        }
+        response = {}
+
+        async def receive():
+            return {"type": "http.request", "body": b'{"email": "a"}'}
+
+        async def send(message):
+            response.update(message)
+
+        await middleware(scope, receive, send)
+        return response["status"], response["body"]
+
+    async def storm():
+        return await asyncio.gather(*(call() for _ in range(10)))
+
+    results = asyncio.run(storm())
+    assert runs == [b'{"email": "a"}']
+    assert set(results) == {(201, b'{"id": "1"}')}
+
+
+async def _post(application, headers):
+    """One keyed POST /register through an ASGI app; returns (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": REGISTER,
+        "headers": [(b"idempotency-key", b"k"), *headers],
+    }
+    response = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response.update(status=message["status"], headers=message["headers"])
+        else:
+            response["body"] += message.get("body", b"")
+
+    await application(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+
+def test_replay_carries_the_endpoint_headers_and_refreshes_read_your_writes():
+    async def endpoint(_scope, _receive, send):
+        note_write()  # committed on the primary
+        headers = [(b"content-type", b"application/json"), (b"location", b"/api/v1/users/7")]
+        await send({"type": "http.response.start", "status": 201, "headers": headers})
+        await send({"type": "http.response.body", "body": b'{"id": "7"}'})
+
+    middleware = IdempotencyMiddleware(
+        endpoint, store=IdempotencyStore(None), routes={("POST", REGISTER)}
+    )
+    application = ReadYourWritesMiddleware(middleware, window=5.0, secret="s")
+
+    async def twice():
+        return await _post(application, []), await _post(application, [])
+
+    (_, first, body), (status, replayed, replayed_body) = asyncio.run(twice())
+    replayed_headers = dict(replayed)
+    assert (status, replayed_body) == (201, body)
+    assert replayed_headers[b"idempotent-replayed"] == b"true"
+    assert replayed_headers[b"location"] == b"/api/v1/users/7"
+    assert [name for name, _ in replayed].count(b"content-type") == 1
+    # The retry may never have seen the first response: its reads stay on the primary
+    assert HEADER_NAME.lower().encode() in dict(first)
+    assert HEADER_NAME.lower().encode() in replayed_headers
+
+
+def test_recorded_headers_replay_from_the_table(store):
+    key, fingerprint = uuid.uuid4().hex, "f" * 64
+    response = RecordedResponse(201, "application/json", b"{}", (("location", "/u/1"),))
+    assert store.claim(key, fingerprint, "a") is None
+    assert store.complete(key, fingerprint, response, "a")
+    store._cache.clear()  # another worker: only the table knows the key
+    assert store.claim(key, fingerprint, "b") == response
+
+
+def test_bearer_token_is_verified_off_the_event_loop(monkeypatch):
+    threads = []
+
+    def verify(_token):
+        threads.append(threading.current_thread())
+        return {"sub": "7"}
+
+    monkeypatch.setattr(idempotency, "verify_token", verify)
+
+    async def endpoint(_scope, _receive, send):
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = IdempotencyMiddleware(
+        endpoint, store=IdempotencyStore(None), routes={("POST", REGISTER)}
+    )
+
+    async def call():
+        loop_thread = threading.current_thread()
+        await _post(middleware, [(b"authorization", b"Bearer t")])
+        return loop_thread
+
+    loop_thread = asyncio.run(call())
+    assert len(threads) == 1 and threads[0] is not loop_thread
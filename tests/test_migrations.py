@@ -0,0 +1,129 @@
+"""
+Tests for the Alembic chain and the online-safe migration helpers
+(app/core/migrations.py), on SQLite with the schema attached under its name.
+"""
+
+from pathlib import Path
+
+import pytest
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.util import CommandError
+from sqlalchemy import create_engine, event, inspect, text
+
+from alembic import command
+from app.core.migrations import (
+    backfill,
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+from app.models.base import SCHEMA_NAME
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(name="schema_engine")
+def fixture_schema_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/main.db")
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_connection, _record):
+        dbapi_connection.execute(f"ATTACH DATABASE '{tmp_path}/schema.db' AS {SCHEMA_NAME}")
+
+    yield engine
+    engine.dispose()
+
+
+def _config(connection):
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    config.attributes.update(connection=connection, configure_logger=False)
+    return config
+
+
+def test_upgrade_and_downgrade_the_whole_chain(schema_engine):
+    with schema_engine.connect() as connection:
+        config = _config(connection)
+        command.upgrade(config, "head")
+        version = f"SELECT version_num FROM {SCHEMA_NAME}.alembic_version"
+        assert connection.execute(text(version)).scalar() == "0008"
+        tables = set(inspect(connection).get_table_names(schema=SCHEMA_NAME))
+        assert {"users", "profiles", "user_counters", "idempotency_keys"} <= tables
+
+        command.downgrade(config, "base")
+        assert connection.execute(text(version)).first() is None
+        assert "users" not in inspect(connection).get_table_names(schema=SCHEMA_NAME)
+
+
+def test_case_conflicts_abort_0002_before_any_write(schema_engine):
+    with schema_engine.connect() as connection:
+        config = _config(connection)
+        command.upgrade(config, "0001")
+        connection.execute(
+            text(
+                f"INSERT INTO {SCHEMA_NAME}.users (id, email, username, password, role) "
+                "VALUES (:id, :email, :username, 'x', 'USER')"
+            ),
+            [
+                {"id": 1, "email": "Ann@Example.com", "username": "ann"},
+                {"id": 2, "email": "ann@example.com ", "username": "ann2"},
+                {"id": 3, "email": "Bob@Example.com", "username": "bob"},
+            ],
+        )
+        connection.commit()
+
+        with pytest.raises(CommandError, match=r"'ann@example.com' \(2 accounts\)"):
+            command.upgrade(config, "0002")
+        connection.rollback()
+        emails = connection.execute(text(f"SELECT email FROM {SCHEMA_NAME}.users ORDER BY id"))
+        assert emails.scalars().all() == ["Ann@Example.com", "ann@example.com ", "Bob@Example.com"]
+
+        connection.execute(text(f"DELETE FROM {SCHEMA_NAME}.users WHERE id = 2"))
+        connection.commit()
+        command.upgrade(config, "0002")  # resolved: the rerun goes through
+        emails = connection.execute(text(f"SELECT email FROM {SCHEMA_NAME}.users ORDER BY id"))
+        assert emails.scalars().all() == ["ann@example.com", "bob@example.com"]
+
+
+@pytest.fixture(name="operations")
+def fixture_operations(schema_engine):
+    """Alembic ``op`` bound to a users table of 1000 rows."""
+    with schema_engine.connect() as connection:
+        connection.execute(
+            text(f"CREATE TABLE {SCHEMA_NAME}.users (id INTEGER PRIMARY KEY, email TEXT)")
+        )
+        connection.execute(
+            text(f"INSERT INTO {SCHEMA_NAME}.users (id, email) VALUES (:id, :email)"),
+            [{"id": n, "email": f"User{n}@Example.COM"} for n in range(1, 1001)],
+        )
+        connection.commit()
+        with Operations.context(MigrationContext.configure(connection)):
+            yield connection
+
+
+def test_backfill_updates_in_committed_batches(operations):
+    batches = []  # isolation level of each batch UPDATE
+
+    @event.listens_for(operations.engine, "before_cursor_execute")
+    def _record(conn, _cursor, statement, *_args):
+        if statement.startswith("UPDATE"):
+            batches.append(conn.get_execution_options().get("isolation_level"))
+
+    updated = backfill(
+        "users", "email = lower(email)", "email <> lower(email)", batch_size=300, pause=0
+    )
+    assert updated == 1000
+    assert batches == ["AUTOCOMMIT"] * 4  # ids 1..1000 in ranges of 300, each committed
+    emails = operations.execute(text(f"SELECT email FROM {SCHEMA_NAME}.users")).scalars()
+    assert all(email == email.lower() for email in emails)
+    operations.commit()
+    assert backfill("users", "email = lower(email)", "email <> lower(email)", pause=0) == 0
+
+
+def test_index_helpers_fall_back_to_plain_ddl(operations):
+    create_index_concurrently("ix_users_email", "users", ["email"], unique=True)
+    indexes = inspect(operations).get_indexes("users", schema=SCHEMA_NAME)
+    assert [(index["name"], index["unique"]) for index in indexes] == [("ix_users_email", 1)]
+    drop_index_concurrently("ix_users_email", "users")
+    assert not inspect(operations).get_indexes("users", schema=SCHEMA_NAME)
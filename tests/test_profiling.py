@@ -0,0 +1,140 @@
+"""
+Tests for the opt-in request profiling middleware and debug endpoints.
+"""
+
+from collections.abc import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import get_db
+from app.main import app
+from app.middleware import profiling
+from app.middleware.profiling import (
+    PROFILE_ID_HEADER,
+    ProfileStore,
+    ProfilingMiddleware,
+    RequestProfile,
+    _after_cursor_execute,
+    _before_cursor_execute,
+    install_sql_hooks,
+)
+
+SECRET = "profiling-secret"
+DEBUG_HEADER = {"X-Debug-Profile": SECRET}
+
+
+@pytest.fixture(name="sql_hooks")
+def fixture_sql_hooks(engine):
+    install_sql_hooks(engine)
+    yield
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _profiled_client(db_session, sample_rate: float) -> Iterator[TestClient]:
+    store: ProfileStore = app.state.profile_store
+    store.clear()
+    app.dependency_overrides[get_db] = lambda: db_session
+    middleware = ProfilingMiddleware(
+        app, store=store, sample_rate=sample_rate, header_secret=SECRET
+    )
+    with TestClient(middleware) as client:
+        yield client
+    app.dependency_overrides.pop(get_db, None)
+    store.clear()
+
+
+@pytest.fixture(name="profiled")
+def fixture_profiled(db_session, sql_hooks):  # pylint: disable=unused-argument
+    """Client behind the profiling middleware with sampling disabled."""
+    yield from _profiled_client(db_session, sample_rate=0.0)
+
+
+@pytest.fixture(name="sampled")
+def fixture_sampled(db_session, sql_hooks):  # pylint: disable=unused-argument
+    """Client behind the profiling middleware profiling every request."""
+    yield from _profiled_client(db_session, sample_rate=1.0)
+
+
+def test_admin_header_request_is_profiled(profiled, admin_user, auth_headers):
+    response = profiled.get("/api/v1/users", headers={**auth_headers(admin_user), **DEBUG_HEADER})
+    assert response.status_code == 200
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    listed = profiled.get("/api/v1/debug/profiles", headers=auth_headers(admin_user)).json()
+    assert [p["id"] for p in listed] == [profile_id]
+    assert listed[0]["path"] == "/api/v1/users"
+    assert listed[0]["trigger"] == "header"
+    assert listed[0]["sql_count"] >= 2  # current user lookup + list
+
+    detail = profiled.get(
+        f"/api/v1/debug/profiles/{profile_id}", headers=auth_headers(admin_user)
+    ).json()
+    assert detail["status_code"] == 200
+    assert any("users" in s["statement"] and s["duration_ms"] >= 0 for s in detail["sql"])
+    assert detail["call_tree"] and detail["hotspots"]
+
+
+def test_header_ignored_for_non_admin(profiled, regular_user, auth_headers):
+    response = profiled.get(
+        "/api/v1/users/me", headers={**auth_headers(regular_user), **DEBUG_HEADER}
+    )
+    assert response.status_code == 200
+    assert PROFILE_ID_HEADER not in response.headers
+    assert not app.state.profile_store.list()
+
+
+@pytest.mark.parametrize("value", ["1", SECRET + "x", ""])
+def test_header_without_the_secret_does_not_start_the_profiler(profiled, monkeypatch, value):
+    started = []
+    monkeypatch.setattr(profiling.cProfile, "Profile", lambda: started.append(1))
+    response = profiled.get("/api/v1/users", headers={"X-Debug-Profile": value})
+    assert response.status_code == 401
+    assert not started
+    assert not app.state.profile_store.list()
+
+
+def test_header_is_ignored_without_a_configured_secret(db_session, monkeypatch):
+    started = []
+    monkeypatch.setattr(profiling.cProfile, "Profile", lambda: started.append(1))
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        with TestClient(ProfilingMiddleware(app, store=ProfileStore(1))) as client:
+            client.get("/health", headers={"X-Debug-Profile": ""})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+    assert not started
+
+
+def test_requests_without_header_are_not_profiled(profiled, admin_user, auth_headers):
+    response = profiled.get("/api/v1/users/me", headers=auth_headers(admin_user))
+    assert PROFILE_ID_HEADER not in response.headers
+    assert not app.state.profile_store.list()
+
+
+def test_sampled_requests_are_profiled_without_auth(sampled):
+    response = sampled.get("/health")
+    assert PROFILE_ID_HEADER in response.headers
+    (profile,) = app.state.profile_store.list()
+    assert profile.trigger == "sample"
+    assert profile.sql_count == 0
+
+
+def test_debug_endpoints_require_admin(profiled, regular_user, auth_headers):
+    response = profiled.get("/api/v1/debug/profiles", headers=auth_headers(regular_user))
+    assert response.status_code == 403
+
+
+def test_unknown_profile_returns_404(profiled, admin_user, auth_headers):
+    response = profiled.get("/api/v1/debug/profiles/missing", headers=auth_headers(admin_user))
+    assert response.status_code == 404
+
+
+def test_store_keeps_only_the_most_recent_profiles():
+    store = ProfileStore(size=2)
+    for n in range(3):
+        store.add(RequestProfile(id=str(n), method="GET", path="/", trigger="sample", started_at=0))
+    assert [p.id for p in store.list()] == ["2", "1"]
+    assert store.get("0") is None
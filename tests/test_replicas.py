@@ -0,0 +1,168 @@
+"""
+Tests for read-replica routing and read-your-writes stickiness.
+
+Primary and replica are two SQLite files sharing the schema; the replica is
+never written to, so a read that reaches it cannot see freshly created users.
+"""
+
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import database
+from app.core.database import ReplicaSet, _build_engine, get_db
+from app.main import app
+from app.middleware import read_your_writes
+from app.middleware.read_your_writes import (
+    COOKIE_NAME,
+    HEADER_NAME,
+    ReadYourWritesMiddleware,
+    _primary_until,
+    _sign,
+)
+from app.models.base import Base
+
+REGISTRATION = {
+    "email": "replica@example.com",
+    "username": "replica",
+    "password": "password123",
+    "first_name": "Rep",
+    "last_name": "Lica",
+}
+
+
+def _sqlite_engine(path) -> Engine:
+    engine = _build_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture(name="primary")
+def fixture_primary(tmp_path) -> Iterator[Engine]:
+    engine = _sqlite_engine(tmp_path / "primary.db")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="replica")
+def fixture_replica(tmp_path) -> Iterator[Engine]:
+    engine = _sqlite_engine(tmp_path / "replica.db")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="replicated")
+def fixture_replicated(monkeypatch, primary, replica) -> Iterator[TestClient]:
+    """Client with get_db on the primary file and one replica behind stickiness."""
+    monkeypatch.setattr(database, "replicas", ReplicaSet([replica]))
+    primary_session = sessionmaker(bind=primary)
+
+    def _primary_db() -> Iterator[Session]:
+        with primary_session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = _primary_db
+    with TestClient(ReadYourWritesMiddleware(app, window=5.0)) as client:
+        yield client
+    app.dependency_overrides.pop(get_db, None)
+
+
+def _register_and_login(client: TestClient) -> dict[str, str]:
+    response = client.post("/api/v1/auth/register", json=REGISTRATION)
+    assert response.status_code == 201
+    assert COOKIE_NAME in response.cookies and HEADER_NAME in response.headers
+    login = client.post(
+        "/api/v1/auth/login",
+        json={"email": REGISTRATION["email"], "password": REGISTRATION["password"]},
+    )
+    assert login.status_code == 200
+    assert HEADER_NAME not in login.headers  # reads do not extend the window
+    return {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+def test_reads_go_to_replica_outside_the_window(replicated):
+    headers = _register_and_login(replicated)
+    replicated.cookies.clear()
+    # The replica never received the user: the lookup happens there
+    assert replicated.get("/api/v1/users/me", headers=headers).status_code == 401
+
+
+def test_cookie_keeps_reads_on_primary_after_a_write(replicated):
+    headers = _register_and_login(replicated)
+    response = replicated.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == REGISTRATION["email"]
+
+
+def test_header_keeps_reads_on_primary(replicated):
+    headers = _register_and_login(replicated)
+    until = replicated.cookies[COOKIE_NAME]
+    replicated.cookies.clear()
+    response = replicated.get("/api/v1/users/me", headers={**headers, HEADER_NAME: until})
+    assert response.status_code == 200
+
+
+def test_only_signed_deadlines_are_honoured():
+    now, key = 1_000_000.0, b"secret"
+
+    def header(value: str) -> dict:
+        return {"headers": [(HEADER_NAME.lower().encode(), value.encode())]}
+
+    assert _primary_until(header(_sign(key, now + 3)), now, 5.0, key) == now + 3
+    # Unsigned, signed with another key, or tampered with: ignored
+    assert _primary_until(header(f"{now + 3}"), now, 5.0, key) == 0.0
+    assert _primary_until(header(_sign(b"other", now + 3)), now, 5.0, key) == 0.0
+    tampered = _sign(key, now + 3).replace(f"{now + 3:.3f}", f"{now + 4:.3f}")
+    assert _primary_until(header(tampered), now, 5.0, key) == 0.0
+    # Even a signed value never reaches past the window, and a past one is dropped
+    assert _primary_until(header(_sign(key, 1e15)), now, 5.0, key) == now + 5.0
+    past = {"headers": [(b"cookie", f"{COOKIE_NAME}={_sign(key, now - 1)}".encode())]}
+    assert _primary_until(past, now, 5.0, key) == 0.0
+    assert _primary_until({"headers": [(b"cookie", b"other=1")]}, now, 5.0, key) == 0.0
+
+
+def test_issued_value_resent_after_the_window_reads_from_replica(monkeypatch, replicated):
+    """Replaying the value a write returned does not extend the primary window."""
+    clock = [1_000_000.0]
+    monkeypatch.setattr(read_your_writes, "time", SimpleNamespace(time=lambda: clock[0]))
+    headers = _register_and_login(replicated)
+    until = replicated.cookies[COOKIE_NAME]
+    replicated.cookies.clear()
+    assert replicated.get("/api/v1/users/me", headers={**headers, HEADER_NAME: until}).is_success
+
+    clock[0] += 6.0  # past the 5 s window
+    response = replicated.get("/api/v1/users/me", headers={**headers, HEADER_NAME: until})
+    assert response.status_code == 401  # looked up on the replica
+    replicated.cookies.set(COOKIE_NAME, until)
+    assert replicated.get("/api/v1/users/me", headers=headers).status_code == 401
+
+
+def test_replicas_are_used_round_robin(tmp_path):
+    engines = [_sqlite_engine(tmp_path / f"r{n}.db") for n in range(2)]
+    replicas = ReplicaSet(engines)
+    picked = [replicas.session() for _ in range(4)]
+    assert [s.get_bind() for s in picked] == engines * 2
+    for session in picked:
+        session.close()
+
+
+def test_failing_replica_is_ejected(tmp_path, replica):
+    broken = _build_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    replicas = ReplicaSet([broken, replica], eject_seconds=60)
+    for _ in range(3):
+        session = replicas.session()
+        assert session is not None and session.get_bind() is replica
+        session.close()
+    assert replicas.healthy() == [replica]
+
+
+def test_read_db_falls_back_to_primary_when_no_replica_is_healthy(monkeypatch, tmp_path):
+    broken = _build_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    monkeypatch.setattr(database, "replicas", ReplicaSet([broken]))
+    primary = object()
+    dependency = database.get_read_db(primary)
+    assert next(dependency) is primary
@@ -0,0 +1,334 @@
+"""
+Conformance tests: every UserRepository backend must behave identically.
+"""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.user import Profile, User
+from app.repositories import DuplicateUserError, SqlUserRepository, utc_today
+from app.repositories.sql import _PURGEABLE_IDS
+from app.services.purge_worker import PurgeWorker
+from tests.backends import BACKENDS, HAS_AIOSQLITE, SQLITE_OPTIONS, make_repository
+
+
+@pytest.fixture(name="repo", params=BACKENDS)
+def fixture_repo(request, tmp_path):
+    """Yield an empty repository for each backend."""
+    if request.param == "async-sql" and not HAS_AIOSQLITE:
+        pytest.skip("aiosqlite or greenlet not installed")
+    with make_repository(request.param, tmp_path) as repo:
+        yield repo
+
+
+def _create(repo, n: int, **extra):
+    return repo.create(
+        email=f"user{n}@example.com", username=f"user{n}", password_hash=f"hash{n}", **extra
+    )
+
+
+def test_create_and_get(repo):
+    """Created users can be read back by id, email and username."""
+    user = _create(repo, 1, first_name="Jane", last_name="Doe")
+
+    assert user.email == "user1@example.com"
+    assert user.role == "user"
+    assert (user.first_name, user.last_name) == ("Jane", "Doe")
+    assert repo.get(user.id) == user
+    assert repo.get_by_email("user1@example.com") == user
+    assert repo.get_by_username("user1") == user
+    assert repo.get("424242") is None
+    assert repo.get_by_email("missing@example.com") is None
+
+
+def test_create_without_profile(repo):
+    """Profile fields are optional."""
+    user = _create(repo, 1, role="admin")
+    assert user.role == "admin"
+    assert user.first_name is None and user.last_name is None
+    assert repo.get(user.id) == user
+
+
+def test_exists_and_duplicates(repo):
+    """Email and username are unique."""
+    _create(repo, 1)
+    assert repo.exists("user1@example.com", "other")
+    assert repo.exists("other@example.com", "user1")
+    assert not repo.exists("other@example.com", "other")
+
+    with pytest.raises(DuplicateUserError):
+        repo.create(email="user1@example.com", username="fresh", password_hash="h")
+    with pytest.raises(DuplicateUserError):
+        repo.create(email="fresh@example.com", username="user1", password_hash="h")
+
+
+def test_email_and_username_ignore_case(repo):
+    """Emails are stored lowercased; both are matched and unique regardless of case."""
+    user = repo.create(email=" Jane.Doe@Example.COM", username="JaneDoe", password_hash="h")
+
+    assert user.email == "jane.doe@example.com"
+    assert user.username == "JaneDoe"
+    assert repo.get_by_email("JANE.DOE@example.com") == user
+    assert repo.get_by_username("janedoe") == user
+    assert repo.exists("other@example.com", "JANEDOE")
+
+    with pytest.raises(DuplicateUserError):
+        repo.create(email="jane.doe@EXAMPLE.com", username="fresh", password_hash="h")
+    with pytest.raises(DuplicateUserError):
+        repo.create(email="fresh@example.com", username="janedoe", password_hash="h")
+
+    updated = repo.update(user.id, {"email": "Jane@Example.com"})
+    assert updated is not None and updated.email == "jane@example.com"
+
+
+def test_search_ranks_and_paginates(repo):
+    """Exact matches first, then prefix matches by username; limit/offset page through."""
+    repo.create(email="alice@example.com", username="alice", password_hash="h")
+    repo.create(email="alicia@example.com", username="Alicia", password_hash="h")
+    repo.create(email="bob@example.com", username="bob", password_hash="h", last_name="Alison")
+    repo.create(email="carol@example.com", username="carol", password_hash="h")
+
+    def usernames(*args, **kwargs):
+        return [user.username for user in repo.search(*args, **kwargs)]
+
+    assert usernames("ALI") == ["alice", "Alicia", "bob"]
+    assert usernames("ali", limit=2, offset=1) == ["Alicia", "bob"]
+    assert usernames("alice")[0] == "alice"
+    assert usernames("carol@example.com") == ["carol"]
+    assert not usernames("zzz")
+    assert not usernames("%")  # LIKE wildcards are matched literally
+
+
+def test_stats_track_roles_and_signups(repo):
+    """Counts follow creates, role changes and deletes, for roles and signup days."""
+    today = utc_today()
+    users = [_create(repo, n) for n in range(3)]
+    _create(repo, 3, role="admin")
+    repo.update(users[0].id, {"role": "admin"})
+    repo.delete(users[1].id)
+
+    stats = repo.stats(today)
+    assert stats.by_role == {"admin": 2, "user": 1}
+    assert stats.total == 3
+    assert stats.signups == {today: 3}
+    assert not repo.stats(today + timedelta(days=1)).signups
+
+
+def test_batch_role_change_and_delete(repo):
+    """Batch operations report what they found and keep counters exact."""
+    first, second, third = (_create(repo, n) for n in range(3))
+    previous = repo.set_roles([first.id, second.id, "missing", first.id], "admin")
+    assert previous == {first.id: "user", second.id: "user"}
+    assert repo.set_roles([first.id], "admin") == {first.id: "admin"}
+    assert repo.get(second.id).role == "admin"
+    assert repo.get(third.id).role == "user"
+
+    assert repo.delete_many([first.id, third.id, "missing"]) == {first.id, third.id}
+    assert repo.delete_many([first.id]) == set()
+    assert [user.id for user in repo.list_all()] == [second.id]
+    assert repo.stats(utc_today()).total == 1
+
+
+def test_list_all(repo):
+    """Every created user is listed."""
+    created = [_create(repo, n) for n in range(5)]
+    assert sorted(u.id for u in repo.list_all()) == sorted(u.id for u in created)
+
+
+def test_update(repo):
+    """Partial updates touch only the given fields, including profile fields."""
+    user = _create(repo, 1)
+    changes = {"username": "renamed", "role": "admin", "last_name": "Smith", "password_hash": "x"}
+    updated = repo.update(user.id, changes)
+
+    assert updated is not None
+    assert updated.username == "renamed"
+    assert updated.email == user.email
+    assert updated.role == "admin"
+    assert updated.last_name == "Smith"
+    assert updated.password_hash == "x"
+    assert repo.get(user.id) == updated
+    assert repo.get_by_username("renamed") == updated
+    assert repo.get_by_username("user1") is None
+    assert repo.update("424242", {"username": "ghost"}) is None
+
+
+def test_update_conflict(repo):
+    """Updating onto another user's email is rejected."""
+    _create(repo, 1)
+    second = _create(repo, 2)
+    with pytest.raises(DuplicateUserError):
+        repo.update(second.id, {"email": "user1@example.com"})
+    assert repo.get(second.id) == second
+
+
+def test_delete(repo):
+    """Deleted users disappear and free their email/username."""
+    user = _create(repo, 1, first_name="Jane")
+    assert repo.delete(user.id) is True
+    assert repo.delete(user.id) is False
+    assert repo.get(user.id) is None
+    assert not repo.exists(user.email, user.username)
+    assert _create(repo, 1).email == user.email
+
+
+def test_sql_reads_do_not_hydrate_entities(db_session):
+    """SQL reads are column projections: nothing lands in the identity map."""
+    repo = SqlUserRepository(db_session)
+    user = _create(repo, 1, first_name="Jane")
+    db_session.expunge_all()
+
+    assert repo.get(user.id) == user
+    assert repo.get_by_email(user.email) == user
+    assert repo.list_all() == [user]
+    assert len(db_session.identity_map) == 0
+
+
+def _explain(session, lookup) -> str:
+    """Run ``lookup`` and return the database's plan for the SQL it emitted."""
+    connection = session.connection()
+    captured = []
+
+    def _capture(_conn, _cursor, statement, parameters, _context, _executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", _capture)
+    try:
+        lookup()
+    finally:
+        event.remove(connection, "before_cursor_execute", _capture)
+    statement, parameters = captured[-1]
+
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return "\n".join(str(row[-1]) for row in rows)
+    # Tiny test tables: make sure the planner picks an index whenever it can
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    return "\n".join(row[0] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "lookup, index",
+    [
+        pytest.param(lambda repo: repo.get_by_email("USER1@example.com"), "ux_users_email_lower"),
+        pytest.param(lambda repo: repo.get_by_username("User1"), "ux_users_username_lower"),
+    ],
+    ids=["email", "username"],
+)
+def test_case_insensitive_lookups_use_lower_index(db_session, lookup, index):
+    """lower(column) lookups are served by the expression indexes, not a table scan."""
+    repo = SqlUserRepository(db_session)
+    _create(repo, 1)
+    plan = _explain(db_session, lambda: lookup(repo))
+    assert index in plan, plan
+
+
+def test_search_uses_indexes(db_session):
+    """Both UNION branches of the search are index lookups."""
+    repo = SqlUserRepository(db_session)
+    _create(repo, 1, first_name="Jane")
+    plan = _explain(db_session, lambda: repo.search("user1"))
+    if db_session.connection().dialect.name == "postgresql":
+        expected = ("ix_users_email_trgm", "ix_profiles_first_name_trgm")
+    else:
+        expected = ("ux_users_email_lower", "ix_profiles_first_name_lower")
+    for index in expected:
+        assert index in plan, plan
+
+
+def test_sql_counters_roll_back_with_the_write(db_session):
+    """Counters change in the writing transaction, and stats() never reads users."""
+    repo = SqlUserRepository(db_session)
+    _create(repo, 1)
+    nested = db_session.begin_nested()
+    db_session.add(User(email="ghost@example.com", username="ghost", password="h"))
+    db_session.flush()
+    assert repo.stats(utc_today()).total == 2
+    nested.rollback()
+
+    statements = []
+    connection = db_session.connection()
+    capture = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        stats = repo.stats(utc_today())
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+    assert stats.total == 1
+    assert all("user_counters" in s and "users " not in s for s in statements)
+
+
+def test_sql_delete_is_soft_until_purged(db_session):
+    """delete() marks the row; the purge worker hard-deletes it and its profile in batches."""
+    repo = SqlUserRepository(db_session)
+    deleted = [_create(repo, n, first_name="Jane") for n in range(1, 6)]
+    kept = _create(repo, 6)
+    for user in deleted:
+        assert repo.delete(user.id)
+    reused = _create(repo, 1)  # the soft-deleted row no longer holds the email
+    assert reused.email == deleted[0].email
+    assert repo.stats(utc_today()).total == 2
+
+    def count(model):
+        return db_session.scalar(select(func.count()).select_from(model))
+
+    assert (count(User), count(Profile)) == (7, 5)
+
+    factory = sessionmaker(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    assert PurgeWorker(factory, grace=3600).run_once() == 0
+    assert PurgeWorker(factory, batch_size=2, pause=0).run_once() == 5
+    assert (count(User), count(Profile)) == (2, 0)
+    assert sorted(repo.list_all(), key=lambda user: int(user.id)) == [kept, reused]
+    assert repo.stats(utc_today()).total == 2
+
+
+def test_purge_batches_skip_rows_locked_by_another_purger():
+    """PostgreSQL: each purger locks its batch, concurrent ones take the next rows."""
+    sql = str(_PURGEABLE_IDS.compile(dialect=postgresql.dialect()))
+    assert sql.endswith("FOR UPDATE SKIP LOCKED")
+
+
+def test_concurrent_purgers_purge_each_user_once(tmp_path):
+    """Two purgers running at once (two workers) purge every row once, without errors."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'purge.db'}",
+        connect_args={"timeout": 30},
+        execution_options=SQLITE_OPTIONS["execution_options"],
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        repo = SqlUserRepository(db)
+        for n in range(40):
+            assert repo.delete(_create(repo, n, first_name="Jane").id)
+
+    workers = [PurgeWorker(factory, batch_size=3, pause=0) for _ in range(2)]
+    barrier, errors = threading.Barrier(len(workers)), []
+
+    def purge(worker):
+        barrier.wait()
+        try:
+            while worker.run_once():
+                pass
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+
+    threads = [threading.Thread(target=purge, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with factory() as db:
+        remaining = db.scalar(select(func.count()).select_from(User))
+        profiles = db.scalar(select(func.count()).select_from(Profile))
+    engine.dispose()
+    assert not errors
+    assert (remaining, profiles) == (0, 0)
+    assert sum(worker.purged for worker in workers) == 40
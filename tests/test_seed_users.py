@@ -0,0 +1,55 @@
+"""
+Tests for the bulk seeding tool (scripts/seed_users.py).
+"""
+
+from collections import Counter
+from datetime import date
+
+import bcrypt
+from sqlalchemy import func, select
+
+from app.models.user import User, UserRole
+from app.models.user_counter import ROLE, SIGNUPS, UserCounter
+from scripts.seed_users import (
+    Plan,
+    engine_for,
+    generate,
+    password_for,
+    password_pool,
+    seed_users,
+)
+
+PLAN = Plan(seed=7, hashes=password_pool(3, 4, seed=7), days=30, until=date(2026, 1, 31))
+
+
+def test_rows_depend_only_on_seed_and_id():
+    whole = generate(PLAN, 1, 2_501)
+    first, second = generate(PLAN, 1, 1_234), generate(PLAN, 1_234, 2_501)
+    assert whole[0] == first[0] + second[0]
+    assert whole[1] == first[1] + second[1]
+    assert whole[2] == first[2] + second[2]
+    assert password_pool(3, 4, seed=7) == PLAN.hashes
+    assert generate(Plan(seed=8, hashes=PLAN.hashes), 1, 10)[0] != whole[0][:9]
+
+
+def test_seed_users_writes_users_counters_and_appends(tmp_path):
+    url = f"sqlite:///{tmp_path}/seed.db"
+    report = seed_users(url, 2_000, PLAN, batch_size=700)
+    assert report["first_id"] == 1 and report["rows_per_second"] > 0
+    assert seed_users(url, 500, PLAN, batch_size=700)["first_id"] == 2_001
+
+    engine = engine_for(url)
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(User)).scalar() == 2_500
+        roles = dict(conn.execute(select(User.role, func.count()).group_by(User.role)).all())
+        counters = Counter(
+            {(kind, bucket): n for kind, bucket, n in conn.execute(select(UserCounter.__table__))}
+        )
+        email, password = conn.execute(
+            select(User.email, User.password).where(User.id == 1_234)
+        ).one()
+    assert counters[ROLE, "admin"] == roles.get(UserRole.ADMIN, 0)
+    assert counters[ROLE, "user"] == 2_500 - counters[ROLE, "admin"]
+    assert sum(n for (kind, _), n in counters.items() if kind == SIGNUPS) == 2_500
+    assert email == "user1234@seed.example.com"
+    assert bcrypt.checkpw(password_for(1_234, 3).encode(), password.encode())
@@ -0,0 +1,151 @@
+"""
+Tests for runtime-tunable settings and their reload (app/core/settings.py).
+"""
+
+import asyncio
+import os
+import signal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.database import resize_pool
+from app.core.settings import Settings, SettingsProvider, load_settings, settings
+from app.main import _install_reload_signal
+from app.middleware.admission import AdmissionGate, ClassLimit
+
+
+@pytest.fixture(name="overlay")
+def fixture_overlay(tmp_path, monkeypatch):
+    """A SETTINGS_FILE overlay and a provider reading it into a private Settings."""
+    path = tmp_path / "tunables.env"
+    path.write_text("")
+    monkeypatch.setenv("SETTINGS_FILE", str(path))
+    return path, SettingsProvider(load_settings())
+
+
+def test_reload_applies_tunables_and_notifies(overlay, monkeypatch):
+    path, provider = overlay
+    current = provider.current
+    calls = []
+    provider.subscribe(lambda s, changed: calls.append((s.admission_auth_concurrency, changed)))
+
+    path.write_text("ADMISSION_AUTH_CONCURRENCY=9\nACCESS_TOKEN_EXPIRE_MINUTES=45\n")
+    monkeypatch.setenv("ADMISSION_AUTH_CONCURRENCY", "2")  # the overlay file wins
+    assert provider.reload() == {"admission_auth_concurrency", "access_token_expire_minutes"}
+    assert provider.current is current
+    assert (current.admission_auth_concurrency, current.access_token_expire_minutes) == (9, 45)
+    assert calls == [(9, frozenset({"admission_auth_concurrency", "access_token_expire_minutes"}))]
+
+    assert provider.reload() == frozenset()  # nothing changed: nobody notified
+    assert len(calls) == 1
+
+
+def test_static_fields_need_a_restart(overlay, monkeypatch):
+    path, provider = overlay
+    path.write_text("DATABASE_URL=sqlite:///elsewhere.db\n")
+    monkeypatch.setenv("SERVICE_NAME", "renamed")
+    assert provider.reload() == frozenset()
+    assert provider.current.database_url == os.environ["DATABASE_URL"]
+    assert provider.current.service_name == "core-user-service"
+
+
+def test_invalid_reload_keeps_current_values(overlay):
+    path, provider = overlay
+    path.write_text("BCRYPT_ROUNDS=many\n")
+    rounds = provider.current.bcrypt_rounds
+    assert provider.reload() == frozenset()
+    assert provider.current.bcrypt_rounds == rounds
+
+
+def test_failing_subscriber_does_not_block_the_others(overlay):
+    path, provider = overlay
+    seen = []
+
+    def broken(_settings, _changed):
+        raise RuntimeError("boom")
+
+    provider.subscribe(broken)
+    provider.subscribe(lambda _s, changed: seen.append(changed))
+    path.write_text("LOG_LEVEL=debug\n")
+    assert provider.reload() == {"log_level"}
+    assert seen == [{"log_level"}]
+
+
+def test_resize_pool_in_place(tmp_path):
+    """Open connections survive; limits follow the new size."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db", poolclass=QueuePool, pool_size=1, max_overflow=0
+    )
+    pool = engine.pool
+    first = engine.connect()
+    resize_pool(pool, 3, 1)
+    more = [engine.connect() for _ in range(3)]  # 3 + 1 overflow in total
+    assert (pool.size(), pool.checkedout()) == (3, 4)
+    for conn in (first, *more):
+        conn.close()
+    assert pool.checkedin() == 3  # the overflow connection was closed
+
+    resize_pool(pool, 1, 0)
+    with engine.connect():
+        assert pool.checkedout() == 1
+    assert pool.checkedin() == 1  # surplus closed as connections came back
+    engine.dispose()
+
+
+def test_gate_resize_admits_waiters_and_retires_slots():
+    async def scenario():
+        gate = AdmissionGate(ClassLimit(concurrency=1, queue=4))
+        assert await gate.acquire(1.0)
+        waiters = [asyncio.create_task(gate.acquire(1.0)) for _ in range(2)]
+        await asyncio.sleep(0)
+        gate.resize(ClassLimit(concurrency=3, queue=4))
+        assert all(await asyncio.gather(*waiters))
+        assert (gate.in_flight, gate.waiting) == (3, 0)
+
+        gate.resize(ClassLimit(concurrency=1, queue=4))
+        queued = asyncio.create_task(gate.acquire(1.0))
+        await asyncio.sleep(0)
+        gate.release(0.01)
+        gate.release(0.01)  # two surplus slots retired, not handed over
+        assert (gate.in_flight, gate.waiting) == (1, 1)
+        gate.release(0.01)
+        assert await queued
+        return gate.in_flight
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_sighup_reloads_the_live_settings(monkeypatch):
+    """A real SIGHUP, handled on the event loop, updates the shared settings object."""
+    if not hasattr(signal, "SIGHUP"):
+        pytest.skip("no SIGHUP on this platform")
+    original = settings.access_token_expire_minutes
+    monkeypatch.setenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(original + 15))
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        assert _install_reload_signal(loop)
+        try:
+            os.kill(os.getpid(), signal.SIGHUP)
+            for _ in range(100):
+                if settings.access_token_expire_minutes != original:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            loop.remove_signal_handler(signal.SIGHUP)
+
+    try:
+        asyncio.run(scenario())
+        assert settings.access_token_expire_minutes == original + 15
+    finally:
+        settings.access_token_expire_minutes = original
+
+
+def test_every_tunable_is_a_field():
+    from app.core.settings import (
+        TUNABLE_FIELDS,  # pylint: disable=import-outside-toplevel
+    )
+
+    assert TUNABLE_FIELDS <= set(Settings.model_fields)
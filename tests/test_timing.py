@@ -0,0 +1,86 @@
+"""
+Tests for the Server-Timing header and the JSON access log.
+"""
+
+import json
+import logging
+import re
+
+import pytest
+
+from app.core.logging_config import json_formatter
+from app.middleware.timing import RequestTimings, timed
+from tests.conftest import TEST_PASSWORD
+
+
+def _spans(header: str) -> dict[str, str]:
+    """Map Server-Timing metric names to their raw parameters."""
+    return {part.split(";")[0].strip(): part for part in header.split(",")}
+
+
+def _count(span: str) -> int:
+    return int(re.search(r'desc="(\d+) calls"', span).group(1))
+
+
+@pytest.fixture(name="access_records")
+def fixture_access_records():
+    """Capture records of the app.access logger (it does not propagate to root)."""
+    records: list[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.emit = records.append  # type: ignore[method-assign]
+    logger = logging.getLogger("app.access")
+    logger.addHandler(handler)
+    yield records
+    logger.removeHandler(handler)
+
+
+def test_login_reports_bcrypt_jwt_and_db(client, regular_user):
+    response = client.post(
+        "/api/v1/auth/login", json={"email": regular_user.email, "password": TEST_PASSWORD}
+    )
+    assert response.status_code == 200
+    spans = _spans(response.headers["Server-Timing"])
+    assert {"db", "bcrypt", "jwt", "serialize", "total"} <= spans.keys()
+    assert _count(spans["bcrypt"]) == 1
+
+
+def test_authenticated_read_counts_queries(client, regular_user, auth_headers):
+    response = client.get("/api/v1/users/me", headers=auth_headers(regular_user))
+    spans = _spans(response.headers["Server-Timing"])
+    # token subject lookup + profile read (+ the test harness SAVEPOINT)
+    assert _count(spans["db"]) >= 2
+    assert "bcrypt" not in spans
+
+
+def test_access_log_line_per_request(client, admin_user, auth_headers, access_records):
+    client.get("/api/v1/users", headers=auth_headers(admin_user))
+    (record,) = access_records
+    assert record.method == "GET"
+    assert record.path == "/api/v1/users"
+    assert record.status == 200
+    assert record.db_count >= 2
+    assert record.duration_ms >= record.db_ms
+
+    line = json.loads(json_formatter().format(record))
+    assert line["logger"] == "app.access"
+    assert line["status"] == 200
+    assert "jwt_ms" in line
+
+
+def test_access_log_records_errors(client, access_records):
+    client.get("/api/v1/users/me")
+    (record,) = access_records
+    assert record.status == 401
+
+
+def test_timed_is_a_noop_outside_requests():
+    with timed("bcrypt"):
+        pass
+
+
+def test_request_timings_accumulate():
+    timings = RequestTimings()
+    timings.add("db", 0.001)
+    timings.add("db", 0.002)
+    assert timings.log_fields() == {"db_ms": 3.0, "db_count": 2}
+    assert timings.server_timing(0.005) == 'db;dur=3.00;desc="2 calls", total;dur=5.00'
@@ -0,0 +1,184 @@
+"""
+Tests for request tracing, W3C propagation and span export.
+"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core import database
+from app.core.database import get_db
+from app.main import app
+from app.middleware.tracing import (
+    BatchSpanProcessor,
+    FileSpanExporter,
+    InMemorySpanExporter,
+    Tracer,
+    TracingMiddleware,
+    _after_cursor_execute,
+    _before_cursor_execute,
+    _current,
+    _handle_error,
+    install_sql_tracing,
+    parse_traceparent,
+    traced,
+)
+from tests.conftest import TEST_PASSWORD
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture(name="exporter")
+def fixture_exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture(name="traced_client")
+def fixture_traced_client(request, engine, db_session, exporter):
+    """Client behind TracingMiddleware; parametrize indirectly with the sample rate."""
+    processor = BatchSpanProcessor(exporter, schedule_delay=0.05)
+    tracer = Tracer(processor, sample_rate=getattr(request, "param", 1.0))
+    install_sql_tracing(engine)
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(TracingMiddleware(app, tracer)) as client:
+        client.flush = processor.force_flush
+        yield client
+    app.dependency_overrides.pop(get_db, None)
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+    event.remove(engine, "handle_error", _handle_error)
+    processor.shutdown()
+
+
+def _by_name(spans):
+    return {span.name: span for span in spans}
+
+
+def test_login_trace(traced_client, exporter, regular_user):
+    response = traced_client.post(
+        "/api/v1/auth/login", json={"email": regular_user.email, "password": TEST_PASSWORD}
+    )
+    assert response.status_code == 200
+    traced_client.flush()
+    spans = exporter.get_finished_spans()
+    names = _by_name(spans)
+    root = names["POST /api/v1/auth/login"]
+    assert root.parent_span_id == ""
+    assert root.attributes["http.response.status_code"] == 200
+    assert root.attributes["http.route"] == "/api/v1/auth/login"
+    assert {"bcrypt.verify", "jwt.sign", "serialize", "db.query"} <= names.keys()
+    assert all(span.trace_id == root.trace_id for span in spans)
+    assert names["bcrypt.verify"].parent_span_id == root.span_id
+    assert response.headers["traceresponse"] == f"00-{root.trace_id}-{root.span_id}-01"
+
+
+def test_authenticated_request_spans(traced_client, exporter, regular_user, auth_headers):
+    traced_client.get("/api/v1/users/me", headers=auth_headers(regular_user))
+    traced_client.flush()
+    names = _by_name(exporter.get_finished_spans())
+    assert names["jwt.verify"].parent_span_id == names["get_current_user"].span_id
+    query = names["db.query"]
+    assert query.kind == 3
+    assert query.attributes["db.operation.name"] in {"SELECT", "SAVEPOINT", "RELEASE"}
+
+
+def test_incoming_traceparent_is_continued(traced_client, exporter):
+    traced_client.get("/health", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    traced_client.flush()
+    root = _by_name(exporter.get_finished_spans())["GET /health"]
+    assert root.trace_id == TRACE_ID
+    assert root.parent_span_id == PARENT_ID
+
+
+def test_get_db_records_session_lifetime(exporter, monkeypatch, db_session):
+    processor = BatchSpanProcessor(exporter)
+    root = Tracer(processor).start_root("GET /x", None)
+    monkeypatch.setattr(database, "SessionLocal", lambda: db_session)
+    token = _current.set(root)
+    try:
+        sessions = get_db()
+        next(sessions)
+        sessions.close()
+    finally:
+        _current.reset(token)
+    processor.force_flush()
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "db.session"
+    assert span.parent_span_id == root.span_id
+    processor.shutdown()
+
+
+@pytest.mark.parametrize("traced_client", [1.0], indirect=True)
+def test_unsampled_parent_is_respected(traced_client, exporter):
+    response = traced_client.get(
+        "/health", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"}
+    )
+    traced_client.flush()
+    assert "traceresponse" not in response.headers
+    assert not exporter.get_finished_spans()
+
+
+@pytest.mark.parametrize("traced_client", [0.0], indirect=True)
+def test_zero_sample_rate_records_nothing(traced_client, exporter):
+    traced_client.get("/health")
+    traced_client.flush()
+    assert not exporter.get_finished_spans()
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "",
+        "garbage",
+        f"00-{'0' * 32}-{PARENT_ID}-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+        f"ff-{TRACE_ID}-{PARENT_ID}-01",
+        f"00-{TRACE_ID}-{PARENT_ID}-zz",
+    ],
+)
+def test_invalid_traceparent_is_ignored(value):
+    assert parse_traceparent(value) is None
+
+
+def test_sample_rate_is_applied_to_trace_ids():
+    tracer = Tracer(BatchSpanProcessor(InMemorySpanExporter()), sample_rate=0.25)
+    kept = sum(tracer.start_root("r", None) is not None for _ in range(4000))
+    assert 800 < kept < 1200
+    tracer.processor.shutdown()
+
+
+def test_traced_is_a_noop_outside_a_trace():
+    with traced("work") as span:
+        assert span is None
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    exporter = FileSpanExporter(tmp_path / "traces.jsonl", "core-user-service")
+    processor = BatchSpanProcessor(exporter, schedule_delay=0.05)
+    root = Tracer(processor).start_root("GET /x", None)
+    assert root is not None
+    root.child("db.query", 3, **{"db.system": "sqlite"}).end()
+    root.end()
+    processor.shutdown()
+
+    (line,) = (tmp_path / "traces.jsonl").read_text().splitlines()
+    resource_spans = json.loads(line)["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"][0]["value"] == {
+        "stringValue": "core-user-service"
+    }
+    spans = resource_spans["scopeSpans"][0]["spans"]
+    assert [s["name"] for s in spans] == ["db.query", "GET /x"]
+    assert spans[0]["parentSpanId"] == spans[1]["spanId"]
+    assert spans[0]["attributes"] == [{"key": "db.system", "value": {"stringValue": "sqlite"}}]
+
+
+def test_full_queue_drops_spans():
+    processor = BatchSpanProcessor(InMemorySpanExporter(), max_queue_size=0)
+    span = Tracer(processor).start_root("r", None)
+    assert span is not None
+    span.end()
+    assert processor.dropped == 1
+    processor.shutdown()
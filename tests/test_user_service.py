@@ -0,0 +1,91 @@
+"""
+Tests for the indexed, append-only JSON user store.
+"""
+
+import json
+
+import pytest
+
+from app.schemas.user import UserCreate, UserUpdate
+from app.services import user_service
+from app.services.user_service import JsonUserStore
+
+
+@pytest.fixture(name="data_path")
+def fixture_data_path(tmp_path, monkeypatch):
+    """Point the service at a fresh data file seeded with one record."""
+    path = tmp_path / "users.json"
+    path.write_text(
+        json.dumps(
+            [
+                {
+                    "id": "1",
+                    "email": "admin@visiobook.com",
+                    "username": "admin",
+                    "password": "x",
+                    "role": "admin",
+                }
+            ]
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(user_service, "DATA_PATH", path)
+    return path
+
+
+def _dto(n: int) -> UserCreate:
+    return UserCreate(email=f"u{n}@ex.com", username=f"user{n}", password="secret1")
+
+
+def test_crud_round_trip(data_path):
+    """Create, read, update and delete go through the indexes."""
+    assert [u.id for u in user_service.list_users()] == ["1"]
+
+    created = user_service.create_user(_dto(1))
+    assert user_service.get_user(created.id) == created
+    assert user_service.get_user_by_email("u1@ex.com") == created
+
+    updated = user_service.update_user(created.id, UserUpdate(username="renamed", last_name="Doe"))
+    assert updated is not None
+    assert updated.username == "renamed"
+    assert updated.last_name == "Doe"
+    assert user_service.get_user_by_username("user1") is None
+    assert user_service.get_user_by_username("renamed") == updated
+
+    assert user_service.delete_user(created.id) is True
+    assert user_service.delete_user(created.id) is False
+    assert user_service.get_user(created.id) is None
+    assert user_service.update_user(created.id, UserUpdate(username="ghost")) is None
+
+    # Writes only append to the log; the snapshot is left untouched
+    assert data_path.with_suffix(".log").exists()
+    assert len(json.loads(data_path.read_text(encoding="utf-8"))) == 1
+
+
+def test_reload_picks_up_writes_from_another_worker(data_path):
+    """A second store on the same files (another process) sees new log entries."""
+    reader = JsonUserStore(data_path)
+    assert len(reader.all()) == 1
+
+    writer = JsonUserStore(data_path)
+    created = user_service.create_user(_dto(2))
+    writer.delete("1")
+
+    assert [r["id"] for r in reader.all()] == [created.id]
+
+
+def test_compaction_folds_log_into_snapshot(data_path):
+    """Past the threshold the log is rewritten into the snapshot and truncated."""
+    store = JsonUserStore(data_path, compact_threshold=3)
+    other = JsonUserStore(data_path)
+    assert len(other.all()) == 1
+
+    for n in range(3):
+        record = {"id": f"c{n}", "email": f"c{n}@ex.com", "username": f"c{n}"}
+        store.put({**record, "password": "", "role": "user"})
+
+    assert not data_path.with_suffix(".log").exists()
+    snapshot = json.loads(data_path.read_text(encoding="utf-8"))
+    assert [r["id"] for r in snapshot] == ["1", "c0", "c1", "c2"]
+    # Other workers notice the new snapshot and rebuild their indexes
+    assert [r["id"] for r in other.all()] == ["1", "c0", "c1", "c2"]
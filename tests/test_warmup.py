@@ -0,0 +1,65 @@
+"""
+Tests for the startup warm-up (app/core/warmup.py).
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from app.core.keys import get_jwks
+from app.core.settings import settings
+from app.core.warmup import WarmUp
+from app.main import app
+from app.models.base import Base
+from app.repositories import SqlUserRepository
+from tests.backends import SQLITE_OPTIONS
+
+
+@pytest.fixture(name="file_engine")
+def fixture_file_engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/users.db",
+        poolclass=QueuePool,
+        pool_size=2,
+        max_overflow=2,
+        execution_options=SQLITE_OPTIONS["execution_options"],
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_warm_up_fills_pool_and_statement_cache(file_engine):
+    report = WarmUp([file_engine], connections=4).run()
+    assert report["connections"] == 2  # capped at the pool size
+    assert file_engine.pool.checkedin() == 2
+    assert report["statements"] == 5
+    assert "statements_error" not in report
+
+    cache = file_engine._compiled_cache  # pylint: disable=protected-access
+    compiled = len(cache)
+    with Session(file_engine) as db:
+        repo = SqlUserRepository(db)
+        repo.get("1")
+        repo.get_by_email("someone@example.com")
+    assert len(cache) == compiled  # served from the warmed cache
+
+
+def test_warm_up_never_blocks_startup(tmp_path):
+    unreachable = create_engine(f"sqlite:///{tmp_path}/missing/dir/users.db")
+    report = WarmUp([unreachable]).run()
+    assert "pool_error" in report
+    assert "statements_error" in report
+    assert report["total_ms"] >= 0
+
+
+def test_lifespan_warms_up_before_ready(client, monkeypatch):
+    monkeypatch.setattr(settings, "warmup_enabled", True)
+    with client:  # nested lifespan run with warm-up on
+        assert app.state.warmup["jwks_bytes"] > 0
+        assert "mappers_ms" in app.state.warmup
+        assert client.get("/ready").json() == {"status": "READY"}
+        jwks = client.get("/api/v1/auth/.well-known/jwks.json")
+    assert jwks.headers["content-type"] == "application/json"
+    assert jwks.json() == get_jwks()